@@ -52,6 +52,8 @@ async def lifespan(app: FastAPI):
 
         app.state.genai_session = session
         app.state.frontend_ws = None
+        # request_id -> (session_id, websocket) of requests awaiting their response
+        app.state.frontend_requests = {}
 
         @session.bind()
         async def message_handler(
@@ -66,6 +68,7 @@ async def lifespan(app: FastAPI):
             agent_description: Optional[str] = "",
             agent_input_schema: Optional[dict] = None,
             agent_jwt: Optional[str] = None,
+            stream_event: Optional[dict] = None,
         ):
             await message_handler_validator(
                 session=session,
@@ -80,6 +83,7 @@ async def lifespan(app: FastAPI):
                 message_type=message_type,
                 state=app.state,
                 jwt_token=agent_jwt,
+                stream_event=stream_event,
             )
 
         logger.info("GenAI Session started")
@@ -469,6 +469,39 @@ LIMIT :limit OFFSET :offset;
         )
         return result.fetchall()
 
+    async def get_active_agents_version(self, db: AsyncSession, user_id: UUID) -> str:
+        """
+        Cheap fingerprint of everything the active agents of a user are built from.
+        Counts and latest updates of the user's agents, MCP servers and tools, A2A
+        cards and flows change whenever a row is added, changed or deleted, without
+        loading and validating the agents themselves.
+        """
+        q = text(
+            """
+SELECT 'agents', COUNT(*), COUNT(*) FILTER (WHERE is_active), MAX(updated_at)
+FROM agents WHERE creator_id = :creator_id
+UNION ALL
+SELECT 'mcpservers', COUNT(*), COUNT(*) FILTER (WHERE is_active), MAX(updated_at)
+FROM mcpservers WHERE creator_id = :creator_id
+UNION ALL
+SELECT 'mcptools', COUNT(*), COUNT(*), MAX(t.updated_at)
+FROM mcpservers as m
+JOIN mcptools as t ON m.id = t.mcp_server_id
+WHERE m.creator_id = :creator_id
+UNION ALL
+SELECT 'a2acards', COUNT(*), COUNT(*) FILTER (WHERE is_active), MAX(updated_at)
+FROM a2acards WHERE creator_id = :creator_id
+UNION ALL
+SELECT 'agentworkflows', COUNT(*), COUNT(*) FILTER (WHERE is_active), MAX(updated_at)
+FROM agentworkflows WHERE creator_id = :creator_id;
+"""
+        )
+
+        result = await db.execute(q, {"creator_id": str(user_id)})
+        return ";".join(
+            ",".join(str(value) for value in row) for row in result.fetchall()
+        )
+
     async def orm_flow_to_dto(self, flow: AgentWorkflow, db: AsyncSession):
         if not flow.flow:
             return None  # TODO: raise?
@@ -553,6 +586,16 @@ LIMIT :limit OFFSET :offset;
                 created_at=flow.created_at,
                 updated_at=flow.updated_at,
                 flow=[agent.get("id") for agent in flow.flow],
+                flow_dependencies=(
+                    [agent.get("depends_on") for agent in flow.flow]
+                    if any(agent.get("depends_on") is not None for agent in flow.flow)
+                    else None
+                ),
+                flow_bindings=(
+                    [agent.get("bindings") for agent in flow.flow]
+                    if any(agent.get("bindings") for agent in flow.flow)
+                    else None
+                ),
                 is_active=flow.is_active,
             )
             return flow_schema
@@ -1,10 +1,12 @@
+import hashlib
 import logging
 import traceback
 from typing import Annotated, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.exc import IntegrityError
 
 from src.auth.dependencies import (
@@ -38,6 +40,7 @@ async def get_active_connections(
     user_id: Optional[UUID] = Query(None),
     offset: int = 0,
     limit: int = 100,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     if not any((user_id, authorization)):
         raise HTTPException(
@@ -68,9 +71,26 @@ async def get_active_connections(
     if authorization:
         user_id = get_user_id_from_jwt(token=authorization.split(" ")[-1])
 
-    return await agent_repo.get_active_agents_by_filter(
-        db=db, agent_type=agent_type, user_id=user_id, limit=limit, offset=offset
+    # Lets catalog caches revalidate with a cheap version query instead of loading
+    # and validating all agents. The version is read before the agents, so a list
+    # changed in between is only ever tagged with an older version and fetched again
+    version = await agent_repo.get_active_agents_version(db=db, user_id=user_id)
+    etag = '"{}"'.format(
+        hashlib.sha256(
+            f"{version}|{agent_type.value}|{limit}|{offset}".encode()
+        ).hexdigest()
     )
+    if if_none_match == etag:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    active_agents = jsonable_encoder(
+        await agent_repo.get_active_agents_by_filter(
+            db=db, agent_type=agent_type, user_id=user_id, limit=limit, offset=offset
+        )
+    )
+    return JSONResponse(content=active_agents, headers={"ETag": etag})
 
 
 @agent_router.get("/")
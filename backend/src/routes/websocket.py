@@ -244,6 +244,8 @@ async def handle_frontend_ws(
             )
             req_body = ml_request.model_dump(exclude_none=True)
 
+            # Partial responses of the request are relayed to this socket only
+            websocket.app.state.frontend_requests[request_id] = (session_id, websocket)
             try:
                 session.request_id = request_id
                 session.session_id = session_id
@@ -297,6 +299,8 @@ async def handle_frontend_ws(
                     {"error": "Unexpected error occured. Try again later"}
                 )
                 await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+            finally:
+                websocket.app.state.frontend_requests.pop(request_id, None)
 
     except ValidationError as e:
         logger.debug(traceback.format_exc())
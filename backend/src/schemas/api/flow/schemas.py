@@ -10,6 +10,10 @@ from src.utils.enums import AgentType
 class FlowAgentId(BaseModel):
     id: str = None
     type: str = None
+    # indexes of earlier steps this step waits for, `None` waits for the previous step
+    depends_on: Optional[list[int]] = None
+    # JMESPath expression of each bound parameter, e.g. {"text": "steps[0].translation"}
+    bindings: Optional[dict[str, str]] = None
 
     @field_validator("id")
     def validate_id_is_uuid(cls, v) -> str:
@@ -33,10 +37,15 @@ class FlowAgentId(BaseModel):
         return v
 
     def to_json(self) -> dict:
-        return {
+        data = {
             "id": self.id,
             "type": self.type
         }
+        if self.depends_on is not None:
+            data["depends_on"] = self.depends_on
+        if self.bindings is not None:
+            data["bindings"] = self.bindings
+        return data
 
 
 class AgentFlowBase(BaseModel):
@@ -51,6 +60,19 @@ class AgentFlowBase(BaseModel):
             return v.replace(" ", "_").lower()
         raise ValueError("Flow name must be less than 55 characters")
 
+    @field_validator("flow")
+    def check_flow_dependencies(cls, v):
+        # steps may only depend on earlier steps, which keeps the flow acyclic
+        for index, agent in enumerate(v):
+            for dependency in agent.depends_on or []:
+                if not 0 <= dependency < index:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Step {index} of the flow can only depend on "
+                        f"earlier steps, got {dependency}",
+                    )
+        return v
+
 
 class AgentFlowCreate(AgentFlowBase):
     @field_validator("flow")
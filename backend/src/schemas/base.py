@@ -37,6 +37,8 @@ class AgentDTOPayload(BaseUUIDToStrModel):
     url: Optional[AnyHttpUrl] = None
     agent_schema: dict
     flow: Optional[list] = None
+    flow_dependencies: Optional[list] = None
+    flow_bindings: Optional[list] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     is_active: Optional[bool] = None
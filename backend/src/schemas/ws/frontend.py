@@ -3,6 +3,7 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 from src.auth.encrypt import decrypt_secret
+from src.utils.enums import StreamEventType
 
 
 class Flow(BaseModel):
@@ -109,3 +110,18 @@ class AgentResponseDTO(BaseModel):
         self.request_id = str(self.request_id)
         self.session_id = str(self.session_id)
         return self
+
+
+class StreamEventDTO(BaseModel):
+    session_id: str
+    request_id: str
+    event: StreamEventType
+    index: int
+    node: Optional[str] = None
+    content: Optional[str] = None
+    trace: Optional[List[dict]] = None
+
+
+class FrontendStreamEventDTO(BaseModel):
+    type: str
+    response: StreamEventDTO
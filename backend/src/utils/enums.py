@@ -34,3 +34,12 @@ class AgentIdType(Enum):
     agent_id = "agent_id"
     mcp_tool_id = "mcp_tool_id"
     a2a_card_id = "a2a_card_id"
+
+
+class StreamEventType(Enum):
+    token = "token"
+    step = "step"
+
+
+# Relayed by the router from the master agent like agent logs, not part of genai_session
+AGENT_STREAM_MESSAGE_TYPE = "agent_stream"
@@ -5,7 +5,11 @@ from typing import Optional
 
 from fastapi import WebSocket
 from genai_session.session import GenAISession
-from genai_session.utils.naming_enums import ErrorType, WSMessageType
+from genai_session.utils.naming_enums import (
+    ErrorType,
+    MasterServerName,
+    WSMessageType,
+)
 from pydantic import ValidationError
 from src.db.session import async_session
 from src.repositories.agent import agent_repo
@@ -13,8 +17,9 @@ from src.repositories.flow import agentflow_repo
 from src.repositories.log import log_repo
 from src.repositories.user import user_repo
 from src.schemas.api.agent.schemas import AgentUpdate
+from src.schemas.ws.frontend import FrontendStreamEventDTO, StreamEventDTO
 from src.schemas.ws.log import FrontendLogEntryDTO, LogCreate, LogEntry
-from src.utils.enums import AgentType
+from src.utils.enums import AGENT_STREAM_MESSAGE_TYPE, AgentType
 from src.utils.helpers import FlowValidator, generate_alias
 from src.utils.validate_uuid import validate_agent_or_send_err
 from src.utils.validation_error_handler import validation_exception_handler
@@ -36,6 +41,7 @@ async def message_handler_validator(
     session_id: str = "",
     request_id: str = "",
     jwt_token: Optional[str] = None,
+    stream_event: Optional[dict] = None,
 ):
     # NOTE: websocket connection must be initialized by the frontend before it will be accessible here
     # if websocket is not initialized it won't dump logs to the frontend
@@ -165,6 +171,36 @@ async def message_handler_validator(
 
                 return
 
+        if message_type == AGENT_STREAM_MESSAGE_TYPE:
+            # Partial responses are only relayed, the final one is stored as usual.
+            # They only go to the socket that sent the request, while it waits.
+            owner_session_id, owner_ws = state.frontend_requests.get(
+                request_id, (None, None)
+            )
+            if owner_ws is None or owner_session_id != session_id:
+                logger.debug(f"Dropping agent_stream event of {request_id=}")
+                return
+
+            if stream_event and agent_uuid == MasterServerName.MASTER_SERVER_ML.value:
+                try:
+                    response = FrontendStreamEventDTO(
+                        type=message_type,
+                        response=StreamEventDTO(
+                            session_id=session_id,
+                            request_id=request_id,
+                            **stream_event,
+                        ),
+                    )
+                    await owner_ws.send_text(response.model_dump_json())
+                except ValidationError as e:
+                    logger.error(
+                        f"Invalid agent_stream event schema. Details: {validation_exception_handler(e)}"
+                    )
+                except Exception:
+                    logger.error(f"Unexpected error occured: {traceback.format_exc()}")
+
+            return
+
     except KeyError:
         msg = "KeyError: Invalid payload structure - missing 'message_type' field"  # TODO: session_id?
         logger.error(msg)
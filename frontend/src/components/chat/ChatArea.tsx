@@ -2,7 +2,11 @@ import { useState, useEffect, useRef, FC, useMemo } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { Info, ExternalLink } from 'lucide-react';
 
-import { websocketService, AgentResponse } from '@/services/websocketService';
+import {
+  websocketService,
+  AgentResponse,
+  AgentStreamEvent,
+} from '@/services/websocketService';
 import { FileData, fileService } from '@/services/fileService';
 import {
   ChatMessage as IChatMessage,
@@ -25,8 +29,14 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const [isUploading, setIsUploading] = useState(false);
   const [isWaitingForResponse, setIsWaitingForResponse] = useState(false);
+  const [streamedText, setStreamedText] = useState('');
   const [sessionId, setSessionId] = useState<string>('');
   const [requestId, setRequestId] = useState<string>('');
+  // Request awaiting its response, its IDs are learned from its first stream event
+  const pendingRequestRef = useRef<{
+    sessionId?: string;
+    requestId?: string;
+  } | null>(null);
   const { messages, addMessage, setMessages } = useChatHistory();
   const { activeModel, isModelAvailable, isModelSelected } = useSettings();
   const [uploadedFiles, setUploadedFiles] = useState<
@@ -108,6 +118,7 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
     };
 
     addMessage(newUserMessage);
+    pendingRequestRef.current = { sessionId: id !== 'new' ? id : undefined };
     setIsWaitingForResponse(true);
     websocketService.sendMessage(messageToSend);
   };
@@ -175,9 +186,36 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
   }, [content, files, setMessages]);
 
   useEffect(() => {
-    const handleWebSocketMessage = (response: AgentResponse) => {
+    const handleWebSocketMessage = (
+      response: AgentResponse | AgentStreamEvent,
+    ) => {
+      if (response.type === 'agent_stream') {
+        const pending = pendingRequestRef.current;
+        const { session_id, request_id } = response.response;
+        if (
+          !pending ||
+          (pending.sessionId && pending.sessionId !== session_id) ||
+          (pending.requestId && pending.requestId !== request_id)
+        ) {
+          return;
+        }
+        pending.sessionId = session_id;
+        pending.requestId = request_id;
+
+        const { event, content } = response.response;
+        if (event === 'token' && content) {
+          setStreamedText(prev => prev + content);
+        } else if (event === 'step') {
+          // Text streamed before an agent call is reasoning, not the answer
+          setStreamedText('');
+        }
+        return;
+      }
+
       if (response.type === 'agent_response') {
+        pendingRequestRef.current = null;
         setIsWaitingForResponse(false);
+        setStreamedText('');
         setSessionId(response.response.session_id);
         setRequestId(response.response.request_id);
         const newMessage: IChatMessage = {
@@ -225,7 +263,16 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
               files={message.files}
             />
           ))}
-        {isWaitingForResponse && (
+        {isWaitingForResponse && streamedText && (
+          <ChatMessage
+            id="streaming"
+            content={streamedText}
+            isUser={false}
+            timestamp={new Date().toString()}
+            agents_trace={[]}
+          />
+        )}
+        {isWaitingForResponse && !streamedText && (
           <div className="flex justify-start py-4">
             <DotsSpinner />
           </div>
@@ -111,6 +111,19 @@ export interface AgentResponse {
   };
 }
 
+export interface AgentStreamEvent {
+  type: 'agent_stream';
+  response: {
+    session_id: string;
+    request_id: string;
+    event: 'token' | 'step';
+    index: number;
+    node: string | null;
+    content: string | null;
+    trace: Array<Record<string, any>> | null;
+  };
+}
+
 export interface AgentPlan {
   id: string;
   type: string;
@@ -130,7 +143,7 @@ export interface SubAgent {
   };
 }
 
-type MessageHandler = (message: AgentResponse) => void;
+type MessageHandler = (message: AgentResponse | AgentStreamEvent) => void;
 type ConnectionStateHandler = (isConnected: boolean) => void;
 
 class WebSocketService {
@@ -1,9 +1,10 @@
+import asyncio
 import json
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, ClassVar, Optional
 
 from langchain.chat_models.base import BaseChatModel
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import BaseMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.constants import END, START
 from langgraph.graph.state import CompiledStateGraph, StateGraph
@@ -13,16 +14,105 @@ from models.enums import Nodes
 from models.exceptions import UnknownAgentTypeException
 from models.states import MasterAgentState
 from utils.common import filter_and_order_by_ids, remove_last_underscore_segment
+from utils.context import ContextBuilder
 
 
 class BaseMasterAgent(ABC):
-    def __init__(self, model: BaseChatModel, agents: list[dict[str, Any]]) -> None:
-        self.model = model
-        self.agents = agents
-        self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
+    """
+    Stateless Master Agent whose graph is compiled once per class.
+
+    Everything that changes between requests (LLM, available agents, GenAI session) is passed
+    through the `configurable` section of the runnable config, see `build_config`.
+    """
+    state_schema: ClassVar[type[MasterAgentState]] = MasterAgentState
+
+    _compiled_graphs: ClassVar[dict[type["BaseMasterAgent"], CompiledStateGraph]] = {}
+
+    @classmethod
+    def get_graph(cls) -> CompiledStateGraph:
+        """
+        Returns the compiled execution graph of the agent class, compiling it on first use.
+        """
+        if (graph := BaseMasterAgent._compiled_graphs.get(cls)) is None:
+            graph = BaseMasterAgent._compiled_graphs[cls] = cls()._compile_graph()
+        return graph
+
+    @staticmethod
+    def build_config(
+            model: BaseChatModel,
+            agents: list[dict[str, Any]],
+            session: Any,
+            bound_agent_names: Optional[list[str]] = None,
+            parallel_tool_calls: bool = False,
+            max_parallel_tool_calls: int = 4,
+            context_builder: Optional[ContextBuilder] = None,
+            **kwargs
+    ) -> RunnableConfig:
+        """
+        Builds the runnable config of a single run.
+
+        Args:
+            model (BaseChatModel): Langchain chat model selecting the agents
+            agents (list[dict[str, Any]]): Agents available in this run
+            session (GenAISession): Session used to invoke GenAI agents
+            bound_agent_names (Optional[list[str]]): Agents offered to the LLM, all agents if not set
+            parallel_tool_calls (bool): Whether the supervisor may select several independent agents at once
+            max_parallel_tool_calls (int): Maximum number of agents invoked concurrently
+            context_builder (Optional[ContextBuilder]): Fits the messages sent to the LLM into a token budget
+            **kwargs: Other runnable config options, e.g. `recursion_limit`
+        """
+        return {
+            "configurable": {
+                "model": model,
+                "agents": agents,
+                "session": session,
+                "bound_agent_names": bound_agent_names,
+                "parallel_tool_calls": parallel_tool_calls,
+                "max_parallel_tool_calls": max_parallel_tool_calls,
+                "context_builder": context_builder
+            },
+            **kwargs
+        }
+
+    @staticmethod
+    def get_model(config: RunnableConfig) -> BaseChatModel:
+        return config["configurable"]["model"]
+
+    @staticmethod
+    def get_agents(config: RunnableConfig) -> list[dict[str, Any]]:
+        return config["configurable"].get("agents", [])
+
+    def get_agents_to_bind(self, config: RunnableConfig, messages: list[BaseMessage]) -> list[dict[str, Any]]:
+        """
+        Agents offered to the LLM: the pre-selected ones and the ones already called in this run.
+        """
+        agents = self.get_agents(config)
+        if (bound_agent_names := config["configurable"].get("bound_agent_names")) is None:
+            return agents
+
+        names = set(bound_agent_names)
+        for message in messages:
+            names.update(tool_call["name"] for tool_call in getattr(message, "tool_calls", None) or [])
+        return [agent for agent in agents if agent["name"] in names]
+
+    @staticmethod
+    def get_context_builder(config: RunnableConfig) -> Optional[ContextBuilder]:
+        return config["configurable"].get("context_builder")
+
+    async def build_context(
+            self,
+            config: RunnableConfig,
+            messages: list[BaseMessage],
+            tools: list[dict[str, Any]]
+    ) -> list[BaseMessage]:
+        """
+        Messages sent to the LLM, fitted into the token budget of the run if it has one.
+        """
+        context_builder = self.get_context_builder(config)
+        return await context_builder.build(messages, tools=tools) if context_builder is not None else messages
 
     @abstractmethod
-    def select_agent(self, state: MasterAgentState):
+    def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         pass
 
     def should_continue(self, state: MasterAgentState):
@@ -36,16 +126,48 @@ class BaseMasterAgent(ABC):
 
     async def execute_agent(self, state: MasterAgentState, config: RunnableConfig):
         """
-        Calls remote agent selected by Supervisor using AIConnector library.
+        Calls remote agents selected by Supervisor using AIConnector library.
+
+        Only the first tool call is executed unless parallel tool calls are enabled for the run, then all of them are
+        executed concurrently, at most `max_parallel_tool_calls` at a time.
+        """
+        messages = state.messages
+        tool_calls = messages[-1].tool_calls
+        configurable = config.get("configurable", {})
+
+        if not configurable.get("parallel_tool_calls") or len(tool_calls) == 1:
+            agent_call_message, trace = await self._invoke_agent(tool_calls[0], messages, config)
+            return {"messages": [agent_call_message], "trace": [trace]}
+
+        semaphore = asyncio.Semaphore(max(1, configurable.get("max_parallel_tool_calls", len(tool_calls))))
+
+        async def invoke_limited(agent_call: dict[str, Any]) -> tuple[ToolMessage, dict[str, Any]]:
+            async with semaphore:
+                return await self._invoke_agent(agent_call, messages, config)
+
+        logger.info(f"Invoking {len(tool_calls)} agents in parallel")
+        results = await asyncio.gather(*(invoke_limited(agent_call) for agent_call in tool_calls))
+        return {
+            "messages": [agent_call_message for agent_call_message, _ in results],
+            "trace": [trace for _, trace in results]
+        }
+
+    async def _invoke_agent(
+            self,
+            agent_call: dict[str, Any],
+            messages: list[BaseMessage],
+            config: RunnableConfig
+    ) -> tuple[ToolMessage, dict[str, Any]]:
+        """
+        Invokes a single remote agent, never raises.
         """
         from connectors.entities import AgentTypeEnum, GenAIConfig, GenAIFlowConfig, MCPConfig, A2AConfig
         from connectors.factory import ConnectorFactory
 
-        messages = state.messages
-        agent_call = messages[-1].tool_calls[0]
         agent_name = agent_call["name"]
+        agents = self.get_agents(config)
 
-        agent_to_execute = [agent for agent in self.agents if agent["name"] == agent_name][0]
+        agent_to_execute = [agent for agent in agents if agent["name"] == agent_name][0]
         agent_type = agent_to_execute["type"]
 
         try:
@@ -62,11 +184,15 @@ class BaseMasterAgent(ABC):
                     name=remove_last_underscore_segment(agent_name),
                     agents=filter_and_order_by_ids(
                         ids=agent_to_execute.get("flow", []),
-                        items=self.agents
+                        items=agents
                     ),
-                    model=self.model,
+                    model=self.get_model(config),
                     messages=messages[:-1].copy(),  # exclude last AI message
-                    session=config.get("configurable", {}).get("session")
+                    session=config.get("configurable", {}).get("session"),
+                    context_builder=self.get_context_builder(config),
+                    dependencies=agent_to_execute.get("flow_dependencies"),
+                    bindings=agent_to_execute.get("flow_bindings"),
+                    arguments=agent_call["args"]
                 )
             elif agent_type == AgentTypeEnum.mcp.value:
                 agent_config = MCPConfig(
@@ -97,7 +223,7 @@ class BaseMasterAgent(ABC):
                 name=agent_to_execute.get("name"),
                 tool_call_id=agent_call["id"],
             )
-            return {"messages": [agent_call_message], "trace": [trace]}
+            return agent_call_message, trace
 
         except Exception as e:
             error_message = f"Unexpected error while invoking {agent_name}: {e}"
@@ -109,20 +235,18 @@ class BaseMasterAgent(ABC):
                 "output": error_message,
                 "is_success": False
             }
-            return {
-                "messages": ToolMessage(
-                    content=error_message,
-                    name=agent_to_execute.get("name")
-                ),
-                "trace": [trace]
-            }
+            agent_call_message = ToolMessage(
+                content=error_message,
+                name=agent_to_execute.get("name"),
+                tool_call_id=agent_call["id"],
+            )
+            return agent_call_message, trace
 
-    @property
-    def graph(self) -> CompiledStateGraph:
+    def _compile_graph(self) -> CompiledStateGraph:
         """
         Execution graph of Master Agent.
         """
-        workflow = StateGraph(MasterAgentState)
+        workflow = StateGraph(self.state_schema)
 
         workflow.add_node(Nodes.supervisor.value, self.select_agent)
         workflow.add_node(Nodes.execute_agent.value, self.execute_agent)
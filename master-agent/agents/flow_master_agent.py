@@ -1,46 +1,94 @@
-from typing import Any
+import asyncio
+import uuid
+from typing import Any, Optional
 
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
-from models.states import MasterAgentState
+from models.states import FlowMasterAgentState
 from utils.agents import select_agent_and_resolve_parameters
+from utils.flow_bindings import build_binding_context, evaluate_bindings, schema_parameters
 from utils.tracing import trace_execution_time
 
 
 class FlowMasterAgent(BaseMasterAgent):
-    def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]], # ordered list of agents to execute
-    ) -> None:
-        super().__init__(model=model, agents=agents)
+    """
+    Executes the agents of a flow one by one. The agents in the runnable config are the ordered list of agents to
+    execute, the position in the flow is kept in the graph state.
+
+    Flows declaring dependencies between their steps are executed as a DAG: every step whose dependencies are done is
+    started at once and the independent steps run concurrently. Steps without declared dependencies wait for the
+    previous step, so a flow without any dependencies behaves like a linear one.
+
+    Parameters bound to the flow input or to outputs of earlier steps are evaluated locally, the LLM is only called
+    when a required parameter of a step is left unbound.
+    """
+    state_schema = FlowMasterAgentState
+
+    @staticmethod
+    def build_config(
+            *args,
+            flow_dependencies: Optional[list[Optional[list[int]]]] = None,
+            flow_bindings: Optional[list[Optional[dict[str, str]]]] = None,
+            flow_arguments: Optional[dict[str, Any]] = None,
+            **kwargs
+    ) -> RunnableConfig:
+        """
+        Builds the runnable config of a flow run, see `BaseMasterAgent.build_config`.
+
+        Args:
+            flow_dependencies (Optional[list[Optional[list[int]]]]): Indexes of the steps each step depends on
+            flow_bindings (Optional[list[Optional[dict[str, str]]]]): JMESPath expression of each bound parameter of
+                each step
+            flow_arguments (Optional[dict[str, Any]]): Arguments the flow was called with
+        """
+        config = BaseMasterAgent.build_config(*args, **kwargs)
+        config["configurable"].update(
+            {
+                "flow_dependencies": flow_dependencies,
+                "flow_bindings": flow_bindings,
+                "flow_arguments": flow_arguments or {}
+            }
+        )
+        return config
+
+    @staticmethod
+    def get_flow_dependencies(config: RunnableConfig, steps: int) -> Optional[list[list[int]]]:
+        dependencies = config["configurable"].get("flow_dependencies")
+        if not dependencies:
+            return None
+        if len(dependencies) != steps:
+            logger.warning(f"Flow has {steps} steps but {len(dependencies)} dependencies, executing it linearly")
+            return None
+
+        return [
+            step_dependencies if step_dependencies is not None else [step - 1] if step else []
+            for step, step_dependencies in enumerate(dependencies)
+        ]
+
+    async def select_agent(self, state: FlowMasterAgentState, config: RunnableConfig):
+        dependencies = self.get_flow_dependencies(config, steps=len(self.get_agents(config)))
+        if dependencies is not None:
+            return await self._select_ready_agents(state, config, dependencies)
 
-    async def select_agent(self, state: MasterAgentState):
         messages = state.messages
+        agents = self.get_agents(config)
         trace = {
             "name": "MasterAgent",
             "input": messages[-1].model_dump(),
         }
 
         try:
-            if self._agents_to_bind_to_llm:
-                agent_to_execute = self._agents_to_bind_to_llm.pop(0)  # get agent from the top of the list
-                logger.info(f"Resolving parameters for {agent_to_execute.get("name")} in the flow")
+            if state.step < len(agents):
+                logger.info(f"Resolving parameters for {agents[state.step]["name"]} in the flow")
 
                 async with trace_execution_time(trace=trace):
-                    response = await select_agent_and_resolve_parameters(
-                        model=self.model,
-                        messages=messages,
-                        agents=[agent_to_execute],
-                        agent_choice=True  # force the current agent to be called
-                    )
-
-                logger.success(
-                    f"Agent {agent_to_execute.get('name')} will be executed with args {response.tool_calls[0]["args"]}"
-                )
+                    tool_call = await self._resolve_step(state.step, state, config)
+
+                response = AIMessage(content="", tool_calls=[tool_call])
+                logger.success(f"Agent {tool_call["name"]} will be executed with args {tool_call["args"]}")
 
                 trace.update(
                     {
@@ -48,7 +96,12 @@ class FlowMasterAgent(BaseMasterAgent):
                         "is_success": True
                     }
                 )
-                return {"messages": [response], "trace": [trace]}
+                return {
+                    "messages": [response],
+                    "trace": [trace],
+                    "step": state.step + 1,
+                    "step_tool_calls": {**state.step_tool_calls, state.step: tool_call["id"]}
+                }
 
         except Exception as e:
             error_message = f"Unexpected error while resolving parameters for agent in the flow: {e}"
@@ -61,3 +114,112 @@ class FlowMasterAgent(BaseMasterAgent):
                 "is_success": False
             }
             return {"messages": [AIMessage(content=error_message)], "trace": [trace]}
+
+    async def _select_ready_agents(
+            self,
+            state: FlowMasterAgentState,
+            config: RunnableConfig,
+            dependencies: list[list[int]]
+    ):
+        """
+        Resolves the parameters of all steps whose dependencies are done, the calls are executed concurrently.
+        """
+        messages = state.messages
+        agents = self.get_agents(config)
+        started = state.step_tool_calls
+        trace = {
+            "name": "MasterAgent",
+            "input": messages[-1].model_dump(),
+        }
+
+        ready = [
+            step for step in range(len(agents))
+            if step not in started and all(dependency in started for dependency in dependencies[step])
+        ]
+        if not ready:
+            return self._join_results(state, dependencies)
+
+        try:
+            logger.info(f"Resolving parameters for {[agents[step]["name"] for step in ready]} in the flow")
+
+            async with trace_execution_time(trace=trace):
+                tool_calls = await asyncio.gather(*(self._resolve_step(step, state, config) for step in ready))
+
+            response = AIMessage(content="", tool_calls=list(tool_calls))
+            for tool_call in response.tool_calls:
+                logger.success(f"Agent {tool_call["name"]} will be executed with args {tool_call["args"]}")
+
+            trace.update(
+                {
+                    "output": response.model_dump(),
+                    "is_success": True
+                }
+            )
+            step_tool_calls = {
+                **started,
+                **{step: tool_call["id"] for step, tool_call in zip(ready, response.tool_calls)}
+            }
+            return {"messages": [response], "trace": [trace], "step_tool_calls": step_tool_calls}
+
+        except Exception as e:
+            error_message = f"Unexpected error while resolving parameters for agents in the flow: {e}"
+            logger.exception(error_message)
+
+            trace = {
+                "name": "MasterAgent",
+                "input": messages[-1].model_dump(),
+                "output": error_message,
+                "is_success": False
+            }
+            return {"messages": [AIMessage(content=error_message)], "trace": [trace]}
+
+    async def _resolve_step(self, step: int, state: FlowMasterAgentState, config: RunnableConfig) -> dict[str, Any]:
+        """
+        Resolves the tool call of a step from its parameter bindings, asking the LLM only for unbound required ones.
+        """
+        agent = self.get_agents(config)[step]
+        bindings = config["configurable"].get("flow_bindings") or []
+        step_bindings = bindings[step] if step < len(bindings) else None
+
+        arguments = {}
+        if step_bindings:
+            context = build_binding_context(
+                messages=state.messages,
+                arguments=config["configurable"].get("flow_arguments", {}),
+                step_tool_calls=state.step_tool_calls
+            )
+            arguments = evaluate_bindings(step_bindings, context)
+
+            _, required = schema_parameters(agent["agent_schema"])
+            if all(parameter in arguments for parameter in required):
+                logger.info(f"Parameters of {agent["name"]} are bound, skipping LLM call")
+                return {"name": agent["name"], "args": arguments, "id": f"call_{uuid.uuid4().hex}", "type": "tool_call"}
+
+        response = await select_agent_and_resolve_parameters(
+            model=self.get_model(config),
+            messages=await self.build_context(config, state.messages, tools=[agent["agent_schema"]]),
+            agents=[agent["agent_schema"]],
+            agent_choice=True  # force the current agent to be called
+        )
+        tool_call = response.tool_calls[0]
+        return {**tool_call, "args": {**tool_call["args"], **arguments}}
+
+    @staticmethod
+    def _join_results(state: FlowMasterAgentState, dependencies: list[list[int]]) -> Optional[dict[str, Any]]:
+        """
+        Joins the outputs of the last steps of the flow, the steps no other step depends on.
+        """
+        dependent_on = {dependency for step_dependencies in dependencies for dependency in step_dependencies}
+        final_steps = [step for step in range(len(dependencies)) if step not in dependent_on]
+        if len(final_steps) == 1:
+            return None  # the output of the last step already is the last message
+
+        outputs = {
+            message.tool_call_id: message.content
+            for message in state.messages if isinstance(message, ToolMessage)
+        }
+        content = "\n\n".join(
+            str(outputs[state.step_tool_calls[step]])
+            for step in final_steps if state.step_tool_calls.get(step) in outputs
+        )
+        return {"messages": [AIMessage(content=content)]}
@@ -1,7 +1,5 @@
-from typing import Any
-
-from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
@@ -11,23 +9,15 @@ from utils.tracing import trace_execution_time
 
 
 class ReActMasterAgent(BaseMasterAgent):
-    def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]]
-    ) -> None:
-        """
-        Supervisor agent building on top of ReAct framework to automatically execute available agents and flows.
-        ReAct framework allows to continuously call tools (remote agents in this case) to complete task assigned by user.
+    """
+    Supervisor agent building on top of ReAct framework to automatically execute available agents and flows.
+    ReAct framework allows to continuously call tools (remote agents in this case) to complete task assigned by user.
 
-        Args:
-            model (BaseChatModel): Langchain chat model (preferably OpenAI or Azure OpenAI)
-            agents (list[dict[str, Any]]): List of available agents
-        """
-        super().__init__(model, agents)
-        self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
+    The Langchain chat model (preferably OpenAI or Azure OpenAI) and the list of available agents are taken from the
+    runnable config of each run.
+    """
 
-    async def select_agent(self, state: MasterAgentState):
+    async def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         """
         Selects agent/flow to execute, determine input parameters for the agent/flow.
         Acts as main supervisor node.
@@ -40,15 +30,18 @@ class ReActMasterAgent(BaseMasterAgent):
         logger.info("Selecting agent to execute")
 
         try:
+            agents = [item["agent_schema"] for item in self.get_agents_to_bind(config, messages)]
             async with trace_execution_time(trace=trace):
                 response = await select_agent_and_resolve_parameters(
-                    model=self.model,
-                    messages=messages,
-                    agents=self._agents_to_bind_to_llm
+                    model=self.get_model(config),
+                    messages=await self.build_context(config, messages, tools=agents),
+                    agents=agents,
+                    parallel_tool_calls=config["configurable"].get("parallel_tool_calls", False)
                 )
 
             if response.tool_calls:
-                logger.success(f"Selected {response.tool_calls[0]["name"]} with args {response.tool_calls[0]["args"]}")
+                for tool_call in response.tool_calls:
+                    logger.success(f"Selected {tool_call["name"]} with args {tool_call["args"]}")
             else:
                 logger.success(f"No agent is selected, generating final response")
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -24,4 +26,138 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(
         default="GenAI-ddc5e9f5-c340-4dcc-9872-d7f098b6b172",
         alias="SECRET_KEY"
-    )
\ No newline at end of file
+    )
+
+    # Active agents catalog
+    AGENTS_CATALOG_TTL_SECONDS: float = Field(
+        default=10, alias="AGENTS_CATALOG_TTL_SECONDS"
+    )
+    AGENTS_CATALOG_MAX_STALE_SECONDS: float = Field(
+        default=60, alias="AGENTS_CATALOG_MAX_STALE_SECONDS"
+    )
+    AGENTS_CATALOG_MAX_USERS: int = Field(
+        default=1000, alias="AGENTS_CATALOG_MAX_USERS"
+    )
+
+    # Parallel tool calls, can be enabled per request with the `parallel_tool_calls` config
+    PARALLEL_TOOL_CALLS: bool = Field(
+        default=False, alias="PARALLEL_TOOL_CALLS"
+    )
+    MAX_PARALLEL_TOOL_CALLS: int = Field(
+        default=4, alias="MAX_PARALLEL_TOOL_CALLS"
+    )
+
+    # Pooled MCP client sessions
+    MCP_SESSION_MAX_IDLE_SECONDS: float = Field(
+        default=300, alias="MCP_SESSION_MAX_IDLE_SECONDS"
+    )
+    MCP_SESSION_HEALTH_CHECK_SECONDS: float = Field(
+        default=30, alias="MCP_SESSION_HEALTH_CHECK_SECONDS"
+    )
+    MCP_SESSION_CONNECT_TIMEOUT_SECONDS: float = Field(
+        default=10, alias="MCP_SESSION_CONNECT_TIMEOUT_SECONDS"
+    )
+
+    # A2A agents
+    A2A_CARD_TTL_SECONDS: float = Field(
+        default=300, alias="A2A_CARD_TTL_SECONDS"
+    )
+    A2A_MAX_CONNECTIONS: int = Field(
+        default=100, alias="A2A_MAX_CONNECTIONS"
+    )
+    A2A_REQUEST_TIMEOUT_SECONDS: Optional[float] = Field(
+        default=None, alias="A2A_REQUEST_TIMEOUT_SECONDS"
+    )
+    A2A_AGENT_TIMEOUTS: dict[str, float] = Field(  # by agent name or endpoint, e.g. {"translator": 30}
+        default_factory=dict, alias="A2A_AGENT_TIMEOUTS"
+    )
+
+    # Admission of requests: above MAX_CONCURRENT_REQUESTS they wait in a queue per user, 0 disables the limit
+    MAX_CONCURRENT_REQUESTS: int = Field(
+        default=32, alias="MAX_CONCURRENT_REQUESTS"
+    )
+    REQUEST_QUEUE_MAX_SIZE: int = Field(  # further requests are rejected
+        default=256, alias="REQUEST_QUEUE_MAX_SIZE"
+    )
+    REQUEST_QUEUE_TIMEOUT_SECONDS: float = Field(  # 0 waits indefinitely
+        default=120, alias="REQUEST_QUEUE_TIMEOUT_SECONDS"
+    )
+
+    # Concurrent LLM calls per provider, 0 disables the cap
+    LLM_PROVIDER_MAX_CONCURRENCY: int = Field(
+        default=16, alias="LLM_PROVIDER_MAX_CONCURRENCY"
+    )
+    LLM_PROVIDER_CONCURRENCY: dict[str, int] = Field(  # by provider, e.g. {"azure openai": 40, "ollama": 2}
+        default_factory=dict, alias="LLM_PROVIDER_CONCURRENCY"
+    )
+
+    # LLM clients
+    LLM_CLIENT_CACHE_SIZE: int = Field(
+        default=32, alias="LLM_CLIENT_CACHE_SIZE"
+    )
+    LLM_MAX_CONNECTIONS: int = Field(
+        default=100, alias="LLM_MAX_CONNECTIONS"
+    )
+
+    # Number of agents pre-selected for the LLM when a user has more, 0 binds all of them
+    TOOL_SELECTION_TOP_K: int = Field(
+        default=32, alias="TOOL_SELECTION_TOP_K"
+    )
+
+    # Token budget of the messages sent to the supervisor LLM, can be set per request with `context_token_budget`
+    CONTEXT_TOKEN_BUDGET: int = Field(
+        default=16000, alias="CONTEXT_TOKEN_BUDGET"
+    )
+    CONTEXT_MAX_MESSAGE_TOKENS: int = Field(  # longer older messages are truncated, current ones if the turn overflows
+        default=2000, alias="CONTEXT_MAX_MESSAGE_TOKENS"
+    )
+
+    # Cache of supervisor LLM responses: `none`, `memory` or `redis`
+    RESPONSE_CACHE_BACKEND: str = Field(
+        default="none", alias="RESPONSE_CACHE_BACKEND"
+    )
+    RESPONSE_CACHE_TTL_SECONDS: float = Field(
+        default=600, alias="RESPONSE_CACHE_TTL_SECONDS"
+    )
+    RESPONSE_CACHE_MAX_SIZE: int = Field(
+        default=1024, alias="RESPONSE_CACHE_MAX_SIZE"
+    )
+    RESPONSE_CACHE_DETERMINISTIC_ONLY: bool = Field(  # cache only models with a temperature of 0
+        default=True, alias="RESPONSE_CACHE_DETERMINISTIC_ONLY"
+    )
+    RESPONSE_CACHE_REDIS_URL: str = Field(
+        default="redis://genai-redis:6379/2", alias="RESPONSE_CACHE_REDIS_URL"
+    )
+    RESPONSE_CACHE_KEY_PREFIX: str = Field(
+        default="master-agent:responses", alias="RESPONSE_CACHE_KEY_PREFIX"
+    )
+
+    # Agents trace: longer inputs and outputs are truncated, only the first and last records of longer traces are kept
+    TRACE_MAX_PAYLOAD_CHARS: int = Field(
+        default=4000, alias="TRACE_MAX_PAYLOAD_CHARS"
+    )
+    TRACE_MAX_RECORDS: int = Field(
+        default=60, alias="TRACE_MAX_RECORDS"
+    )
+    TRACE_SPILL_DIR: Optional[str] = Field(  # full payloads of truncated records are stored here if set
+        default=None, alias="TRACE_SPILL_DIR"
+    )
+
+    # Spans of runs, LLM calls, agent invocations and Backend API requests: `none`, `otlp`, `file` or `console`
+    TRACING_EXPORTER: str = Field(
+        default="none", alias="TRACING_EXPORTER"
+    )
+    TRACING_OTLP_ENDPOINT: str = Field(
+        default="http://otel-collector:4318/v1/traces", alias="TRACING_OTLP_ENDPOINT"
+    )
+    TRACING_FILE_PATH: str = Field(
+        default="master-agent-traces.jsonl", alias="TRACING_FILE_PATH"
+    )
+
+    # Streaming of partial responses, can be disabled per request with the `stream` config
+    STREAM_RESPONSES: bool = Field(
+        default=True, alias="STREAM_RESPONSES"
+    )
+    STREAM_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=0.1, alias="STREAM_FLUSH_INTERVAL_SECONDS"
+    )
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+from a2a.client import A2ACardResolver, A2AClient
+from loguru import logger
+
+from config.settings import Settings
+from utils.telemetry import HTTPX_EVENT_HOOKS
+
+app_settings = Settings()
+
+
+class A2AClientCache:
+    def __init__(self, card_ttl_seconds: float, max_connections: int) -> None:
+        """
+        Shared, connection-pooled HTTP client and TTL cache of resolved agent cards of A2A agents.
+
+        Repeated calls to an A2A agent reuse the connection and skip fetching `/.well-known/agent.json`, until the
+        card expires or the agent cannot be reached with it.
+
+        Args:
+            card_ttl_seconds (float): Seconds a resolved agent card is reused
+            max_connections (int): Maximum number of connections of the shared HTTP client
+        """
+        self.card_ttl_seconds = card_ttl_seconds
+        self.max_connections = max_connections
+
+        self._clients: dict[str, tuple[A2AClient, float]] = {}
+        self._resolving: dict[str, asyncio.Task] = {}
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def httpx_client(self) -> httpx.AsyncClient:
+        if self._httpx_client is None:
+            self._httpx_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections),
+                event_hooks=HTTPX_EVENT_HOOKS
+            )
+        return self._httpx_client
+
+    async def get_client(self, endpoint: str) -> A2AClient:
+        """
+        Returns a client of the A2A agent at the endpoint, resolving its agent card if it is not cached.
+        """
+        if (entry := self._clients.get(endpoint)) is not None:
+            client, expires_at = entry
+            if expires_at > time.monotonic():
+                return client
+            del self._clients[endpoint]
+
+        if (task := self._resolving.get(endpoint)) is None:
+            task = self._resolving[endpoint] = asyncio.create_task(self._resolve(endpoint))
+            task.add_done_callback(lambda _: self._resolving.pop(endpoint, None))
+        return await asyncio.shield(task)
+
+    def invalidate(self, endpoint: str) -> None:
+        self._clients.pop(endpoint, None)
+
+    async def close(self) -> None:
+        self._clients.clear()
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+            self._httpx_client = None
+
+    async def _resolve(self, endpoint: str) -> A2AClient:
+        agent_card = await A2ACardResolver(self.httpx_client, base_url=endpoint).get_agent_card()
+        client = A2AClient(httpx_client=self.httpx_client, agent_card=agent_card)
+
+        logger.info(f"Resolved agent card of A2A agent {agent_card.name} at {endpoint}")
+        self._clients[endpoint] = (client, time.monotonic() + self.card_ttl_seconds)
+        return client
+
+
+a2a_client_cache = A2AClientCache(
+    card_ttl_seconds=app_settings.A2A_CARD_TTL_SECONDS,
+    max_connections=app_settings.A2A_MAX_CONNECTIONS,
+)
@@ -2,13 +2,13 @@ import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from genai_session.session import GenAISession
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage
 
-from agents.flow_master_agent import FlowMasterAgent
+from utils.context import ContextBuilder
 
 
 class AgentTypeEnum(Enum):
@@ -63,14 +63,13 @@ class GenAIFlowConfig(AgentConfig):
     model: BaseChatModel
     messages: list[BaseMessage]
     session: GenAISession
-    flow_master_agent: FlowMasterAgent = field(init=False)
+    context_builder: Optional[ContextBuilder] = None
+    dependencies: Optional[list[Optional[list[int]]]] = None
+    bindings: Optional[list[Optional[dict[str, str]]]] = None
+    arguments: dict = field(default_factory=dict)
 
     def __post_init__(self):
         self.agent_type = AgentTypeEnum.flow.value
-        self.flow_master_agent = FlowMasterAgent(
-            model=self.model,
-            agents=self.agents
-        )
 
 
 class ConnectorStrategy(ABC):
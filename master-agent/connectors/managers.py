@@ -1,16 +1,19 @@
 from typing import Any, cast
 
-from a2a.client import A2AClient
+from a2a.client import A2AClientHTTPError
 from a2a.types import MessageSendParams, SendMessageRequest, SendMessageSuccessResponse
 from genai_session.session import GenAISession
-from httpx import AsyncClient
 from loguru import logger
-from mcp.client.session import ClientSession
-from mcp.client.streamable_http import streamablehttp_client
 
+from agents.flow_master_agent import FlowMasterAgent
+from config.settings import Settings
+from connectors.a2a_clients import a2a_client_cache
 from connectors.entities import ConnectorStrategy, A2AConfig, GenAIConfig, MCPConfig, GenAIFlowConfig
+from connectors.mcp_pool import mcp_session_pool
 from utils.tracing import trace_execution_time
 
+app_settings = Settings()
+
 
 class MCPConnector(ConnectorStrategy):
     async def invoke(self, *args, **kwargs) -> tuple[dict[str, Any] | str | None, dict[str, Any]]:
@@ -24,22 +27,18 @@ class MCPConnector(ConnectorStrategy):
             "input": config.arguments,
         }
         try:
-            async with streamablehttp_client(config.endpoint) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-
-                    async with trace_execution_time(trace=trace):
-                        response = await session.call_tool(config.name, config.arguments)
+            async with trace_execution_time(trace=trace):
+                response = await mcp_session_pool.call_tool(config.endpoint, config.name, config.arguments)
 
-                    trace.update(
-                        {
-                            "output": response.model_dump(),
-                            "is_success": not response.isError,
-                        }
-                    )
-                    if response.content:
-                        return response.content[0].text, trace
-                    return "Success", trace
+            trace.update(
+                {
+                    "output": response.model_dump(),
+                    "is_success": not response.isError,
+                }
+            )
+            if response.content:
+                return response.content[0].text, trace
+            return "Success", trace
 
         except Exception as e:
             error_message = f"Unexpected error while invoking MCP tool: {e}"
@@ -66,43 +65,49 @@ class A2AConnector(ConnectorStrategy):
             "input": config.action,
         }
         try:
-            async with AsyncClient() as httpx_client:
-                client = await A2AClient.get_client_from_agent_card_url(
-                    httpx_client, config.endpoint
-                )
+            client = await a2a_client_cache.get_client(config.endpoint)
 
-                send_message_payload: dict[str, Any] = {
-                    "message": {
-                        "role": config.role,
-                        "messageId": config.message_id,
-                        "parts": [
-                            {
-                                "type": "text",
-                                "text": config.action
-                            }
-                        ],
-                    },
-                }
-                request = SendMessageRequest(
-                    params=MessageSendParams(**send_message_payload)
-                )
+            send_message_payload: dict[str, Any] = {
+                "message": {
+                    "role": config.role,
+                    "messageId": config.message_id,
+                    "parts": [
+                        {
+                            "type": "text",
+                            "text": config.action
+                        }
+                    ],
+                },
+            }
+            request = SendMessageRequest(
+                params=MessageSendParams(**send_message_payload)
+            )
 
+            timeout = app_settings.A2A_AGENT_TIMEOUTS.get(
+                config.name,
+                app_settings.A2A_AGENT_TIMEOUTS.get(config.endpoint, app_settings.A2A_REQUEST_TIMEOUT_SECONDS)
+            )
+            try:
                 async with trace_execution_time(trace=trace):
-                    response = await client.send_message(request, http_kwargs={"timeout": None})
-
-                if isinstance(response.root, SendMessageSuccessResponse):
-                    response_text = response.root.result.artifacts[0].parts[0].root.text
-                else:
-                    response_text = response.root.error.message
-
-                trace.update(
-                    {
-                        "output": response.model_dump(mode="json"),
-                        "is_success": isinstance(response.root, SendMessageSuccessResponse)
-                    }
-                )
+                    response = await client.send_message(request, http_kwargs={"timeout": timeout})
+            except A2AClientHTTPError:
+                # The agent may have moved, resolve its card again on the next call
+                a2a_client_cache.invalidate(config.endpoint)
+                raise
+
+            if isinstance(response.root, SendMessageSuccessResponse):
+                response_text = response.root.result.artifacts[0].parts[0].root.text
+            else:
+                response_text = response.root.error.message
+
+            trace.update(
+                {
+                    "output": response.model_dump(mode="json"),
+                    "is_success": isinstance(response.root, SendMessageSuccessResponse)
+                }
+            )
 
-                return response_text, trace
+            return response_text, trace
 
         except Exception as e:
             error_message = f"Unexpected error while invoking A2A agent: {e}"
@@ -130,10 +135,11 @@ class GenAIConnector(ConnectorStrategy):
         }
         try:
             session: GenAISession = config.session
-            response = await session.send(
-                client_id=config.id,
-                message=config.arguments
-            )
+            async with trace_execution_time(trace=trace):
+                response = await session.send(
+                    client_id=config.id,
+                    message=config.arguments
+                )
 
             trace.update(
                 {
@@ -170,9 +176,19 @@ class GenAIFlowConnector(ConnectorStrategy):
         }
 
         async with trace_execution_time(trace=trace):
-            final_state = await config.flow_master_agent.graph.ainvoke(
+            final_state = await FlowMasterAgent.get_graph().ainvoke(
                 input={"messages": config.messages.copy()},
-                config={"configurable": {"session": session}}
+                config=FlowMasterAgent.build_config(
+                    model=config.model,
+                    agents=config.agents,
+                    session=session,
+                    context_builder=config.context_builder,
+                    flow_dependencies=config.dependencies,
+                    flow_bindings=config.bindings,
+                    flow_arguments=config.arguments,
+                    parallel_tool_calls=bool(config.dependencies),
+                    max_parallel_tool_calls=app_settings.MAX_PARALLEL_TOOL_CALLS
+                )
             )
 
         response = final_state["messages"][-1].content
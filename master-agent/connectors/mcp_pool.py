@@ -0,0 +1,176 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+import anyio
+from loguru import logger
+from mcp.client.session import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult
+
+from config.settings import Settings
+
+app_settings = Settings()
+
+
+class PooledMCPSession:
+    def __init__(self, endpoint: str) -> None:
+        """
+        Long-lived, initialized MCP client session of one endpoint.
+
+        The transport and session context managers have to be entered and exited by the same task, so a dedicated
+        task owns them and keeps them open until the session is closed or its connection fails.
+
+        Args:
+            endpoint (str): URL of the MCP server
+        """
+        self.endpoint = endpoint
+        self.session: Optional[ClientSession] = None
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+        self._ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    @property
+    def idle_time(self) -> float:
+        return time.monotonic() - self.last_used
+
+    async def open(self, timeout: float) -> ClientSession:
+        self._task = asyncio.create_task(self._run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._ready), timeout=timeout)
+        except Exception:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                logger.debug(f"MCP session of {self.endpoint} closed with error: {e}")
+
+    async def _run(self) -> None:
+        try:
+            async with streamablehttp_client(self.endpoint) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set_result(session)
+                    await self._closing.wait()
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session of {self.endpoint} failed: {e}")
+        finally:
+            self.session = None
+            if not self._ready.done():
+                self._ready.set_exception(ConnectionError(f"MCP session of {self.endpoint} closed"))
+
+
+class MCPSessionPool:
+    def __init__(self, max_idle_seconds: float, health_check_after_seconds: float, connect_timeout: float) -> None:
+        """
+        Pool of one initialized MCP session per endpoint shared by all requests of the process.
+
+        Sessions idle for longer than `health_check_after_seconds` are pinged before reuse, sessions idle for longer
+        than `max_idle_seconds` are closed. A call is only retried on a new session if the pooled one had closed before
+        the request could be sent, tools are not necessarily idempotent.
+
+        Args:
+            max_idle_seconds (float): Idle time after which a session is closed
+            health_check_after_seconds (float): Idle time after which a session is pinged before reuse
+            connect_timeout (float): Seconds the connection and initialization of a session may take
+        """
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+        self.connect_timeout = connect_timeout
+
+        self._sessions: dict[str, PooledMCPSession] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def call_tool(self, endpoint: str, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        pooled = await self._acquire(endpoint)
+        try:
+            return await self._call_tool(pooled, name, arguments)
+        except McpError:
+            # The server answered with an error, the session itself is fine
+            raise
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+            # The session closed before the request was written, the server never received it
+            logger.warning(f"MCP session of {endpoint} closed before the call was sent, reconnecting: {e!r}")
+            await self._discard(pooled)
+        except Exception:
+            # The request may have reached the server, retrying could run the tool twice
+            await self._discard(pooled)
+            raise
+
+        return await self._call_tool(await self._acquire(endpoint), name, arguments)
+
+    @staticmethod
+    async def _call_tool(pooled: PooledMCPSession, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        pooled.in_use += 1
+        try:
+            return await pooled.session.call_tool(name, arguments)
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(pooled.close() for pooled in sessions))
+
+    async def _acquire(self, endpoint: str) -> PooledMCPSession:
+        await self._evict_idle()
+
+        async with self._locks.setdefault(endpoint, asyncio.Lock()):
+            pooled = self._sessions.get(endpoint)
+            if pooled is not None and pooled.is_alive and pooled.idle_time > self.health_check_after_seconds:
+                try:
+                    await asyncio.wait_for(pooled.session.send_ping(), timeout=self.connect_timeout)
+                except Exception as e:
+                    logger.info(f"MCP session of {endpoint} failed its health check: {e}")
+                    await self._discard(pooled)
+                    pooled = None
+
+            if pooled is None or not pooled.is_alive:
+                if pooled is not None:
+                    await self._discard(pooled)
+                pooled = PooledMCPSession(endpoint)
+                await pooled.open(timeout=self.connect_timeout)
+                self._sessions[endpoint] = pooled
+                logger.info(f"Opened MCP session of {endpoint}")
+
+            pooled.last_used = time.monotonic()
+            return pooled
+
+    async def _discard(self, pooled: PooledMCPSession) -> None:
+        if self._sessions.get(pooled.endpoint) is pooled:
+            del self._sessions[pooled.endpoint]
+        await pooled.close()
+
+    async def _evict_idle(self) -> None:
+        idle = [
+            pooled for pooled in self._sessions.values()
+            if not pooled.in_use and pooled.idle_time > self.max_idle_seconds
+        ]
+        for pooled in idle:
+            logger.info(f"Closing MCP session of {pooled.endpoint} idle for {pooled.idle_time:.0f}s")
+            await self._discard(pooled)
+
+
+mcp_session_pool = MCPSessionPool(
+    max_idle_seconds=app_settings.MCP_SESSION_MAX_IDLE_SECONDS,
+    health_check_after_seconds=app_settings.MCP_SESSION_HEALTH_CHECK_SECONDS,
+    connect_timeout=app_settings.MCP_SESSION_CONNECT_TIMEOUT_SECONDS,
+)
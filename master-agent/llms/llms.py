@@ -1,14 +1,25 @@
-from typing import Any
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Optional
 
+import httpx
+import openai
 from langchain_core.language_models import BaseChatModel
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI, AzureChatOpenAI
 
+from config.settings import Settings
 from llms.custom import ChatGenAI
+from utils.telemetry import HTTPX_EVENT_HOOKS
+
+app_settings = Settings()
 
 
 class LLMFactory:
     _registry = {}
+    _clients: OrderedDict[str, BaseChatModel] = OrderedDict()
+    _http_async_client: Optional[httpx.AsyncClient] = None
 
     @classmethod
     def register(cls, name: str):
@@ -20,13 +31,60 @@ class LLMFactory:
 
     @classmethod
     def create(cls, configs: dict[str, Any]) -> BaseChatModel:
+        """
+        Returns the model client of the configs, reusing the one created for the same provider, endpoint, model and
+        credentials. The least recently used clients are dropped above `LLM_CLIENT_CACHE_SIZE`.
+        """
         llm_provider = configs.get("provider", "").lower()
         constructor = cls._registry.get(llm_provider)
 
         if not constructor:
             raise ValueError(f"Unknown LLM provider: {llm_provider}")
 
-        return constructor(configs)
+        key = cls._cache_key(llm_provider, configs)
+        if (model := cls._clients.get(key)) is not None:
+            cls._clients.move_to_end(key)
+            return model
+
+        model = cls._clients[key] = constructor(configs)
+        model.metadata = {**(model.metadata or {}), "llm_provider": llm_provider}  # concurrency cap of the provider
+        while len(cls._clients) > app_settings.LLM_CLIENT_CACHE_SIZE:
+            cls._clients.popitem(last=False)
+        return model
+
+    @classmethod
+    def http_async_client(cls) -> httpx.AsyncClient:
+        """
+        Connection-pooled HTTP client shared by all OpenAI compatible model clients.
+        """
+        if cls._http_async_client is None:
+            cls._http_async_client = openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=app_settings.LLM_MAX_CONNECTIONS),
+                event_hooks=HTTPX_EVENT_HOOKS
+            )
+        return cls._http_async_client
+
+    @classmethod
+    async def close(cls) -> None:
+        cls._clients.clear()
+        if cls._http_async_client is not None:
+            await cls._http_async_client.aclose()
+            cls._http_async_client = None
+
+    @staticmethod
+    def _cache_key(llm_provider: str, configs: dict[str, Any]) -> str:
+        api_key = configs.get("api_key") or ""
+        return json.dumps(
+            [
+                llm_provider,
+                configs.get("endpoint") or configs.get("base_url"),
+                configs.get("model"),
+                configs.get("api_version"),
+                configs.get("temperature"),
+                hashlib.sha256(api_key.encode()).hexdigest(),
+            ],
+            default=str
+        )
 
 
 @LLMFactory.register("openai")
@@ -34,7 +92,8 @@ def __create_openai_model(configs: dict[str, Any]) -> ChatOpenAI:
     return ChatOpenAI(
         api_key=configs.get("api_key"),
         model=configs.get("model"),
-        temperature=configs.get("temperature")
+        temperature=configs.get("temperature"),
+        http_async_client=LLMFactory.http_async_client()
     )
 
 
@@ -45,7 +104,8 @@ def __create_azure_openai_model(configs: dict[str, Any]) -> AzureChatOpenAI:
         api_key=configs.get("api_key"),
         api_version=configs.get("api_version"),
         deployment_name=configs.get("model"),
-        temperature=configs.get("temperature")
+        temperature=configs.get("temperature"),
+        http_async_client=LLMFactory.http_async_client()
     )
 
 
@@ -64,5 +124,6 @@ def __create_genai_proxy_model(configs: dict[str, Any]):
         api_key="genai-super-secret-api-key",
         model="gpt-4o",
         base_url=configs.get("base_url"),
-        temperature=configs.get("temperature")
+        temperature=configs.get("temperature"),
+        http_async_client=LLMFactory.http_async_client()
     )
@@ -8,11 +8,19 @@ from loguru import logger
 
 from agents.react_master_agent import ReActMasterAgent
 from config.settings import Settings
+from connectors.a2a_clients import a2a_client_cache
+from connectors.mcp_pool import mcp_session_pool
 from llms import LLMFactory
+from models.exceptions import AdmissionRejectedError
 from prompts import FILE_RELATED_SYSTEM_PROMPT
-from utils.agents import get_agents
+from utils.admission import admission_controller, admission_metrics
+from utils.catalog import AgentCatalog
 from utils.chat_history import get_chat_history
 from utils.common import attach_files_to_message
+from utils.context import ContextBuilder
+from utils.response_cache import response_cache
+from utils.streaming import StreamPublisher, stream_graph
+from utils.telemetry import setup_tracing, shutdown_tracing, start_span
 
 app_settings = Settings()
 
@@ -21,6 +29,17 @@ session = GenAISession(
     ws_url=app_settings.ROUTER_WS_URL
 )
 
+# Compiled once and shared by all requests
+master_agent_graph = ReActMasterAgent.get_graph()
+
+agent_catalog = AgentCatalog(
+    url=f"{app_settings.BACKEND_API_URL}/agents/active",
+    api_key=app_settings.MASTER_BE_API_KEY,
+    ttl=app_settings.AGENTS_CATALOG_TTL_SECONDS,
+    max_stale=app_settings.AGENTS_CATALOG_MAX_STALE_SECONDS,
+    max_entries=app_settings.AGENTS_CATALOG_MAX_USERS
+)
+
 
 @session.bind(name="MasterAgent", description="Master agent that orchestrates other agents")
 async def receive_message(
@@ -29,69 +48,140 @@ async def receive_message(
         user_id: str,
         configs: dict[str, Any],
         files: Optional[list[dict[str, Any]]],
-        timestamp: str
+        timestamp: str,
+        traceparent: Optional[str] = None
 ):
-    try:
-        graph_config = {"configurable": {"session": session}, "recursion_limit": 100}  # recursion_limit can be adjusted
-
-        base_system_prompt = configs.get("system_prompt")
-        user_system_prompt = configs.get("user_prompt")
-
-        system_prompt = user_system_prompt or base_system_prompt
-        system_prompt = f"{system_prompt}\n\n{FILE_RELATED_SYSTEM_PROMPT}"
-
-        chat_history = await get_chat_history(
-            f"{app_settings.BACKEND_API_URL}/chat",
-            session_id=session_id,
-            user_id=user_id,
-            api_key=app_settings.MASTER_BE_API_KEY,
-            max_last_messages=configs.get("max_last_messages", 5)
-        )
-
-        chat_history[-1] = attach_files_to_message(message=chat_history[-1], files=files) if files else chat_history[-1]
-        init_messages = [
-            SystemMessage(content=system_prompt),
-            *chat_history
-        ]
-
-        agents = await get_agents(
-            url=f"{app_settings.BACKEND_API_URL}/agents/active",
-            agent_type="all",
-            api_key=app_settings.MASTER_BE_API_KEY,
-            user_id=user_id
-        )
-
-        llm = LLMFactory.create(configs=configs)
-        master_agent = ReActMasterAgent(model=llm, agents=agents)
-
-        logger.info("Running Master Agent")
-
-        final_state = await master_agent.graph.ainvoke(
-            input={"messages": init_messages},
-            config=graph_config
-        )
-
-        response = final_state["messages"][-1].content
-
-        logger.success("Master Agent run successfully")
-
-        return {"agents_trace": final_state["trace"], "response": response, "is_success": True}
-
-    except Exception as e:
-        error_message = f"Unexpected error while running Master Agent: {e}"
-        logger.exception(error_message)
-
-        trace = {
-            "name": "MasterAgent",
-            "output": error_message,
-            "is_success": False
-        }
-        return {"agents_trace": [trace], "response": error_message, "is_success": False}
+    # Read before the first await, the context is shared by concurrent requests
+    request_id = agent_context.request_id
+    with start_span(
+        "master_agent.run",
+        traceparent=traceparent,
+        **{"genai.request_id": request_id, "genai.session_id": session_id}
+    ) as span:
+        try:
+            async with admission_controller.admit(user_id) as queue_wait:
+                if queue_wait:
+                    logger.info(f"Request waited {queue_wait:.3f}s for admission: {admission_metrics()}")
+                if span is not None:
+                    span.set_attribute("admission.queue_wait_seconds", queue_wait)
+
+                base_system_prompt = configs.get("system_prompt")
+                user_system_prompt = configs.get("user_prompt")
+
+                system_prompt = user_system_prompt or base_system_prompt
+                system_prompt = f"{system_prompt}\n\n{FILE_RELATED_SYSTEM_PROMPT}"
+
+                chat_history = await get_chat_history(
+                    f"{app_settings.BACKEND_API_URL}/chat",
+                    session_id=session_id,
+                    user_id=user_id,
+                    api_key=app_settings.MASTER_BE_API_KEY,
+                    max_last_messages=configs.get("max_last_messages", 5)
+                )
+
+                # the latest exchange describes the task, the agents are pre-selected for it
+                tool_selection_query = " ".join(str(message.content) for message in chat_history[-3:])
+
+                chat_history[-1] = attach_files_to_message(message=chat_history[-1], files=files) if files else chat_history[-1]
+                init_messages = [
+                    SystemMessage(content=system_prompt),
+                    *chat_history
+                ]
+
+                catalog_entry = await agent_catalog.get_entry(user_id=user_id)
+                agents = catalog_entry.agents
+
+                bound_agent_names = None
+                tool_selection_top_k = configs.get("tool_selection_top_k", app_settings.TOOL_SELECTION_TOP_K)
+                if tool_selection_top_k and len(agents) > tool_selection_top_k:
+                    selected_agents = catalog_entry.tool_index.select(tool_selection_query, agents, top_k=tool_selection_top_k)
+                    bound_agent_names = [agent["name"] for agent in selected_agents]
+                    logger.info(f"Pre-selected {len(bound_agent_names)} of {len(agents)} agents: {bound_agent_names}")
+
+                llm = LLMFactory.create(configs=configs)
+                graph_config = ReActMasterAgent.build_config(
+                    model=llm,
+                    agents=agents,
+                    session=session,
+                    bound_agent_names=bound_agent_names,
+                    parallel_tool_calls=configs.get("parallel_tool_calls", app_settings.PARALLEL_TOOL_CALLS),
+                    max_parallel_tool_calls=configs.get("max_parallel_tool_calls", app_settings.MAX_PARALLEL_TOOL_CALLS),
+                    context_builder=ContextBuilder(
+                        model=llm,
+                        token_budget=configs.get("context_token_budget", app_settings.CONTEXT_TOKEN_BUDGET),
+                        max_message_tokens=configs.get("context_max_message_tokens", app_settings.CONTEXT_MAX_MESSAGE_TOKENS)
+                    ),
+                    recursion_limit=100  # recursion_limit can be adjusted
+                )
+
+                logger.info("Running Master Agent")
+
+                if configs.get("stream", app_settings.STREAM_RESPONSES):
+                    publisher = StreamPublisher(
+                        websocket=agent_context.websocket,
+                        request_id=request_id,
+                        session_id=session_id,
+                        flush_interval=app_settings.STREAM_FLUSH_INTERVAL_SECONDS
+                    )
+                    final_state = await stream_graph(
+                        graph=master_agent_graph,
+                        input={"messages": init_messages},
+                        config=graph_config,
+                        publisher=publisher
+                    )
+                else:
+                    final_state = await master_agent_graph.ainvoke(
+                        input={"messages": init_messages},
+                        config=graph_config
+                    )
+
+                response = final_state["messages"][-1].content
+
+                logger.success("Master Agent run successfully")
+
+                return {"agents_trace": final_state["trace"], "response": response, "is_success": True}
+
+        except AdmissionRejectedError as e:
+            error_message = f"Master Agent is overloaded, try again later: {e}"
+            logger.warning(f"{error_message} {admission_metrics()}")
+
+            trace = {
+                "name": "MasterAgent",
+                "output": error_message,
+                "is_success": False
+            }
+            return {"agents_trace": [trace], "response": error_message, "is_success": False}
+
+        except Exception as e:
+            error_message = f"Unexpected error while running Master Agent: {e}"
+            logger.exception(error_message)
+
+            trace = {
+                "name": "MasterAgent",
+                "output": error_message,
+                "is_success": False
+            }
+            return {"agents_trace": [trace], "response": error_message, "is_success": False}
 
 
 async def main():
+    setup_tracing(
+        exporter=app_settings.TRACING_EXPORTER,
+        otlp_endpoint=app_settings.TRACING_OTLP_ENDPOINT,
+        file_path=app_settings.TRACING_FILE_PATH
+    )
     logger.info("Master Agent started")
-    await session.process_events()
+    try:
+        await session.process_events()
+    finally:
+        await agent_catalog.close()
+        await mcp_session_pool.close()
+        await a2a_client_cache.close()
+        await LLMFactory.close()
+        if response_cache is not None:
+            await response_cache.close()
+        shutdown_tracing()
+        logger.info(f"Admission metrics: {admission_metrics()}")
 
 
 if __name__ == "__main__":
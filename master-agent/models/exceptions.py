@@ -8,3 +8,7 @@ class AgentNotFoundError(Exception):
 
 class UnknownAgentTypeException(Exception):
     pass
+
+
+class AdmissionRejectedError(Exception):
+    pass
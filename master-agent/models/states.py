@@ -1,11 +1,17 @@
-import operator
 from typing import Annotated, Any
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph import add_messages
 from pydantic import BaseModel
 
+from utils.tracing import add_trace
+
 
 class MasterAgentState(BaseModel):
     messages: Annotated[list[BaseMessage], add_messages]
-    trace: Annotated[list[dict[str, Any]], operator.add]
+    trace: Annotated[list[dict[str, Any]], add_trace]
+
+
+class FlowMasterAgentState(MasterAgentState):
+    step: int = 0  # index of the next agent of the flow
+    step_tool_calls: dict[int, str] = {}  # tool call ID of every started step of a DAG flow
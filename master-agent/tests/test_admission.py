@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from models.exceptions import AdmissionRejectedError
+from utils.admission import AdmissionController, ProviderLimiter
+
+
+async def hold(controller: AdmissionController, user_id: str, release: asyncio.Event, served: list[str]) -> None:
+    async with controller.admit(user_id):
+        served.append(user_id)
+        await release.wait()
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_requests_under_the_limit_are_admitted_at_once():
+    controller = AdmissionController(max_in_flight=2, max_queue_size=0, queue_timeout=None)
+
+    async with controller.admit("alice") as first_wait, controller.admit("bob") as second_wait:
+        assert (first_wait, second_wait) == (0.0, 0.0)
+        assert controller.in_flight == 2
+
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_free_slots_are_handed_to_waiting_users_in_turn():
+    controller = AdmissionController(max_in_flight=1, max_queue_size=10, queue_timeout=None)
+    release = asyncio.Event()
+    served = []
+
+    tasks = [asyncio.create_task(hold(controller, "alice", release, served))]
+    await settle()
+    for user_id in ("alice", "alice", "bob"):
+        tasks.append(asyncio.create_task(hold(controller, user_id, release, served)))
+        await settle()
+    assert controller.queue_size == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert served == ["alice", "alice", "bob", "alice"]
+    assert controller.stats.queued == 3
+
+
+@pytest.mark.asyncio
+async def test_requests_are_rejected_when_the_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue_size=1, queue_timeout=None)
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(hold(controller, user_id, release, [])) for user_id in ("alice", "bob")]
+    await settle()
+
+    with pytest.raises(AdmissionRejectedError):
+        async with controller.admit("carol"):
+            pass
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert controller.stats.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_waiting_too_long_are_rejected():
+    controller = AdmissionController(max_in_flight=1, max_queue_size=1, queue_timeout=0.01)
+
+    async with controller.admit("alice"):
+        with pytest.raises(AdmissionRejectedError):
+            async with controller.admit("bob"):
+                pass
+
+        assert controller.queue_size == 0
+    assert controller.stats.timed_out == 1
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_leave_the_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue_size=1, queue_timeout=None)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "alice", release, []))
+    await settle()
+
+    waiting = asyncio.create_task(hold(controller, "bob", release, []))
+    await settle()
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert controller.queue_size == 0
+
+    release.set()
+    await holder
+    assert controller.in_flight == 0
+
+    async with controller.admit("carol") as wait:
+        assert wait == 0.0
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_capped_per_provider():
+    limiter = ProviderLimiter(default_limit=0, limits={"openai": 1})
+    capped = FakeListChatModel(responses=[], metadata={"llm_provider": "openai"})
+    uncapped = FakeListChatModel(responses=[], metadata={"llm_provider": "ollama"})
+    release = asyncio.Event()
+    entered = []
+
+    async def call(model: FakeListChatModel, name: str) -> None:
+        async with limiter.limit(model):
+            entered.append(name)
+            await release.wait()
+
+    tasks = [
+        asyncio.create_task(call(capped, "first")),
+        asyncio.create_task(call(capped, "second")),
+        asyncio.create_task(call(uncapped, "uncapped")),
+    ]
+    await settle()
+    assert entered == ["first", "uncapped"]
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert entered == ["first", "uncapped", "second"]
@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.catalog import AgentCatalog
+
+AGENTS = [{"name": "translator", "agent_schema": {"description": "Translates text"}}]
+
+
+class Backend:
+    """
+    Active agents endpoint answering conditional requests with the ETag of the current list.
+    """
+
+    def __init__(self, agents: list) -> None:
+        self.agents = agents
+        self.etag = '"1"'
+        self.requests: list[httpx.Request] = []
+        self.fail = False
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.fail:
+            return httpx.Response(503)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json={"active_connections": self.agents}, headers={"ETag": self.etag})
+
+
+@pytest.fixture
+def backend() -> Backend:
+    return Backend(AGENTS)
+
+
+@pytest.fixture
+def catalog(backend: Backend) -> AgentCatalog:
+    catalog = AgentCatalog(url="http://backend/agents/active", api_key="key", ttl=10, max_stale=60, max_entries=2)
+    catalog._client = httpx.AsyncClient(transport=httpx.MockTransport(backend.handle))
+    return catalog
+
+
+def age(catalog: AgentCatalog, user_id: str, seconds: float) -> None:
+    catalog._entries[user_id].fetched_at -= seconds
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_served_without_a_request(catalog, backend):
+    assert (await catalog.get_entry("user-1")).agents == AGENTS
+    assert (await catalog.get_entry("user-1")).agents == AGENTS
+
+    assert len(backend.requests) == 1
+    assert backend.requests[0].url.params["user_id"] == "user-1"
+    assert backend.requests[0].headers["X-API-KEY"] == "key"
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_and_revalidated_in_the_background(catalog, backend):
+    entry = await catalog.get_entry("user-1")
+    age(catalog, "user-1", 30)
+
+    assert await catalog.get_entry("user-1") is entry
+    await asyncio.gather(*catalog._refreshes.values())
+
+    assert backend.requests[-1].headers["If-None-Match"] == '"1"'
+    assert entry.age < 10
+    assert entry.version == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_catalogs_get_a_new_version(catalog, backend):
+    await catalog.get_entry("user-1")
+    backend.agents, backend.etag = [*AGENTS, {"name": "summarizer", "agent_schema": {}}], '"2"'
+    age(catalog, "user-1", 120)
+
+    entry = await catalog.get_entry("user-1")
+
+    assert len(entry.agents) == 2
+    assert (entry.etag, entry.version) == ('"2"', 2)
+    assert len(entry.tool_index) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_of_a_user_share_one_request(catalog, backend):
+    await asyncio.gather(*(catalog.get_entry("user-1") for _ in range(5)))
+
+    assert len(backend.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_refreshes_serve_the_cached_entry(catalog, backend):
+    entry = await catalog.get_entry("user-1")
+    backend.fail = True
+    age(catalog, "user-1", 120)
+
+    assert await catalog.get_entry("user-1") is entry
+
+
+@pytest.mark.asyncio
+async def test_failed_first_fetches_raise(catalog, backend):
+    backend.fail = True
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await catalog.get_entry("user-1")
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_catalogs_are_evicted(catalog, backend):
+    for user_id in ("user-1", "user-2", "user-1", "user-3"):
+        await catalog.get_entry(user_id)
+
+    assert list(catalog._entries) == ["user-1", "user-3"]
+    await catalog.get_entry("user-2")
+    assert len(backend.requests) == 4
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from utils.context import ContextBuilder
+
+# The estimate is one token per 4 characters plus 4 tokens per message
+LONG_TEXT = "x" * 4000  # 1004 tokens
+
+
+def make_builder(token_budget: int, max_message_tokens: int = 100) -> ContextBuilder:
+    return ContextBuilder(
+        model=FakeListChatModel(responses=[]),
+        token_budget=token_budget,
+        max_message_tokens=max_message_tokens
+    )
+
+
+def agent_call(call_id: str, output: str) -> list:
+    return [
+        AIMessage(content="", id=f"ai-{call_id}", tool_calls=[{"name": "agent", "args": {}, "id": call_id}]),
+        ToolMessage(content=output, id=f"tool-{call_id}", tool_call_id=call_id),
+    ]
+
+
+def turn(index: int, output: str = "done") -> list:
+    return [HumanMessage(content=f"question {index}", id=f"human-{index}"), *agent_call(f"call-{index}", output)]
+
+
+@pytest.mark.asyncio
+async def test_current_turn_is_kept_intact_when_it_fits():
+    messages = [SystemMessage(content="system", id="system"), *turn(0, output=LONG_TEXT)]
+
+    context = await make_builder(token_budget=2000).build(messages)
+
+    assert context == messages
+
+
+@pytest.mark.asyncio
+async def test_current_turn_is_truncated_when_it_alone_exceeds_the_budget():
+    messages = turn(0, output=LONG_TEXT)
+
+    context = await make_builder(token_budget=500).build(messages)
+
+    assert context[:2] == messages[:2]
+    assert context[2].content.endswith("[truncated 904 of 1004 tokens]")
+
+
+@pytest.mark.asyncio
+async def test_current_turn_stays_truncated_in_later_steps():
+    builder = make_builder(token_budget=500)
+    messages = turn(0, output=LONG_TEXT)
+
+    first = await builder.build(messages)
+    second = await builder.build(messages + agent_call("call-1", "done"))
+
+    assert second[2] is first[2]
+    assert builder.count(second[2]) < builder.count(messages[2])
+    assert sum(builder.count(message) for message in second) <= 500
+
+
+@pytest.mark.asyncio
+async def test_older_messages_are_truncated_and_the_oldest_turns_dropped():
+    messages = [SystemMessage(content="system", id="system"), *turn(0), *turn(1, output=LONG_TEXT), *turn(2)]
+    builder = make_builder(token_budget=190)
+
+    context = await builder.build(messages)
+
+    assert [message.id for message in context] == [
+        "system", "human-1", "ai-call-1", "tool-call-1", "human-2", "ai-call-2", "tool-call-2"
+    ]
+    assert context[3].content.startswith("x" * 300)
+    assert "[truncated" in context[3].content
+    assert builder.count(context[3]) == 112
+
+
+@pytest.mark.asyncio
+async def test_tokenizer_runs_off_the_event_loop(monkeypatch):
+    builder = make_builder(token_budget=2000)
+    threads = set()
+
+    def count_tokens(_, messages):
+        threads.add(threading.current_thread())
+        return 10
+
+    monkeypatch.setattr(FakeListChatModel, "get_num_tokens_from_messages", count_tokens)
+    builder._use_tokenizer = True
+
+    await builder.build(turn(0))
+
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,56 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils.flow_bindings import build_binding_context, evaluate_bindings, load_output, schema_parameters
+
+
+def test_outputs_serialized_once_or_twice_are_parsed():
+    document = {"translation": "Hallo"}
+
+    assert load_output(json.dumps(document)) == document
+    assert load_output(json.dumps(json.dumps(document))) == document
+    assert load_output("plain text") == "plain text"
+    assert load_output(document) is document
+
+
+def test_parameters_are_read_from_functions_and_json_schemas():
+    parameters = {"properties": {"text": {"type": "string"}}, "required": ["text"]}
+
+    assert schema_parameters({"function": {"parameters": parameters}}) == ({"text": {"type": "string"}}, ["text"])
+    assert schema_parameters(parameters) == ({"text": {"type": "string"}}, ["text"])
+    assert schema_parameters({}) == ({}, [])
+
+
+def test_context_holds_input_last_message_and_step_outputs():
+    messages = [
+        HumanMessage(content="first"),
+        HumanMessage(content="translate this"),
+        AIMessage(content="", tool_calls=[{"name": "translator", "args": {}, "id": "call-0"}]),
+        ToolMessage(content='{"translation": "Hallo"}', tool_call_id="call-0"),
+    ]
+
+    context = build_binding_context(messages, arguments={"lang": "de"}, step_tool_calls={0: "call-0", 2: "call-2"})
+
+    assert context == {
+        "input": {"lang": "de"},
+        "message": "translate this",
+        "steps": [{"translation": "Hallo"}, None, None],
+    }
+
+
+def test_unresolved_and_invalid_bindings_are_left_unbound():
+    context = {"input": {"lang": "de"}, "message": "hi", "steps": [{"translation": "Hallo"}, None]}
+
+    arguments = evaluate_bindings(
+        {
+            "text": "steps[0].translation",
+            "lang": "input.lang",
+            "question": "message",
+            "summary": "steps[1].summary",
+            "broken": "steps[",
+        },
+        context,
+    )
+
+    assert arguments == {"text": "Hallo", "lang": "de", "question": "hi"}
@@ -0,0 +1,101 @@
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from agents.flow_master_agent import FlowMasterAgent
+from models.states import FlowMasterAgentState
+
+
+def agent(name: str) -> dict:
+    return {
+        "name": name,
+        "agent_schema": {
+            "type": "function",
+            "function": {
+                "name": name,
+                "parameters": {"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]},
+            },
+        },
+    }
+
+
+def flow_config(steps: int, dependencies: list) -> dict:
+    # Every parameter is bound, so the steps are resolved without an LLM
+    return FlowMasterAgent.build_config(
+        model=None,
+        agents=[agent(f"agent_{step}") for step in range(steps)],
+        session=None,
+        flow_dependencies=dependencies,
+        flow_bindings=[{"text": "input.text"}] * steps,
+        flow_arguments={"text": "hello"},
+    )
+
+
+async def run_flow(config: dict) -> tuple[list[list[str]], FlowMasterAgentState]:
+    """
+    Executes the selected agents until the flow ends, returns the agents started together in every round.
+    """
+    flow = FlowMasterAgent()
+    state = FlowMasterAgentState(messages=[HumanMessage(content="go")], trace=[])
+    rounds = []
+    while (update := await flow.select_agent(state, config)) is not None:
+        message = update["messages"][-1]
+        if not message.tool_calls:
+            return rounds, state.model_copy(update={"messages": [*state.messages, message]})
+
+        rounds.append([tool_call["name"] for tool_call in message.tool_calls])
+        outputs = [
+            ToolMessage(content=f"output of {tool_call['name']}", tool_call_id=tool_call["id"])
+            for tool_call in message.tool_calls
+        ]
+        state = state.model_copy(
+            update={
+                "messages": [*state.messages, message, *outputs],
+                "step_tool_calls": update.get("step_tool_calls", state.step_tool_calls),
+                "step": update.get("step", state.step),
+            }
+        )
+    return rounds, state
+
+
+@pytest.mark.parametrize(
+    "dependencies, expected",
+    [
+        ([None, [0], None], [[], [0], [1]]),
+        ([[], [], [0, 1]], [[], [], [0, 1]]),
+        ([[], [0]], None),
+        (None, None),
+    ],
+)
+def test_undeclared_dependencies_default_to_the_previous_step(dependencies, expected):
+    config = flow_config(steps=3, dependencies=dependencies)
+
+    assert FlowMasterAgent.get_flow_dependencies(config, steps=3) == expected
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_start_together():
+    rounds, _ = await run_flow(flow_config(steps=4, dependencies=[[], [], [0, 1], [2]]))
+
+    assert rounds == [["agent_0", "agent_1"], ["agent_2"], ["agent_3"]]
+
+
+@pytest.mark.asyncio
+async def test_flows_without_dependencies_run_linearly():
+    rounds, state = await run_flow(flow_config(steps=3, dependencies=None))
+
+    assert rounds == [["agent_0"], ["agent_1"], ["agent_2"]]
+    assert state.step == 3
+
+
+@pytest.mark.asyncio
+async def test_outputs_of_several_final_steps_are_joined():
+    _, state = await run_flow(flow_config(steps=3, dependencies=[[], [0], [0]]))
+
+    assert state.messages[-1].content == "output of agent_1\n\noutput of agent_2"
+
+
+@pytest.mark.asyncio
+async def test_a_single_final_step_answers_the_flow():
+    _, state = await run_flow(flow_config(steps=2, dependencies=[[], [0]]))
+
+    assert state.messages[-1].content == "output of agent_1"
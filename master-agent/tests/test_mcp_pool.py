@@ -0,0 +1,79 @@
+from typing import Optional
+
+import anyio
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, ErrorData
+
+from connectors.mcp_pool import MCPSessionPool
+
+
+class FakeSession:
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+        self.calls = 0
+
+    async def call_tool(self, name, arguments) -> CallToolResult:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return CallToolResult(content=[])
+
+
+class FakePooledSession:
+    def __init__(self, session: FakeSession) -> None:
+        self.endpoint = "http://mcp"
+        self.session = session
+        self.in_use = 0
+        self.last_used = 0.0
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def make_pool(monkeypatch, *sessions: FakeSession) -> tuple[MCPSessionPool, list[FakePooledSession]]:
+    pool = MCPSessionPool(max_idle_seconds=60, health_check_after_seconds=10, connect_timeout=1)
+    pooled = [FakePooledSession(session) for session in sessions]
+    acquired = iter(pooled)
+
+    async def acquire(endpoint):
+        return next(acquired)
+
+    monkeypatch.setattr(pool, "_acquire", acquire)
+    return pool, pooled
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [anyio.ClosedResourceError(), anyio.BrokenResourceError()])
+async def test_calls_are_retried_when_the_session_closed_before_sending(monkeypatch, error):
+    broken, fresh = FakeSession(error), FakeSession()
+    pool, (pooled, _) = make_pool(monkeypatch, broken, fresh)
+
+    await pool.call_tool("http://mcp", "tool", {})
+
+    assert (broken.calls, fresh.calls) == (1, 1)
+    assert pooled.closed
+
+
+@pytest.mark.asyncio
+async def test_calls_failing_after_sending_are_not_retried(monkeypatch):
+    failed, fresh = FakeSession(ConnectionResetError("connection dropped")), FakeSession()
+    pool, (pooled, _) = make_pool(monkeypatch, failed, fresh)
+
+    with pytest.raises(ConnectionResetError):
+        await pool.call_tool("http://mcp", "tool", {})
+
+    assert fresh.calls == 0
+    assert pooled.closed
+
+
+@pytest.mark.asyncio
+async def test_server_errors_keep_the_session(monkeypatch):
+    session = FakeSession(McpError(ErrorData(code=408, message="Timed out")))
+    pool, (pooled,) = make_pool(monkeypatch, session)
+
+    with pytest.raises(McpError):
+        await pool.call_tool("http://mcp", "tool", {})
+
+    assert not pooled.closed
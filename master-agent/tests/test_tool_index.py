@@ -0,0 +1,62 @@
+from utils.tool_index import ToolIndex, schema_text
+
+
+def agent(name: str, description: str, **properties) -> dict:
+    return {
+        "name": name,
+        "agent_schema": {
+            "function": {
+                "name": name,
+                "description": description,
+                "parameters": {"type": "object", "properties": properties},
+            }
+        },
+    }
+
+
+AGENTS = [
+    agent("translator", "Translates text into another language", text={"type": "string"}),
+    agent("weather", "Returns the weather forecast of a city", city={"type": "string"}),
+    agent("calculator", "Evaluates arithmetic expressions", expression={"type": "string"}),
+]
+
+
+def test_schema_text_skips_json_schema_keywords():
+    text = schema_text(AGENTS[1]["agent_schema"])
+
+    assert "forecast" in text and "city" in text
+    assert "object" not in text and "string" not in text
+
+
+def test_agents_are_ranked_by_relevance():
+    index = ToolIndex()
+    index.update(AGENTS)
+
+    scores = index.rank("What is the weather in Paris?")
+
+    assert max(scores, key=scores.get) == "weather"
+    assert "calculator" not in scores
+
+
+def test_select_keeps_the_top_agents_in_catalog_order():
+    index = ToolIndex()
+    index.update(AGENTS)
+
+    selected = index.select("translate the forecast text", AGENTS, top_k=2)
+
+    assert [item["name"] for item in selected] == ["translator", "weather"]
+    assert index.select("anything", AGENTS, top_k=3) is AGENTS
+
+
+def test_updates_reindex_changed_and_removed_agents_only():
+    index = ToolIndex()
+    index.update(AGENTS)
+    translator_doc = index._docs["translator"]
+
+    index.update([AGENTS[0], agent("weather", "Reports air quality")])
+
+    assert len(index) == 2
+    assert index._docs["translator"] is translator_doc
+    assert "forecast" not in index._document_frequency
+    assert set(index.rank("air quality")) == {"weather"}
+    assert index._total_length == sum(length for _, _, length in index._docs.values())
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from utils.tracing import LocalTraceSpillStore, TraceRecorder, trace_execution_time
+
+
+def record(index: int, output: str = "done") -> dict:
+    return {"name": f"agent_{index}", "input": {"step": index}, "output": output}
+
+
+def test_long_payloads_are_replaced_by_a_preview():
+    recorder = TraceRecorder(max_payload_chars=20, max_records=0)
+
+    (compacted,) = recorder.add([], [record(0, output="x" * 25)])
+
+    assert compacted["input"] == {"step": 0}
+    assert compacted["output"] == {"preview": "x" * 20, "size": 25, "truncated": True}
+
+
+def test_full_payloads_are_spilled(tmp_path):
+    recorder = TraceRecorder(max_payload_chars=10, max_records=0, spill_store=LocalTraceSpillStore(str(tmp_path)))
+    output = {"text": "x" * 25}
+
+    (compacted,) = recorder.add([], [record(0, output=output)])
+
+    spilled = tmp_path / f"{compacted['output']['payload_id']}.json"
+    assert json.loads(spilled.read_text()) == output
+
+
+def test_spill_failures_keep_the_preview(tmp_path):
+    class FailingSpillStore(LocalTraceSpillStore):
+        def save(self, payload: str) -> str:
+            raise OSError("disk full")
+
+    recorder = TraceRecorder(max_payload_chars=10, max_records=0, spill_store=FailingSpillStore(str(tmp_path)))
+
+    (compacted,) = recorder.add([], [record(0, output="x" * 25)])
+
+    assert compacted["output"] == {"preview": "x" * 10, "size": 25, "truncated": True}
+
+
+def test_nested_flow_traces_are_compacted_once():
+    recorder = TraceRecorder(max_payload_chars=10, max_records=0)
+    flow = {"name": "flow", "type": "flow", "flow": [record(0, output="x" * 25)]}
+
+    (compacted,) = recorder.add([], [flow])
+    (recompacted,) = recorder.add([], [compacted])
+
+    assert compacted["flow"][0]["output"]["truncated"]
+    assert recompacted == compacted
+
+
+def test_long_traces_keep_their_first_and_last_records():
+    recorder = TraceRecorder(max_payload_chars=100, max_records=5)
+
+    trace = []
+    for index in range(10):
+        trace = recorder.add(trace, [record(index)])
+
+    assert len(trace) == 5
+    assert [item["name"] for item in trace[:2]] == ["agent_0", "agent_1"]
+    assert trace[2]["omitted_records"] == 6
+    assert [item["name"] for item in trace[3:]] == ["agent_8", "agent_9"]
+
+
+@pytest.mark.asyncio
+async def test_execution_time_is_recorded_even_on_errors():
+    trace = {"name": "agent_0", "type": "gen_ai"}
+
+    with pytest.raises(RuntimeError):
+        async with trace_execution_time(trace):
+            raise RuntimeError("agent failed")
+
+    assert trace["execution_time"] >= 0
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from loguru import logger
+
+from config.settings import Settings
+from models.exceptions import AdmissionRejectedError
+
+app_settings = Settings()
+
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    queued: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    @property
+    def wait_seconds_avg(self) -> float:
+        return self.wait_seconds_total / self.queued if self.queued else 0.0
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int, max_queue_size: int, queue_timeout: Optional[float]) -> None:
+        """
+        Bounds the number of requests processed at once. Requests above `max_in_flight` wait in a queue per user and
+        free slots are handed to the waiting users in turn, so a burst of one user does not starve the others.
+
+        Args:
+            max_in_flight (int): Maximum number of requests processed at once, 0 disables the limit
+            max_queue_size (int): Maximum number of waiting requests, further ones are rejected
+            queue_timeout (Optional[float]): Seconds a request may wait for a slot, None or 0 waits indefinitely
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout or None
+        self.stats = AdmissionStats()
+
+        self.in_flight = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()  # user -> waiters, in serving order
+        self._queue_size = 0
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size
+
+    @asynccontextmanager
+    async def admit(self, user_id: str):
+        """
+        Waits for a slot for a request of the user and holds it for the block. Yields the seconds the request waited.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or the request waited longer than `queue_timeout`
+        """
+        wait = await self._acquire(user_id)
+        try:
+            yield wait
+        finally:
+            self._release()
+
+    async def _acquire(self, user_id: str) -> float:
+        if not self.max_in_flight or (self.in_flight < self.max_in_flight and not self._queue_size):
+            self.in_flight += 1
+            self.stats.admitted += 1
+            return 0.0
+
+        if self._queue_size >= self.max_queue_size:
+            self.stats.rejected += 1
+            raise AdmissionRejectedError(f"{self._queue_size} requests are already waiting")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(waiter)
+        self._queue_size += 1
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # the slot was handed over while the request was being cancelled
+            else:
+                waiter.cancel()
+                self._remove(user_id, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.timed_out += 1
+                raise AdmissionRejectedError(f"No slot became free within {self.queue_timeout}s") from e
+            raise
+
+        wait = time.perf_counter() - start
+        self.stats.admitted += 1
+        self.stats.queued += 1
+        self.stats.wait_seconds_total += wait
+        self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, wait)
+        return wait
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self._waiting and self.in_flight < self.max_in_flight:
+            user_id, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            self._queue_size -= 1
+            if waiters:
+                self._waiting.move_to_end(user_id)  # the next request of the user waits for the other users
+            else:
+                del self._waiting[user_id]
+
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _remove(self, user_id: str, waiter: asyncio.Future) -> None:
+        if (waiters := self._waiting.get(user_id)) is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self._queue_size -= 1
+        if not waiters:
+            del self._waiting[user_id]
+
+
+class ProviderLimiter:
+    def __init__(self, default_limit: int, limits: dict[str, int]) -> None:
+        """
+        Caps the concurrent LLM calls per provider, so a burst is queued locally instead of being rate limited by the
+        provider for all requests.
+
+        Args:
+            default_limit (int): Maximum concurrent calls of a provider, 0 disables the cap
+            limits (dict[str, int]): Caps of single providers overriding the default, e.g. {"azure openai": 20}
+        """
+        self.default_limit = default_limit
+        self.limits = limits
+
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def limit(self, model: BaseChatModel):
+        """
+        Holds a slot of the provider of the model for the block, models not created by `LLMFactory` are not capped.
+        """
+        provider = (model.metadata or {}).get("llm_provider")
+        semaphore = self._semaphore(provider) if provider else None
+        if semaphore is None:
+            yield
+            return
+
+        if semaphore.locked():
+            logger.debug(f"Concurrency limit of LLM provider {provider} reached, waiting for a slot")
+        async with semaphore:
+            yield
+
+    def _semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        if (semaphore := self._semaphores.get(provider)) is None:
+            limit = self.limits.get(provider, self.default_limit)
+            if not limit:
+                return None
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(limit)
+        return semaphore
+
+
+admission_controller = AdmissionController(
+    max_in_flight=app_settings.MAX_CONCURRENT_REQUESTS,
+    max_queue_size=app_settings.REQUEST_QUEUE_MAX_SIZE,
+    queue_timeout=app_settings.REQUEST_QUEUE_TIMEOUT_SECONDS,
+)
+
+provider_limiter = ProviderLimiter(
+    default_limit=app_settings.LLM_PROVIDER_MAX_CONCURRENCY,
+    limits=app_settings.LLM_PROVIDER_CONCURRENCY,
+)
+
+
+def admission_metrics() -> dict[str, Any]:
+    """
+    Current load and queue-wait metrics of the admission layer, logged with every queued request.
+    """
+    stats = admission_controller.stats
+    return {
+        "in_flight": admission_controller.in_flight,
+        "queue_size": admission_controller.queue_size,
+        "admitted": stats.admitted,
+        "queued": stats.queued,
+        "rejected": stats.rejected,
+        "timed_out": stats.timed_out,
+        "wait_seconds_avg": round(stats.wait_seconds_avg, 3),
+        "wait_seconds_max": round(stats.wait_seconds_max, 3),
+    }
@@ -1,42 +1,60 @@
 from typing import Any
 
-import httpx
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, AIMessage
-from langchain_openai import ChatOpenAI
 
 from llms.custom import ChatGenAI
+from utils.admission import provider_limiter
 from utils.common import bind_tools_safely, generate_hmac, combine_messages
+from utils.response_cache import response_cache
+from utils.telemetry import start_span
 from config.settings import Settings
 
-async def get_agents(url: str, agent_type: str, api_key: str, user_id: str):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            url,
-            headers={"X-API-KEY": api_key},
-            params={"agent_type": agent_type, "user_id": user_id},
-        )
-
-        response.raise_for_status()
-        agents = response.json()
-
-    return agents["active_connections"]
+app_settings = Settings()
 
 
 async def select_agent_and_resolve_parameters(
         model: BaseChatModel,
         messages: list[BaseMessage],
         agents: list[dict[str, Any]],
-        agent_choice: bool = False
+        agent_choice: bool = False,
+        parallel_tool_calls: bool = False
 ) -> AIMessage:
-    if isinstance(model, ChatGenAI):
-        model_json = model.model_dump()
-        model_json["default_headers"] = {
-            "X-HMAC": generate_hmac(Settings().SECRET_KEY, combine_messages(messages))
-        }
-        model = ChatOpenAI.model_validate(model_json)
+    model_name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    with start_span("llm.select_agent", **{"llm.model": model_name, "llm.tools": len(agents)}) as span:
+        cache_key = None
+        if response_cache is not None and response_cache.is_cacheable(model):
+            cache_key = response_cache.key(
+                model,
+                messages,
+                agents,
+                agent_choice=agent_choice,
+                parallel_tool_calls=parallel_tool_calls
+            )
+            response = await response_cache.get(cache_key)
+            if span is not None:
+                span.set_attribute("llm.cache_hit", response is not None)
+            if response is not None:
+                return response
+
+        call_kwargs = {}
+        if isinstance(model, ChatGenAI):
+            # Sent with this request only, the shared model client is left untouched
+            call_kwargs["extra_headers"] = {
+                "X-HMAC": generate_hmac(app_settings.SECRET_KEY, combine_messages(messages))
+            }
+
+        model_with_agents = bind_tools_safely(
+            model=model,
+            tools=agents,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=agent_choice,
+            **call_kwargs
+        )
 
-    model_with_agents = bind_tools_safely(model=model, tools=agents, tool_choice=agent_choice)
+        async with provider_limiter.limit(model):
+            response = await model_with_agents.ainvoke(messages)
 
-    response = await model_with_agents.ainvoke(messages)
-    return response
+        if cache_key is not None:
+            await response_cache.set(cache_key, response)
+        return response
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+from loguru import logger
+
+from utils.telemetry import HTTPX_EVENT_HOOKS, start_span
+from utils.tool_index import ToolIndex
+
+
+@dataclass
+class CatalogEntry:
+    agents: list[dict[str, Any]]
+    etag: Optional[str] = None
+    version: int = 1
+    fetched_at: float = field(default_factory=time.monotonic)
+    tool_index: ToolIndex = field(default_factory=ToolIndex)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class AgentCatalog:
+    def __init__(self, url: str, api_key: str, ttl: float, max_stale: float, max_entries: int) -> None:
+        """
+        Per-user in-memory catalog of active agents, tools and flows.
+
+        Entries younger than `ttl` are served without a request. Older entries up to `max_stale` are served immediately
+        and revalidated in the background with a conditional request, so the backend only sends the list when it has
+        changed. Older ones are fetched before the run continues. Only the catalogs of the `max_entries` most recently
+        active users are kept.
+
+        Args:
+            url (str): URL of the active agents endpoint of the Backend API
+            api_key (str): Master server API key of the Backend API
+            ttl (float): Seconds an entry is served without revalidation
+            max_stale (float): Seconds an entry may be served while it is being revalidated
+            max_entries (int): Maximum number of cached user catalogs
+        """
+        self.url = url
+        self.api_key = api_key
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[str, CatalogEntry] = OrderedDict()
+        self._refreshes: dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def get_entry(self, user_id: str) -> CatalogEntry:
+        if (entry := self._entries.get(user_id)) is not None:
+            self._entries.move_to_end(user_id)
+        if entry is not None and entry.age < self.ttl:
+            return entry
+
+        refresh = self._refresh(user_id)
+        if entry is not None and entry.age < self.max_stale:
+            return entry
+
+        return await refresh
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _refresh(self, user_id: str) -> asyncio.Task:
+        """
+        Starts revalidating the catalog of a user unless a revalidation is already in progress.
+        """
+        if (task := self._refreshes.get(user_id)) is None:
+            task = self._refreshes[user_id] = asyncio.create_task(self._fetch(user_id))
+            task.add_done_callback(lambda _: self._refreshes.pop(user_id, None))
+        return task
+
+    async def _fetch(self, user_id: str) -> CatalogEntry:
+        with start_span("agent_catalog.fetch", **{"genai.user_id": user_id}) as span:
+            entry = await self._fetch_entry(user_id)
+            if span is not None:
+                span.set_attribute("agent_catalog.version", entry.version)
+            return entry
+
+    async def _fetch_entry(self, user_id: str) -> CatalogEntry:
+        if self._client is None:
+            self._client = httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS)
+
+        entry = self._entries.get(user_id)
+        headers = {"X-API-KEY": self.api_key}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        try:
+            response = await self._client.get(
+                self.url,
+                headers=headers,
+                params={"agent_type": "all", "user_id": user_id},
+            )
+            if response.status_code == httpx.codes.NOT_MODIFIED and entry is not None:
+                entry.fetched_at = time.monotonic()
+                return self._store(user_id, entry)
+            response.raise_for_status()
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Failed to refresh agents of user {user_id}, serving cached ones: {e}")
+            return entry
+
+        entry = CatalogEntry(
+            agents=response.json()["active_connections"],
+            etag=response.headers.get("ETag"),
+            version=entry.version + 1 if entry is not None else 1,
+            tool_index=entry.tool_index if entry is not None else ToolIndex(),
+        )
+        entry.tool_index.update(entry.agents)
+        logger.info(f"Loaded {len(entry.agents)} agents of user {user_id}, catalog version {entry.version}")
+        return self._store(user_id, entry)
+
+    def _store(self, user_id: str, entry: CatalogEntry) -> CatalogEntry:
+        """
+        Caches the catalog of a user as the most recently used one, evicting the least recently used catalogs.
+        """
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            evicted_user_id, _ = self._entries.popitem(last=False)
+            logger.debug(f"Evicted agent catalog of user {evicted_user_id}")
+        return entry
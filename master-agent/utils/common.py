@@ -9,15 +9,20 @@ from langchain_ollama import ChatOllama
 
 
 def attach_files_to_message(message: str, files: list[dict[str, Any]]):
-    str_formatted_files = json.dumps(files)
+    str_formatted_files = json.dumps(files, separators=(",", ":"))
     formatted_message = f"{message}\n\nFILES:\n{str_formatted_files}"
     return formatted_message
 
 
-def bind_tools_safely(model: BaseChatModel, tools: list[dict[str, Any]], **kwargs):
+def bind_tools_safely(
+        model: BaseChatModel,
+        tools: list[dict[str, Any]],
+        parallel_tool_calls: bool = False,
+        **kwargs
+):
     if isinstance(model, ChatOllama):
         return model.bind_tools(tools, **kwargs)
-    return model.bind_tools(tools, parallel_tool_calls=False, **kwargs)
+    return model.bind_tools(tools, parallel_tool_calls=parallel_tool_calls, **kwargs)
 
 
 def filter_and_order_by_ids(ids: list[Any], items: list[dict[str, Any]]) -> list[dict[str, Any]]:
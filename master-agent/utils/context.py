@@ -0,0 +1,133 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from loguru import logger
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ContextBuilder:
+    def __init__(self, model: BaseChatModel, token_budget: int, max_message_tokens: int) -> None:
+        """
+        Fits the messages sent to the supervisor LLM into a token budget.
+
+        System messages and the current turn (the last user message and the agent calls answering it) are always kept,
+        the tool outputs of the current turn are only truncated to `max_message_tokens` if the turn alone exceeds the
+        budget. Older messages longer than `max_message_tokens` are truncated, then the oldest turns are dropped until
+        the rest fits. Token counts and truncated messages are kept by message ID, so the ReAct steps of a run only
+        count the messages added since the previous step.
+
+        Tokens are counted with the tokenizer of OpenAI compatible models, in a worker thread to keep the event loop
+        responsive, and estimated for other providers.
+
+        Args:
+            model (BaseChatModel): Langchain chat model the context is built for
+            token_budget (int): Maximum number of tokens of the messages and the bound agent schemas
+            max_message_tokens (int): Maximum number of tokens of a tool output or an older message
+        """
+        self.model = model
+        self.token_budget = token_budget
+        self.max_message_tokens = max_message_tokens
+
+        self._use_tokenizer = isinstance(model, BaseChatOpenAI)
+        self._token_counts: dict[tuple[str, bool], int] = {}  # (message ID, whether it is the truncated copy)
+        self._truncated: dict[str, BaseMessage] = {}
+
+    async def build(
+            self,
+            messages: list[BaseMessage],
+            tools: Optional[list[dict[str, Any]]] = None
+    ) -> list[BaseMessage]:
+        if self._use_tokenizer:
+            return await asyncio.to_thread(self._build, messages, tools)
+        return self._build(messages, tools)
+
+    def _build(self, messages: list[BaseMessage], tools: Optional[list[dict[str, Any]]]) -> list[BaseMessage]:
+        head_end = 0
+        while head_end < len(messages) and isinstance(messages[head_end], SystemMessage):
+            head_end += 1
+
+        turn_start = next(
+            (i for i in range(len(messages) - 1, head_end - 1, -1) if isinstance(messages[i], HumanMessage)),
+            head_end
+        )
+
+        head = messages[:head_end]
+        history = [self._truncate(message) for message in messages[head_end:turn_start]]
+        current = messages[turn_start:]
+
+        budget = self.token_budget - self._count_tools(tools) - sum(self.count(m) for m in head + current)
+        if budget < 0:
+            current = current[:1] + [self._truncate(message) for message in current[1:]]
+            budget = self.token_budget - self._count_tools(tools) - sum(self.count(m) for m in head + current)
+        if budget < 0:
+            logger.warning(f"Current turn exceeds the context budget of {self.token_budget} tokens by {-budget}")
+
+        kept: list[BaseMessage] = []
+        turn: list[BaseMessage] = []
+        for i in range(len(history) - 1, -1, -1):
+            turn.insert(0, history[i])
+            if i > 0 and not isinstance(history[i], HumanMessage):
+                continue
+
+            turn_tokens = sum(self.count(m) for m in turn)
+            if turn_tokens > budget:
+                break
+            budget -= turn_tokens
+            kept = turn + kept
+            turn = []
+
+        if dropped := len(history) - len(kept):
+            logger.debug(f"Dropped {dropped} older messages to fit the context budget")
+        return head + kept + current
+
+    def count(self, message: BaseMessage) -> int:
+        if message.id is None:
+            return self._count(message)
+
+        # The truncated copy of a message has the same ID as the original
+        key = (message.id, self._truncated.get(message.id) is message)
+        if (tokens := self._token_counts.get(key)) is None:
+            tokens = self._token_counts[key] = self._count(message)
+        return tokens
+
+    def _count(self, message: BaseMessage) -> int:
+        if self._use_tokenizer:
+            try:
+                return self.model.get_num_tokens_from_messages([message])
+            except Exception as e:
+                logger.warning(f"Failed to count tokens with the tokenizer of the model, estimating them: {e}")
+                self._use_tokenizer = False
+
+        text = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        if tool_calls := getattr(message, "tool_calls", None):
+            text += json.dumps(tool_calls, default=str)
+        return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+    @staticmethod
+    def _count_tools(tools: Optional[list[dict[str, Any]]]) -> int:
+        return len(json.dumps(tools)) // CHARS_PER_TOKEN if tools else 0
+
+    def _truncate(self, message: BaseMessage) -> BaseMessage:
+        if message.id is not None and (truncated := self._truncated.get(message.id)) is not None:
+            return truncated
+
+        tokens = self.count(message)
+        if tokens <= self.max_message_tokens or not isinstance(message.content, str):
+            return message
+
+        kept_chars = len(message.content) * self.max_message_tokens // tokens
+        truncated = message.model_copy(
+            update={
+                "content": f"{message.content[:kept_chars]}\n... [truncated {tokens - self.max_message_tokens} "
+                           f"of {tokens} tokens]"
+            }
+        )
+        if message.id is not None:
+            self._truncated[message.id] = truncated
+        return truncated
@@ -0,0 +1,69 @@
+import json
+from typing import Any
+
+import jmespath
+from jmespath.exceptions import JMESPathError
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from loguru import logger
+
+
+def load_output(content: Any) -> Any:
+    """
+    Parses the output of an agent, outputs often are JSON documents serialized into a string.
+    """
+    for _ in range(2):
+        if not isinstance(content, str):
+            break
+        try:
+            content = json.loads(content)
+        except ValueError:
+            break
+    return content
+
+
+def schema_parameters(agent_schema: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """
+    Properties and required parameters of an agent schema, either an OpenAI function or a JSON schema.
+    """
+    parameters = agent_schema.get("function", {}).get("parameters", agent_schema)
+    return parameters.get("properties", {}), parameters.get("required", [])
+
+
+def build_binding_context(
+        messages: list[BaseMessage],
+        arguments: dict[str, Any],
+        step_tool_calls: dict[int, str]
+) -> dict[str, Any]:
+    """
+    Document the binding expressions of a flow are evaluated against:
+
+    * `input` - arguments the flow was called with
+    * `message` - last user message
+    * `steps` - outputs of the steps of the flow by index, `null` for steps not executed yet
+    """
+    outputs = {message.tool_call_id: message.content for message in messages if isinstance(message, ToolMessage)}
+    steps = [None] * (max(step_tool_calls, default=-1) + 1)
+    for step, tool_call_id in step_tool_calls.items():
+        if tool_call_id in outputs:
+            steps[step] = load_output(outputs[tool_call_id])
+
+    message = next((message.content for message in reversed(messages) if isinstance(message, HumanMessage)), None)
+    return {"input": arguments, "message": message, "steps": steps}
+
+
+def evaluate_bindings(bindings: dict[str, str], context: dict[str, Any]) -> dict[str, Any]:
+    """
+    Evaluates the JMESPath expression bound to each parameter, e.g. `{"text": "steps[0].translation"}`.
+    Parameters whose expression fails or evaluates to `null` are left unbound.
+    """
+    arguments = {}
+    for parameter, expression in bindings.items():
+        try:
+            value = jmespath.search(expression, context)
+        except JMESPathError as e:
+            logger.warning(f"Invalid binding of parameter {parameter} '{expression}': {e}")
+            continue
+
+        if value is not None:
+            arguments[parameter] = value
+    return arguments
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from loguru import logger
+
+from config.settings import Settings
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # only required for the `redis` backend
+    redis_asyncio = None
+
+app_settings = Settings()
+
+
+class ResponseCacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryResponseCacheBackend(ResponseCacheBackend):
+    def __init__(self, max_size: int) -> None:
+        """
+        LRU cache of the process, the least recently used entries are dropped above `max_size`.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        if (entry := self._entries.get(key)) is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    def __init__(self, redis_url: str, key_prefix: str) -> None:
+        """
+        Cache shared by all Master Agent replicas, entries expire through the Redis TTL.
+        """
+        if redis_asyncio is None:
+            raise RuntimeError(
+                "The redis response cache requires the 'redis' package, install the Master Agent with the 'cache' extra"
+            )
+        self.redis = redis_asyncio.from_url(redis_url)
+        self.key_prefix = key_prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.redis.get(f"{self.key_prefix}:{key}")
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self.redis.set(f"{self.key_prefix}:{key}", value, px=int(ttl * 1000))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class ResponseCache:
+    def __init__(self, backend: ResponseCacheBackend, ttl: float, deterministic_only: bool = True) -> None:
+        """
+        Exact-match cache of supervisor LLM responses.
+
+        The key is a hash of the normalised messages, the bound agent schemas and the model parameters, so a hit is
+        only possible for the same conversation against the same agent catalog and model. With `deterministic_only`
+        responses are only cached for models with a temperature of 0.
+
+        Args:
+            backend (ResponseCacheBackend): Storage of the cached responses
+            ttl (float): Seconds a response is cached
+            deterministic_only (bool): Whether to skip models with a non-zero temperature
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.deterministic_only = deterministic_only
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def is_cacheable(self, model: BaseChatModel) -> bool:
+        return not self.deterministic_only or getattr(model, "temperature", None) == 0
+
+    @staticmethod
+    def key(model: BaseChatModel, messages: list[BaseMessage], tools: list[dict[str, Any]], **kwargs) -> str:
+        payload = {
+            "model": [
+                type(model).__name__,
+                model._identifying_params,
+                *(getattr(model, attr, None) for attr in ("openai_api_base", "azure_endpoint", "base_url")),
+            ],
+            "messages": [
+                {
+                    "type": message.type,
+                    "content": message.content,
+                    "tool_calls": getattr(message, "tool_calls", None),
+                    "tool_call_id": getattr(message, "tool_call_id", None),
+                }
+                for message in messages
+            ],
+            "tools": tools,
+            "kwargs": kwargs,
+        }
+        normalised = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(normalised.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[AIMessage]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read response cache: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            logger.debug(f"Response cache miss, hit ratio {self.hit_ratio:.2f}")
+            return None
+
+        self.hits += 1
+        logger.debug(f"Response cache hit, hit ratio {self.hit_ratio:.2f}")
+        return AIMessage.model_validate_json(value)
+
+    async def set(self, key: str, response: AIMessage) -> None:
+        try:
+            await self.backend.set(key, response.model_dump_json(), ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to write response cache: {e}")
+
+    async def close(self) -> None:
+        logger.info(f"Response cache closed after {self.hits} hits and {self.misses} misses")
+        await self.backend.close()
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """
+    Creates the response cache for the configured backend, or None when it is disabled.
+    """
+    backend = app_settings.RESPONSE_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if backend == "memory":
+        cache_backend = InMemoryResponseCacheBackend(max_size=app_settings.RESPONSE_CACHE_MAX_SIZE)
+    elif backend == "redis":
+        cache_backend = RedisResponseCacheBackend(
+            redis_url=app_settings.RESPONSE_CACHE_REDIS_URL,
+            key_prefix=app_settings.RESPONSE_CACHE_KEY_PREFIX
+        )
+    else:
+        raise ValueError(f"Unknown response cache backend: {backend}")
+
+    return ResponseCache(
+        backend=cache_backend,
+        ttl=app_settings.RESPONSE_CACHE_TTL_SECONDS,
+        deterministic_only=app_settings.RESPONSE_CACHE_DETERMINISTIC_ONLY
+    )
+
+
+response_cache = create_response_cache()
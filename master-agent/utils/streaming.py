@@ -0,0 +1,116 @@
+import json
+import time
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+from websockets.asyncio.client import ClientConnection
+
+from models.enums import Nodes
+
+AGENT_STREAM_MESSAGE_TYPE = "agent_stream"
+
+
+class StreamPublisher:
+    def __init__(self, websocket: ClientConnection, request_id: str, session_id: str, flush_interval: float) -> None:
+        """
+        Sends partial responses of a Master Agent run to the backend through the router.
+
+        LLM tokens are buffered and sent at most every `flush_interval` seconds, so a long answer costs a few dozen
+        frames instead of one per token. Every event carries an increasing index to restore the order.
+
+        Args:
+            websocket (ClientConnection): Connection of the GenAI session of the Master Agent
+            request_id (str): ID of the request being answered
+            session_id (str): ID of the chat session
+            flush_interval (float): Seconds tokens are buffered before they are sent
+        """
+        self.websocket = websocket
+        self.request_id = request_id
+        self.session_id = session_id
+        self.flush_interval = flush_interval
+
+        self._index = 0
+        self._tokens: list[str] = []
+        self._token_node: Optional[str] = None
+        self._flushed_at = time.monotonic()
+        self._closed = False
+
+    async def token(self, content: str, node: Optional[str]) -> None:
+        if node != self._token_node:
+            await self.flush()
+            self._token_node = node
+
+        self._tokens.append(content)
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            await self.flush()
+
+    async def step(self, node: str, trace: list[dict[str, Any]]) -> None:
+        await self.flush()
+        await self._send({"event": "step", "node": node, "trace": trace})
+
+    async def flush(self) -> None:
+        self._flushed_at = time.monotonic()
+        if self._tokens:
+            content = "".join(self._tokens)
+            self._tokens.clear()
+            await self._send({"event": "token", "node": self._token_node, "content": content})
+
+    async def _send(self, stream_event: dict[str, Any]) -> None:
+        if self._closed:
+            return
+
+        stream_event["index"] = self._index
+        self._index += 1
+        try:
+            await self.websocket.send(
+                json.dumps(
+                    {
+                        "message_type": AGENT_STREAM_MESSAGE_TYPE,
+                        "request_id": self.request_id,
+                        "session_id": self.session_id,
+                        "stream_event": stream_event,
+                    },
+                    default=str
+                )
+            )
+        except Exception as e:
+            # The final response is still returned, only the partial ones are lost
+            logger.warning(f"Failed to stream partial response, streaming stopped: {e}")
+            self._closed = True
+
+
+async def stream_graph(
+        graph: CompiledStateGraph,
+        input: dict[str, Any],
+        config: RunnableConfig,
+        publisher: StreamPublisher
+) -> dict[str, Any]:
+    """
+    Runs the graph like `ainvoke` while publishing LLM tokens and the trace of every finished step.
+
+    Returns:
+        dict[str, Any]: Final state of the graph.
+    """
+    final_state = {}
+    node_names = {node.value for node in Nodes}
+
+    async for event in graph.astream_events(input, config=config, version="v2"):
+        kind = event["event"]
+        node = event["metadata"].get("langgraph_node")
+
+        if kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if content and isinstance(content, str):
+                await publisher.token(content, node=node)
+
+        elif kind == "on_chain_end":
+            if not event["parent_ids"]:
+                final_state = event["data"]["output"]
+            elif event["name"] in node_names and event["name"] == node:
+                output = event["data"].get("output") or {}
+                await publisher.step(node=node, trace=output.get("trace", []))
+
+    await publisher.flush()
+    return final_state
@@ -0,0 +1,127 @@
+import json
+from contextlib import contextmanager
+from typing import Any, Optional, Sequence
+
+import httpx
+from loguru import logger
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:  # only required when tracing is enabled
+    trace = None
+
+SERVICE_NAME = "genai-master-agent"
+
+_tracer = None
+_provider = None
+
+
+if trace is not None:
+    class FileSpanExporter(SpanExporter):
+        """
+        Appends finished spans to a file, one OTLP-like JSON object per line.
+        """
+
+        def __init__(self, path: str) -> None:
+            self.path = path
+
+        def export(self, spans: Sequence[Any]) -> "SpanExportResult":
+            with open(self.path, "a") as file:
+                for span in spans:
+                    file.write(json.dumps(json.loads(span.to_json())) + "\n")
+            return SpanExportResult.SUCCESS
+
+
+def setup_tracing(exporter: str, otlp_endpoint: str, file_path: str) -> None:
+    """
+    Configures span export of the Master Agent.
+
+    Args:
+        exporter (str): `none`, `otlp`, `file` or `console`
+        otlp_endpoint (str): URL of the OTLP/HTTP traces endpoint of a collector
+        file_path (str): File the `file` exporter appends spans to
+    """
+    global _tracer, _provider
+
+    if exporter == "none":
+        return
+    if trace is None:
+        raise RuntimeError("Tracing requires the OpenTelemetry SDK, install the master agent with the 'tracing' extra")
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        span_exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
+    elif exporter == "file":
+        span_exporter = FileSpanExporter(file_path)
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _tracer = _provider.get_tracer(__name__)
+    logger.info(f"Exporting traces with the {exporter} exporter")
+
+
+def shutdown_tracing() -> None:
+    """
+    Flushes pending spans.
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def start_span(name: str, traceparent: Optional[str] = None, **attributes: Any):
+    """
+    Runs the block in a span, a child of the current span or of the `traceparent` of a caller if given.
+    The span records exceptions raised by the block. Yields None when tracing is disabled.
+
+    Args:
+        name (str): Span name
+        traceparent (Optional[str]): W3C `traceparent` of the caller
+        **attributes: Span attributes, None values are skipped
+    """
+    if _tracer is None:
+        yield None
+        return
+
+    parent = None
+    if traceparent:
+        parent = TraceContextTextMapPropagator().extract({"traceparent": traceparent})
+    with _tracer.start_as_current_span(
+        name,
+        context=parent,
+        attributes={key: value for key, value in attributes.items() if value is not None}
+    ) as span:
+        yield span
+
+
+def current_traceparent() -> Optional[str]:
+    """
+    W3C `traceparent` of the current span, None outside of a span or when tracing is disabled.
+    """
+    if _tracer is None:
+        return None
+
+    carrier: dict[str, str] = {}
+    TraceContextTextMapPropagator().inject(carrier, context=otel_context.get_current())
+    return carrier.get("traceparent")
+
+
+async def inject_trace_context(request: httpx.Request) -> None:
+    """
+    httpx request hook propagating the current span to the called service.
+    """
+    if (traceparent := current_traceparent()) is not None:
+        request.headers["traceparent"] = traceparent
+
+
+HTTPX_EVENT_HOOKS = {"request": [inject_trace_context]}
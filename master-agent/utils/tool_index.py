@@ -0,0 +1,115 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Any
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+TEXT_KEYS = ("name", "title", "description")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def schema_text(schema: Any) -> str:
+    """
+    Names, descriptions and parameter names of an agent schema, without the JSON schema keywords.
+    """
+    parts = []
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key in TEXT_KEYS and isinstance(value, str):
+                parts.append(value)
+            elif key == "properties" and isinstance(value, dict):
+                parts.extend(value.keys())
+                parts.extend(schema_text(prop) for prop in value.values())
+            elif isinstance(value, (dict, list)):
+                parts.append(schema_text(value))
+    elif isinstance(schema, list):
+        parts.extend(schema_text(item) for item in schema)
+    return " ".join(part for part in parts if part)
+
+
+class ToolIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        BM25 index over the names and descriptions of the agents of a catalog.
+
+        `update` only re-indexes the agents added, changed or removed since the previous update, so the index of a
+        user can be kept across catalog refreshes.
+
+        Args:
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        self._docs: dict[str, tuple[str, Counter, int]] = {}  # agent name -> (schema hash, term counts, length)
+        self._document_frequency: Counter = Counter()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, agents: list[dict[str, Any]]) -> None:
+        current = {}
+        for agent in agents:
+            schema = agent.get("agent_schema", {})
+            current[agent["name"]] = (
+                hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest(),
+                f"{agent['name']} {schema_text(schema)}"
+            )
+
+        for name in self._docs.keys() - current.keys():
+            self._remove(name)
+
+        for name, (schema_hash, text) in current.items():
+            if (doc := self._docs.get(name)) is not None and doc[0] == schema_hash:
+                continue
+            if doc is not None:
+                self._remove(name)
+
+            terms = Counter(tokenize(text))
+            self._docs[name] = (schema_hash, terms, sum(terms.values()))
+            self._document_frequency.update(terms.keys())
+            self._total_length += self._docs[name][2]
+
+    def rank(self, query: str) -> dict[str, float]:
+        """
+        BM25 scores of the indexed agents matching at least one term of the query, by agent name.
+        """
+        if not self._docs:
+            return {}
+
+        average_length = self._total_length / len(self._docs)
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            if not (frequency := self._document_frequency.get(term)):
+                continue
+
+            idf = math.log(1 + (len(self._docs) - frequency + 0.5) / (frequency + 0.5))
+            for name, (_, terms, length) in self._docs.items():
+                if tf := terms.get(term):
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[name] = scores.get(name, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def select(self, query: str, agents: list[dict[str, Any]], top_k: int) -> list[dict[str, Any]]:
+        """
+        Returns the `top_k` agents ranking highest for the query, agents without a match keep their catalog order.
+        """
+        if len(agents) <= top_k:
+            return agents
+
+        scores = self.rank(query)
+        ranked = sorted(range(len(agents)), key=lambda i: -scores.get(agents[i]["name"], 0.0))
+        return [agents[i] for i in sorted(ranked[:top_k])]
+
+    def _remove(self, name: str) -> None:
+        _, terms, length = self._docs.pop(name)
+        self._document_frequency.subtract(terms.keys())
+        self._document_frequency += Counter()  # drop terms no longer in any document
+        self._total_length -= length
@@ -1,13 +1,133 @@
+import json
 import time
+import uuid
+from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import Any
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from config.settings import Settings
+from utils.telemetry import start_span
+
+app_settings = Settings()
+
+PAYLOAD_KEYS = ("input", "output")
 
 
 @asynccontextmanager
 async def trace_execution_time(trace: dict[str, Any]):
-    start = time.perf_counter()
-    try:
-        yield
-    finally:
-        end = time.perf_counter()
-        trace["execution_time"] = end - start
+    """
+    Stamps the execution time of the block into a trace record and runs it in a span, `connector.<type>` for
+    invocations of agents and `master_agent.select_agent` for the supervisor.
+    """
+    span_name = f"connector.{trace['type']}" if "type" in trace else "master_agent.select_agent"
+    with start_span(
+        span_name,
+        **{"genai.agent.id": trace.get("id"), "genai.agent.name": trace.get("name"), "genai.agent.url": trace.get("url")}
+    ):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            trace["execution_time"] = end - start
+
+
+class TraceSpillStore(ABC):
+    @abstractmethod
+    def save(self, payload: str) -> str:
+        """
+        Stores a trace payload and returns its ID.
+        """
+        ...
+
+
+class LocalTraceSpillStore(TraceSpillStore):
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save(self, payload: str) -> str:
+        payload_id = str(uuid.uuid4())
+        (self.directory / f"{payload_id}.json").write_text(payload)
+        return payload_id
+
+
+class TraceRecorder:
+    def __init__(self, max_payload_chars: int, max_records: int, spill_store: Optional[TraceSpillStore] = None) -> None:
+        """
+        Keeps the agents trace of a run bounded.
+
+        Inputs and outputs longer than `max_payload_chars` are replaced by a preview, the full payload is spilled to
+        `spill_store` if there is one and referenced by its ID. Above `max_records` only the first and last records are
+        kept, with a record counting the omitted ones in between.
+
+        Args:
+            max_payload_chars (int): Maximum length of the serialized input or output of a record
+            max_records (int): Maximum number of records of a trace, 0 keeps all of them
+            spill_store (Optional[TraceSpillStore]): Storage of the full payloads of truncated records
+        """
+        self.max_payload_chars = max_payload_chars
+        self.max_records = max_records
+        self.spill_store = spill_store
+
+    def add(self, left: list[dict[str, Any]], right: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Reducer of the trace of the graph state, compacts the new records and bounds the trace.
+        """
+        trace = left + [self.compact(record) for record in right]
+        if not self.max_records or len(trace) <= self.max_records:
+            return trace
+
+        head = self.max_records // 2
+        tail = self.max_records - head - 1
+        omitted = trace[head:len(trace) - tail]
+        if omitted and omitted[0].get("omitted_records"):
+            omitted_count = omitted[0]["omitted_records"] + len(omitted) - 1
+        else:
+            omitted_count = len(omitted)
+
+        marker = {
+            "name": "MasterAgent",
+            "output": f"{omitted_count} trace records omitted",
+            "omitted_records": omitted_count
+        }
+        return trace[:head] + [marker] + trace[len(trace) - tail:]
+
+    def compact(self, record: dict[str, Any]) -> dict[str, Any]:
+        record = record.copy()
+        for key in PAYLOAD_KEYS:
+            if key in record:
+                record[key] = self._compact_payload(record[key])
+        if isinstance(record.get("flow"), list):
+            record["flow"] = [self.compact(item) for item in record["flow"]]
+        return record
+
+    def _compact_payload(self, payload: Any) -> Any:
+        if isinstance(payload, dict) and payload.get("truncated"):
+            return payload  # already compacted, e.g. the trace of a nested flow
+
+        serialized = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        if len(serialized) <= self.max_payload_chars:
+            return payload
+
+        compacted = {"preview": serialized[:self.max_payload_chars], "size": len(serialized), "truncated": True}
+        if self.spill_store is not None:
+            try:
+                compacted["payload_id"] = self.spill_store.save(serialized)
+            except Exception as e:
+                logger.warning(f"Failed to spill trace payload: {e}")
+        return compacted
+
+
+trace_recorder = TraceRecorder(
+    max_payload_chars=app_settings.TRACE_MAX_PAYLOAD_CHARS,
+    max_records=app_settings.TRACE_MAX_RECORDS,
+    spill_store=LocalTraceSpillStore(app_settings.TRACE_SPILL_DIR) if app_settings.TRACE_SPILL_DIR else None,
+)
+
+
+def add_trace(left: list[dict[str, Any]], right: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return trace_recorder.add(left, right)
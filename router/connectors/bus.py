@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # only required for the `redis` backend
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BusMessage:
+    """
+    A frame exchanged between router nodes.
+
+    Attributes:
+        op (str): `deliver` to write `payload` to the local socket of `client_id`,
+            `deliver_droppable` to write it unless the socket is overloaded,
+            `invoke` to dispatch an invocation to a local replica of `client_id`,
+            `respond` to route an agent response to the local caller `client_id`,
+            `disconnect` to fail local sessions that depend on `client_id`,
+            `cancel` to forget the invocation `payload` pending on a local replica of
+            `client_id` after it ended on the caller's node without a response.
+        client_id (str): The client the operation applies to.
+        payload (str | bytes): Raw message to deliver, a text or a binary frame.
+    """
+
+    op: str
+    client_id: str
+    payload: str | bytes = ""
+
+    DELIVER = "deliver"
+    DELIVER_DROPPABLE = "deliver_droppable"
+    INVOKE = "invoke"
+    RESPOND = "respond"
+    DISCONNECT = "disconnect"
+    CANCEL = "cancel"
+
+    def encode(self) -> bytes:
+        # Line framing keeps the routed payload as is instead of escaping it
+        is_binary = isinstance(self.payload, bytes)
+        head = f"{self.op}\n{self.client_id}\n{'b' if is_binary else 't'}\n"
+        payload = self.payload if is_binary else self.payload.encode()
+        return head.encode() + payload
+
+    @classmethod
+    def decode(cls, data: str | bytes) -> "BusMessage":
+        if isinstance(data, str):
+            data = data.encode()
+        op, client_id, frame_type, payload = data.split(b"\n", 3)
+        return cls(
+            op=op.decode(),
+            client_id=client_id.decode(),
+            payload=payload if frame_type == b"b" else payload.decode(),
+        )
+
+
+BusHandler = Callable[[BusMessage], Awaitable[None]]
+
+
+class MessageBus(ABC):
+    """
+    Transport between router nodes. Every node listens on its own channel for
+    frames addressed to its local sockets and on a shared broadcast channel.
+    """
+
+    @abstractmethod
+    async def start(self, node_id: str, handler: BusHandler) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, node_id: str, message: BusMessage) -> None:
+        pass
+
+    @abstractmethod
+    async def broadcast(self, message: BusMessage) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBroker:
+    """
+    Process-local pub/sub shared by in-memory buses, e.g. several router nodes
+    started in one test process.
+    """
+
+    def __init__(self):
+        self.nodes: dict[str, BusHandler] = {}
+
+
+class InMemoryMessageBus(MessageBus):
+    _default_broker = InMemoryBroker()
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        self.broker = broker or self._default_broker
+        self.node_id: Optional[str] = None
+
+    async def start(self, node_id: str, handler: BusHandler) -> None:
+        self.node_id = node_id
+        self.broker.nodes[node_id] = handler
+
+    async def publish(self, node_id: str, message: BusMessage) -> None:
+        if handler := self.broker.nodes.get(node_id):
+            await handler(BusMessage.decode(message.encode()))
+
+    async def broadcast(self, message: BusMessage) -> None:
+        for node_id, handler in list(self.broker.nodes.items()):
+            if node_id != self.node_id:
+                await handler(BusMessage.decode(message.encode()))
+
+    async def close(self) -> None:
+        self.broker.nodes.pop(self.node_id, None)
+
+
+class RedisMessageBus(MessageBus):
+    def __init__(self, redis_url: str, channel_prefix: str):
+        if redis_asyncio is None:
+            raise RuntimeError(
+                "The redis message bus requires the 'redis' package, "
+                "install the router with the 'cluster' extra"
+            )
+        self.redis = redis_asyncio.from_url(redis_url)
+        self.channel_prefix = channel_prefix
+        self.node_id: Optional[str] = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _node_channel(self, node_id: str) -> str:
+        return f"{self.channel_prefix}:node:{node_id}"
+
+    @property
+    def _broadcast_channel(self) -> str:
+        return f"{self.channel_prefix}:broadcast"
+
+    async def start(self, node_id: str, handler: BusHandler) -> None:
+        self.node_id = node_id
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(
+            self._node_channel(node_id), self._broadcast_channel
+        )
+        self._listener = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: BusHandler) -> None:
+        async for item in self._pubsub.listen():
+            try:
+                message = BusMessage.decode(item["data"])
+            except ValueError:
+                logger.warning("Dropping malformed bus frame")
+                continue
+            try:
+                await handler(message)
+            except Exception:
+                logger.exception("Failed to handle bus frame")
+
+    async def publish(self, node_id: str, message: BusMessage) -> None:
+        await self.redis.publish(self._node_channel(node_id), message.encode())
+
+    async def broadcast(self, message: BusMessage) -> None:
+        # Redis echoes to the sender as well, receivers skip their own frames
+        await self.redis.publish(self._broadcast_channel, message.encode())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.redis.aclose()
+
+
+def create_message_bus(
+    backend: str, redis_url: str, channel_prefix: str
+) -> Optional[MessageBus]:
+    """
+    Creates the message bus for the configured backend.
+
+    Args:
+        backend (str): `none` for a single node, `memory` or `redis`.
+        redis_url (str): Redis connection URL, used by the `redis` backend.
+        channel_prefix (str): Prefix of the pub/sub channel names.
+
+    Returns:
+        Optional[MessageBus]: The bus, or None when running a single node.
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryMessageBus()
+    if backend == "redis":
+        return RedisMessageBus(redis_url=redis_url, channel_prefix=channel_prefix)
+    raise ValueError(f"Unknown message bus backend: {backend}")
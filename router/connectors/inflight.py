@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from utils.metrics import Histogram
+from utils.telemetry import end_span, start_span
+
+logger = logging.getLogger(__name__)
+
+# Separates the caller ID from the request ID in the `invoked_by` field
+REQUEST_ID_SEPARATOR = "|"
+
+
+@dataclass(slots=True)
+class InFlightCall:
+    """
+    An `AGENT_INVOKE` forwarded to an agent and still waiting for its response.
+
+    Attributes:
+        request_id (str): Router-assigned ID of the call.
+        caller_id (str): Connection the response has to be routed to.
+        target_id (str): The invoked agent.
+        timeout (Optional[float]): Seconds the target has to respond.
+        span (Optional[Span]): Tracing span of the call, if tracing is enabled.
+        replica_id (Optional[str]): Local replica connection the call was
+            dispatched to.
+        target_node (Optional[str]): Router node the call was forwarded to when the
+            target is connected elsewhere.
+    """
+
+    request_id: str
+    caller_id: str
+    target_id: str
+    timeout: Optional[float] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    deadline: Optional[asyncio.TimerHandle] = None
+    span: Optional[Any] = None
+    replica_id: Optional[str] = None
+    target_node: Optional[str] = None
+
+    @property
+    def invoked_by(self) -> str:
+        """
+        Value stamped into the forwarded message and echoed back by the agent.
+        """
+        return f"{self.caller_id}{REQUEST_ID_SEPARATOR}{self.request_id}"
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+@dataclass(slots=True)
+class AgentCallStats:
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "latency": self.latency.to_dict(),
+        }
+
+
+def split_invoked_by(invoked_by: str) -> tuple[str, Optional[str]]:
+    """
+    Splits an `invoked_by` value into the caller ID and the request ID.
+
+    Args:
+        invoked_by (str): Value echoed back by the agent.
+
+    Returns:
+        tuple[str, Optional[str]]: Caller ID and request ID, if any.
+    """
+    caller_id, separator, request_id = invoked_by.rpartition(REQUEST_ID_SEPARATOR)
+    if not separator:
+        return invoked_by, None
+    return caller_id, request_id
+
+
+class InFlightTracker:
+    """
+    Keeps track of invocations the router has forwarded, enforces their deadlines
+    and collects per-agent call statistics.
+    """
+
+    def __init__(
+        self,
+        default_timeout: Optional[float],
+        on_timeout: Callable[[InFlightCall], Awaitable[None]],
+        target_timeouts: Optional[dict[str, float]] = None,
+        on_end: Optional[Callable[[InFlightCall, bool], None]] = None,
+    ):
+        """
+        Args:
+            default_timeout (Optional[float]): Deadline of calls that do not set one,
+                None or 0 disables it.
+            on_timeout (Callable[[InFlightCall], Awaitable[None]]): Called for every
+                call that missed its deadline.
+            target_timeouts (Optional[dict[str, float]]): Deadlines of calls to
+                specific targets overriding the default, 0 disables it.
+            on_end (Optional[Callable[[InFlightCall, bool], None]]): Called once for
+                every call that ends, however it ends, with whether the target
+                answered it.
+        """
+        self.default_timeout = default_timeout or None
+        self.target_timeouts = target_timeouts or {}
+        self.on_end = on_end
+        self.on_timeout = on_timeout
+        self.stats: dict[str, AgentCallStats] = {}
+
+        self._calls: dict[str, InFlightCall] = {}
+        self._by_target: dict[str, set[str]] = {}
+        self._by_caller: dict[str, set[str]] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def start(
+        self,
+        caller_id: str,
+        target_id: str,
+        timeout: Optional[float] = None,
+        traceparent: Optional[str] = None,
+    ) -> InFlightCall:
+        """
+        Registers a forwarded invocation.
+
+        Args:
+            caller_id (str): Connection that sent the invocation.
+            target_id (str): The invoked agent.
+            timeout (Optional[float]): Per-call deadline overriding the default
+                deadline of the target.
+            traceparent (Optional[str]): W3C trace context of the caller.
+
+        Returns:
+            InFlightCall: The registered call.
+        """
+        call = InFlightCall(
+            request_id=uuid.uuid4().hex,
+            caller_id=caller_id,
+            target_id=target_id,
+            timeout=timeout
+            or self.target_timeouts.get(target_id, self.default_timeout)
+            or None,
+        )
+        call.span = start_span(
+            "router.invoke",
+            traceparent=traceparent,
+            **{
+                "genai.agent_uuid": target_id,
+                "genai.router.request_id": call.request_id,
+            },
+        )
+        if call.timeout:
+            call.deadline = asyncio.get_running_loop().call_later(
+                call.timeout, self._expire, call.request_id
+            )
+
+        self._calls[call.request_id] = call
+        self._by_target.setdefault(target_id, set()).add(call.request_id)
+        self._by_caller.setdefault(caller_id, set()).add(call.request_id)
+        self._stats(target_id).in_flight += 1
+        return call
+
+    def complete(
+        self, request_id: str, is_success: bool = True
+    ) -> Optional[InFlightCall]:
+        """
+        Marks a call as answered.
+
+        Args:
+            request_id (str): ID of the call.
+            is_success (bool): Whether the agent responded with a result.
+
+        Returns:
+            Optional[InFlightCall]: The call, or None if it already timed out or failed.
+        """
+        call = self._pop(request_id, answered=True)
+        if call is not None:
+            stats = self._stats(call.target_id)
+            stats.latency.observe(call.elapsed)
+            if is_success:
+                stats.completed += 1
+            else:
+                stats.failed += 1
+            end_span(call.span, error=None if is_success else "agent error")
+        return call
+
+    def fail_target(self, target_id: str) -> list[InFlightCall]:
+        """
+        Removes all calls pending on a target that went away.
+
+        Args:
+            target_id (str): The disconnected agent.
+
+        Returns:
+            list[InFlightCall]: Calls whose callers have to be notified.
+        """
+        calls = [
+            call
+            for request_id in list(self._by_target.get(target_id, ()))
+            if (call := self._pop(request_id)) is not None
+        ]
+        if calls:
+            self._stats(target_id).failed += len(calls)
+        for call in calls:
+            end_span(call.span, error="agent disconnected")
+        return calls
+
+    def drop_caller(self, caller_id: str) -> None:
+        """
+        Forgets calls of a caller that disconnected, their responses have nowhere to go.
+
+        Args:
+            caller_id (str): The disconnected caller.
+        """
+        for request_id in list(self._by_caller.get(caller_id, ())):
+            if (call := self._pop(request_id)) is not None:
+                end_span(call.span, error="caller disconnected")
+
+    def count_for(self, target_id: str) -> int:
+        return len(self._by_target.get(target_id, ()))
+
+    def _stats(self, target_id: str) -> AgentCallStats:
+        if (stats := self.stats.get(target_id)) is None:
+            stats = self.stats[target_id] = AgentCallStats()
+        return stats
+
+    def _pop(self, request_id: str, answered: bool = False) -> Optional[InFlightCall]:
+        call = self._calls.pop(request_id, None)
+        if call is None:
+            return None
+
+        if call.deadline is not None:
+            call.deadline.cancel()
+        for index, key in (
+            (self._by_target, call.target_id),
+            (self._by_caller, call.caller_id),
+        ):
+            if (request_ids := index.get(key)) is not None:
+                request_ids.discard(request_id)
+                if not request_ids:
+                    del index[key]
+        self._stats(call.target_id).in_flight -= 1
+        if self.on_end is not None:
+            self.on_end(call, answered)
+        return call
+
+    def _expire(self, request_id: str) -> None:
+        call = self._pop(request_id)
+        if call is None:
+            return
+
+        self._stats(call.target_id).timed_out += 1
+        end_span(call.span, error="timeout")
+        logger.warning(
+            "Call %s to %s timed out after %ss",
+            request_id,
+            call.target_id,
+            call.timeout,
+        )
+        task = asyncio.create_task(self.on_timeout(call))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
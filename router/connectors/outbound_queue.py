@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+from utils.enums import DisconnectReason, OverflowPolicy
+
+logger = logging.getLogger(__name__)
+
+# 1013: "Try Again Later", the peer is too slow to keep up with its traffic
+WS_CLOSE_CODE_OVERLOADED = 1013
+
+
+class OutboundQueue:
+    """
+    Bounded per-connection outbound buffer drained by a dedicated writer task.
+
+    Senders only enqueue and never wait on the socket, so one slow consumer cannot
+    block the receive loop of the peers routing messages to it. Once the queue
+    reaches its high-water mark the overflow policy decides whether the newest
+    message is dropped, the oldest one is evicted, or the connection is closed.
+
+    Only messages queued as droppable, e.g. logs, are ever dropped. When no
+    droppable message can make room for one that must be delivered, the connection
+    is closed so its peer reconnects and its pending calls fail instead of waiting
+    for a response that was lost.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        high_water_mark: int,
+        overflow_policy: OverflowPolicy,
+        send_timeout: Optional[float] = None,
+        on_sent: Optional[Callable[[int, float], None]] = None,
+    ):
+        """
+        Args:
+            websocket (WebSocket): The socket messages are written to.
+            high_water_mark (int): Maximum number of buffered messages.
+            overflow_policy (OverflowPolicy): What to do when the queue is full.
+            send_timeout (Optional[float]): Seconds a single send may take before the
+                peer is considered stuck and the connection is closed.
+            on_sent (Optional[Callable[[int, float], None]]): Called with the size
+                of every message actually written to the socket and the seconds the
+                send took.
+        """
+        self.websocket = websocket
+        self.high_water_mark = high_water_mark
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.on_sent = on_sent
+
+        self.peak_depth = 0
+        self.dropped = 0
+        self.closed = False
+        self.close_reason: Optional[DisconnectReason] = None
+
+        self._buffer: deque[tuple[str | bytes, bool]] = deque()
+        self._ready = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._drain())
+
+    def put(self, message: str | bytes, droppable: bool = True) -> bool:
+        """
+        Enqueues a message without waiting for the socket.
+
+        Args:
+            message (str | bytes): Serialized message, bytes are sent as a binary
+                frame.
+            droppable (bool): Whether the overflow policy may drop the message.
+
+        Returns:
+            bool: Whether the message was accepted.
+        """
+        if self.closed:
+            return False
+
+        if len(self._buffer) >= self.high_water_mark and not self._make_room(droppable):
+            return False
+
+        self._buffer.append((message, droppable))
+        self.peak_depth = max(self.peak_depth, len(self._buffer))
+        self._ready.set()
+        return True
+
+    def _make_room(self, droppable: bool) -> bool:
+        """
+        Applies the overflow policy to a message that does not fit.
+
+        Args:
+            droppable (bool): Whether the message may be dropped.
+
+        Returns:
+            bool: Whether a buffered message was evicted to make room for it.
+        """
+        self.dropped += 1
+        if self.overflow_policy == OverflowPolicy.DROP_NEWEST and droppable:
+            logger.warning("Outbound queue is full, dropping the newest message")
+            return False
+
+        if self.overflow_policy != OverflowPolicy.CLOSE:
+            newest_first = self.overflow_policy == OverflowPolicy.DROP_NEWEST
+            indexes = range(len(self._buffer))
+            for index in reversed(indexes) if newest_first else indexes:
+                if self._buffer[index][1]:
+                    logger.warning("Outbound queue is full, dropping a queued message")
+                    del self._buffer[index]
+                    return True
+            if droppable:
+                logger.warning("Outbound queue is full, dropping the newest message")
+                return False
+
+        logger.warning("Outbound queue is full, closing the connection")
+        self._close(DisconnectReason.OVERFLOW, "Outbound queue overflow")
+        return False
+
+    def stop(self) -> None:
+        """
+        Stops the writer task and discards buffered messages.
+        """
+        self.closed = True
+        self._buffer.clear()
+        if self._writer_task is not None and not self._writer_task.done():
+            self._writer_task.cancel()
+
+    async def _drain(self) -> None:
+        while not self.closed:
+            if not self._buffer:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            message, _ = self._buffer.popleft()
+            started_at = time.perf_counter()
+            try:
+                send = (
+                    self.websocket.send_bytes(message)
+                    if isinstance(message, bytes)
+                    else self.websocket.send_text(message)
+                )
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Sending to the peer timed out after %ss, closing the connection",
+                    self.send_timeout,
+                )
+                self._close(DisconnectReason.SEND_TIMEOUT, "Send timed out")
+                return
+            except Exception as e:
+                logger.warning("Failed to send message, stopping writer: %s", e)
+                self.close_reason = DisconnectReason.SEND_ERROR
+                self.stop()
+                return
+
+            if self.on_sent is not None:
+                self.on_sent(len(message), time.perf_counter() - started_at)
+
+    def _close(self, close_reason: DisconnectReason, reason: str) -> None:
+        """
+        Closes the socket of a peer that cannot keep up. The receive loop of the
+        connection then observes the disconnect and runs the regular cleanup.
+        """
+        self.close_reason = close_reason
+        self.stop()
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            asyncio.create_task(self._close_websocket(reason))
+
+    async def _close_websocket(self, reason: str) -> None:
+        try:
+            await self.websocket.close(code=WS_CLOSE_CODE_OVERLOADED, reason=reason)
+        except Exception as e:
+            logger.debug("Failed to close overloaded connection: %s", e)
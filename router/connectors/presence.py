@@ -0,0 +1,159 @@
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # only required for the `redis` backend
+    redis_asyncio = None
+
+
+class PresenceRegistry(ABC):
+    """
+    Cluster-wide map of client IDs to the router nodes that hold at least one of
+    their sockets. A client with replicas on several nodes is present on all of them
+    until the last one disconnects.
+    """
+
+    @abstractmethod
+    async def register(self, client_id: str, node_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def unregister(self, client_id: str, node_id: str) -> None:
+        """
+        Removes only the entry of `node_id`, so a disconnect on one node cannot
+        erase replicas of the client connected to other nodes.
+        """
+        pass
+
+    @abstractmethod
+    async def nodes(self, client_id: str) -> set[str]:
+        """
+        Returns the nodes the client is currently connected to.
+        """
+        pass
+
+    async def locate(
+        self, client_id: str, exclude: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Picks one of the nodes the client is connected to.
+
+        Args:
+            client_id (str): The client to look up.
+            exclude (Optional[str]): A node that must not be picked, e.g. the
+                calling node.
+
+        Returns:
+            Optional[str]: The node, None if the client is not connected anywhere.
+        """
+        candidates = sorted(await self.nodes(client_id) - {exclude})
+        return random.choice(candidates) if candidates else None
+
+    async def refresh(self, client_ids: Iterable[str], node_id: str) -> None:
+        """
+        Keeps entries of live local clients from expiring.
+        """
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryPresenceRegistry(PresenceRegistry):
+    _default_entries: dict[str, set[str]] = {}
+
+    def __init__(self, entries: Optional[dict[str, set[str]]] = None):
+        self.entries = self._default_entries if entries is None else entries
+
+    async def register(self, client_id: str, node_id: str) -> None:
+        self.entries.setdefault(client_id, set()).add(node_id)
+
+    async def unregister(self, client_id: str, node_id: str) -> None:
+        if (nodes := self.entries.get(client_id)) is None:
+            return
+        nodes.discard(node_id)
+        if not nodes:
+            del self.entries[client_id]
+
+    async def nodes(self, client_id: str) -> set[str]:
+        return set(self.entries.get(client_id, ()))
+
+
+class RedisPresenceRegistry(PresenceRegistry):
+    """
+    Keeps a sorted set per client, scored by the time the entry of each node expires
+    at, so the entries of a node that stopped refreshing them vanish on their own.
+    """
+
+    def __init__(self, redis_url: str, key_prefix: str, ttl_seconds: int):
+        if redis_asyncio is None:
+            raise RuntimeError(
+                "The redis presence registry requires the 'redis' package, "
+                "install the router with the 'cluster' extra"
+            )
+        self.redis = redis_asyncio.from_url(redis_url, decode_responses=True)
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, client_id: str) -> str:
+        # Not the `presence` keys of the former single-owner strings, which a
+        # rolling upgrade leaves behind until they expire
+        return f"{self.key_prefix}:presence-nodes:{client_id}"
+
+    def _add(self, pipe, client_id: str, node_id: str, now: float) -> None:
+        key = self._key(client_id)
+        pipe.zadd(key, {node_id: now + self.ttl_seconds})
+        pipe.zremrangebyscore(key, "-inf", now)
+        pipe.expire(key, self.ttl_seconds)
+
+    async def register(self, client_id: str, node_id: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._add(pipe, client_id, node_id, time.time())
+            await pipe.execute()
+
+    async def unregister(self, client_id: str, node_id: str) -> None:
+        await self.redis.zrem(self._key(client_id), node_id)
+
+    async def nodes(self, client_id: str) -> set[str]:
+        return set(
+            await self.redis.zrangebyscore(self._key(client_id), time.time(), "+inf")
+        )
+
+    async def refresh(self, client_ids: Iterable[str], node_id: str) -> None:
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for client_id in client_ids:
+                self._add(pipe, client_id, node_id, now)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_presence_registry(
+    backend: str, redis_url: str, key_prefix: str, ttl_seconds: int
+) -> Optional[PresenceRegistry]:
+    """
+    Creates the presence registry for the configured backend.
+
+    Args:
+        backend (str): `none` for a single node, `memory` or `redis`.
+        redis_url (str): Redis connection URL, used by the `redis` backend.
+        key_prefix (str): Prefix of the registry keys.
+        ttl_seconds (int): Expiration of entries not refreshed by their node.
+
+    Returns:
+        Optional[PresenceRegistry]: The registry, or None when running a single node.
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryPresenceRegistry()
+    if backend == "redis":
+        return RedisPresenceRegistry(
+            redis_url=redis_url, key_prefix=key_prefix, ttl_seconds=ttl_seconds
+        )
+    raise ValueError(f"Unknown presence registry backend: {backend}")
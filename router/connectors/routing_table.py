@@ -0,0 +1,229 @@
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from fastapi import WebSocket
+from connectors.outbound_queue import OutboundQueue
+from utils.enums import ConnectionKind
+
+
+@dataclass(slots=True)
+class Connection:
+    """
+    A single WebSocket connection registered in the routing table together with
+    the bookkeeping metadata exposed over the admin API.
+
+    Attributes:
+        connection_id (str): Unique routing ID of the connection.
+        kind (ConnectionKind): Whether the socket belongs to a master server, an agent
+            or a per-call invoke session.
+        websocket (WebSocket): The underlying WebSocket.
+        parents (tuple[str, ...]): IDs of the clients this one depends on. Only
+            invoke sessions have parents: the caller and the invoked agent.
+        client_id (str): ID of the client the connection serves, defaults to
+            `connection_id`. Replicas of an agent share it.
+        draining (bool): Whether the replica is finishing its work and receives no
+            new invocations.
+        pending (set[str]): `invoked_by` values of invocations dispatched to this
+            connection and not answered yet.
+        outbound (Optional[OutboundQueue]): Buffer all outgoing messages go through.
+    """
+
+    connection_id: str
+    kind: ConnectionKind
+    websocket: WebSocket
+    parents: tuple[str, ...] = ()
+    client_id: str = ""
+    draining: bool = False
+    pending: set[str] = field(default_factory=set)
+    connected_at: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    messages_in: int = 0
+    messages_out: int = 0
+    outbound: Optional[OutboundQueue] = None
+
+    def __post_init__(self):
+        if not self.client_id:
+            self.client_id = self.connection_id
+
+    @property
+    def is_healthy(self) -> bool:
+        """
+        Whether the connection can take more work without overflowing its queue.
+        """
+        if self.outbound is None:
+            return True
+        return (
+            not self.outbound.closed
+            and self.outbound.depth < self.outbound.high_water_mark
+        )
+
+    def record_inbound(self, size: int) -> None:
+        self.last_seen = time.time()
+        self.bytes_in += size
+        self.messages_in += 1
+
+    def record_outbound(self, size: int) -> None:
+        self.bytes_out += size
+        self.messages_out += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "connection_id": self.connection_id,
+            "client_id": self.client_id,
+            "kind": self.kind.value,
+            "parents": list(self.parents),
+            "connected_at": self.connected_at,
+            "last_seen": self.last_seen,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "draining": self.draining,
+            "in_flight": len(self.pending),
+            "queue_depth": self.outbound.depth if self.outbound else 0,
+            "queue_peak_depth": self.outbound.peak_depth if self.outbound else 0,
+            "queue_dropped": self.outbound.dropped if self.outbound else 0,
+        }
+
+
+class RoutingTable:
+    """
+    In-memory index of active connections.
+
+    Connections are partitioned by kind, grouped by the client they serve, and
+    invoke sessions are additionally indexed under each of their parents, so
+    dependent sessions of an agent are found in O(children) instead of scanning
+    every connection. All mutations are plain dict operations that never await, so
+    the table needs no locking on the event loop.
+    """
+
+    def __init__(self):
+        self._connections: dict[str, Connection] = {}
+        self._by_kind: dict[ConnectionKind, dict[str, Connection]] = {
+            kind: {} for kind in ConnectionKind
+        }
+        self._by_client: dict[str, dict[str, Connection]] = {}
+        self._children: dict[str, set[str]] = {}
+
+    def __contains__(self, routing_id: str) -> bool:
+        """
+        Checks whether a connection ID or a client ID with at least one live
+        connection is known.
+        """
+        return routing_id in self._connections or routing_id in self._by_client
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def __iter__(self) -> Iterator[Connection]:
+        return iter(list(self._connections.values()))
+
+    def get(self, connection_id: str) -> Optional[Connection]:
+        return self._connections.get(connection_id)
+
+    def replicas(self, client_id: str) -> list[Connection]:
+        """
+        Returns all connections serving the client, in connection order.
+
+        Args:
+            client_id (str): ID of the client.
+
+        Returns:
+            list[Connection]: Connections of the client.
+        """
+        return list(self._by_client.get(client_id, {}).values())
+
+    def routing_ids(self) -> set[str]:
+        """
+        Returns every connection ID and client ID the table can route to.
+        """
+        return self._connections.keys() | self._by_client.keys()
+
+    def add(self, connection: Connection) -> Optional[Connection]:
+        """
+        Registers a connection, replacing any connection with the same ID.
+
+        Args:
+            connection (Connection): The connection to register.
+
+        Returns:
+            Optional[Connection]: The replaced connection, if any.
+        """
+        previous = self._detach(connection.connection_id)
+
+        self._connections[connection.connection_id] = connection
+        self._by_kind[connection.kind][connection.connection_id] = connection
+        self._by_client.setdefault(connection.client_id, {})[
+            connection.connection_id
+        ] = connection
+        for parent_id in connection.parents:
+            self._children.setdefault(parent_id, set()).add(connection.connection_id)
+
+        return previous
+
+    def remove(
+        self, connection_id: str, websocket: Optional[WebSocket] = None
+    ) -> Optional[Connection]:
+        """
+        Removes a connection from every index.
+
+        Args:
+            connection_id (str): ID of the connection to remove.
+            websocket (Optional[WebSocket]): If given, the connection is only removed
+                when it is still bound to this socket. Prevents a late disconnect of a
+                replaced socket from evicting its successor.
+
+        Returns:
+            Optional[Connection]: The removed connection, if any.
+        """
+        connection = self._connections.get(connection_id)
+        if connection is None:
+            return None
+        if websocket is not None and connection.websocket is not websocket:
+            return None
+        return self._detach(connection_id)
+
+    def children_of(self, parent_id: str) -> list[Connection]:
+        """
+        Returns invoke sessions that depend on the given connection.
+
+        Args:
+            parent_id (str): ID of the parent connection.
+
+        Returns:
+            list[Connection]: Dependent connections.
+        """
+        return [
+            self._connections[child_id]
+            for child_id in self._children.get(parent_id, ())
+            if child_id in self._connections
+        ]
+
+    def by_kind(self, kind: ConnectionKind) -> list[Connection]:
+        return list(self._by_kind[kind].values())
+
+    def count_by_kind(self) -> dict[str, int]:
+        return {kind.value: len(items) for kind, items in self._by_kind.items()}
+
+    def _detach(self, connection_id: str) -> Optional[Connection]:
+        connection = self._connections.pop(connection_id, None)
+        if connection is None:
+            return None
+
+        self._by_kind[connection.kind].pop(connection_id, None)
+        replicas = self._by_client.get(connection.client_id)
+        if replicas is not None:
+            replicas.pop(connection_id, None)
+            if not replicas:
+                del self._by_client[connection.client_id]
+        for parent_id in connection.parents:
+            children = self._children.get(parent_id)
+            if children is not None:
+                children.discard(connection_id)
+                if not children:
+                    del self._children[parent_id]
+
+        return connection
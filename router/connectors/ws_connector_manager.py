@@ -1,15 +1,42 @@
-import json
+import asyncio
+import functools
+import hashlib
+import itertools
 import logging
-import jwt
 
-from typing import Dict
+from typing import Coroutine, Optional
 
 from fastapi import WebSocket
 from settings import get_settings
-from utils.enums import WSMessageType, MasterServerName, ErrorType
+from connectors.bus import BusMessage, MessageBus, create_message_bus
+from connectors.inflight import InFlightCall, InFlightTracker, split_invoked_by
+from connectors.outbound_queue import OutboundQueue
+from connectors.presence import PresenceRegistry, create_presence_registry
+from connectors.routing_table import Connection, RoutingTable
+from utils.codec import CodecError, get_codec
+from utils.enums import (
+    WSMessageType,
+    MasterServerName,
+    ErrorType,
+    ErrorReason,
+    ConnectionKind,
+    DispatchPolicy,
+    DisconnectReason,
+)
+from utils.envelope import Envelope
+from utils.agent_tokens import AgentTokenVerifier
+from utils.log_format import Truncated
+from utils.metrics import PrometheusExposition, RouterMetrics
+from utils.rate_limit import RateLimiter
 
 app_settings = get_settings()
 
+# 1001: "Going Away", sent to drained agent replicas
+WS_CLOSE_CODE_GOING_AWAY = 1001
+
+# Frames of other types are counted as "unknown" to bound the metric labels
+METRIC_MESSAGE_TYPES = frozenset(message_type.value for message_type in WSMessageType)
+
 
 class WSConnectionManager:
     """
@@ -23,28 +50,281 @@ class WSConnectionManager:
         app_settings.MASTER_AGENT_API_KEY: MasterServerName.MASTER_SERVER_ML.value,
     }
 
-    def __init__(self):
+    def __init__(
+        self,
+        bus: Optional[MessageBus] = None,
+        presence: Optional[PresenceRegistry] = None,
+        node_id: Optional[str] = None,
+    ):
+        """
+        Initializes the WebSocket connection manager with an empty routing table.
+
+        In multi-node mode every router replica owns its local sockets, publishes
+        its clients in the shared presence registry and forwards frames for
+        clients owned by other replicas over the message bus.
+
+        Args:
+            bus (Optional[MessageBus]): Bus to other router nodes, created from
+                settings when omitted.
+            presence (Optional[PresenceRegistry]): Cluster-wide client registry,
+                created from settings when omitted.
+            node_id (Optional[str]): ID of this router node.
         """
-        Initializes the WebSocket connection manager with an empty active connections dictionary.
+        self.routing_table = RoutingTable()
+        self.codec = get_codec(app_settings.JSON_CODEC)
+        self._connection_counter = itertools.count(1)
+        self._dispatch_counter = itertools.count()
+        self.metrics = RouterMetrics()
+        self.rate_limiter = RateLimiter(
+            {
+                WSMessageType.AGENT_INVOKE.value: (
+                    app_settings.RATE_LIMIT_INVOKES_PER_SECOND,
+                    app_settings.RATE_LIMIT_INVOKES_BURST,
+                ),
+                WSMessageType.AGENT_LOG.value: (
+                    app_settings.RATE_LIMIT_LOGS_PER_SECOND,
+                    app_settings.RATE_LIMIT_LOGS_BURST,
+                ),
+            }
+        )
+        self.token_verifier = AgentTokenVerifier(
+            secret_key=app_settings.SECRET_KEY,
+            algorithm=app_settings.HASH_ALGORITHM,
+            max_size=app_settings.AGENT_TOKEN_CACHE_SIZE,
+            ttl_seconds=app_settings.AGENT_TOKEN_CACHE_TTL_SECONDS,
+            allow_opaque=not app_settings.REQUIRE_SIGNED_AGENT_TOKENS,
+        )
+        # Digest of the last registration forwarded per agent with local replicas
+        self._registrations: dict[str, bytes] = {}
+        self._pending_unregisters: dict[str, asyncio.TimerHandle] = {}
+        self.inflight = InFlightTracker(
+            default_timeout=app_settings.ROUTER_INVOKE_TIMEOUT_SECONDS,
+            on_timeout=self._fail_timed_out_call,
+            target_timeouts={
+                MasterServerName.MASTER_SERVER_ML.value: (
+                    app_settings.MASTER_AGENT_INVOKE_TIMEOUT_SECONDS
+                )
+            },
+            on_end=self._release_call,
+        )
+
+        self.node_id = node_id or app_settings.ROUTER_NODE_ID
+        self.bus = bus or create_message_bus(
+            backend=app_settings.MESSAGE_BUS_BACKEND,
+            redis_url=app_settings.ROUTER_REDIS_URL,
+            channel_prefix=app_settings.CLUSTER_KEY_PREFIX,
+        )
+        self.presence = presence or create_presence_registry(
+            backend=app_settings.MESSAGE_BUS_BACKEND,
+            redis_url=app_settings.ROUTER_REDIS_URL,
+            key_prefix=app_settings.CLUSTER_KEY_PREFIX,
+            ttl_seconds=app_settings.PRESENCE_TTL_SECONDS,
+        )
+        self._presence_task: Optional[asyncio.Task] = None
+        self._background_tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """
+        Joins the router cluster, a no-op when running a single node.
+        """
+        if self.bus is not None:
+            await self.bus.start(self.node_id, self._handle_bus_message)
+        if self.presence is not None:
+            self._presence_task = asyncio.create_task(self._refresh_presence())
+
+    async def stop(self) -> None:
+        """
+        Leaves the router cluster.
+        """
+        if self._presence_task is not None:
+            self._presence_task.cancel()
+        if self.bus is not None:
+            await self.bus.close()
+        if self.presence is not None:
+            await self.presence.close()
+
+    async def is_connected(self, client_id: str) -> bool:
         """
-        self.active_connections: Dict[str, WebSocket] = {}
+        Checks whether the client is connected to this or any other router node.
+
+        Args:
+            client_id (str): The client ID to look up.
+
+        Returns:
+            bool: Whether the client is connected.
+        """
+        if client_id in self.routing_table:
+            return True
+        if self.presence is not None and client_id:
+            return await self.presence.locate(client_id) is not None
+        return False
+
+    def render_metrics(self) -> str:
+        """
+        Renders the router metrics in the Prometheus text exposition format.
+
+        Gauges are computed from the routing table and the in-flight tracker at
+        scrape time, so the routing path only pays for the counter increments.
+
+        Returns:
+            str: The exposition of all router metrics.
+        """
+        metrics = self.metrics
+        exposition = PrometheusExposition()
+        connections = {
+            kind: self.routing_table.by_kind(kind) for kind in ConnectionKind
+        }
+
+        exposition.add(
+            "router_connections",
+            "gauge",
+            "Open WebSocket connections.",
+            (({"kind": kind.value}, len(items)) for kind, items in connections.items()),
+        )
+        exposition.add(
+            "router_frames_received_total",
+            "counter",
+            "Frames received by message type.",
+            (({"message_type": t}, n) for t, n in metrics.frames_received.items()),
+        )
+        exposition.add(
+            "router_received_bytes_total",
+            "counter",
+            "Bytes received by message type.",
+            (({"message_type": t}, n) for t, n in metrics.bytes_received.items()),
+        )
+        exposition.add(
+            "router_frames_sent_total",
+            "counter",
+            "Frames written to sockets by connection kind.",
+            (({"kind": kind}, n) for kind, n in metrics.frames_sent.items()),
+        )
+        exposition.add(
+            "router_sent_bytes_total",
+            "counter",
+            "Bytes written to sockets by connection kind.",
+            (({"kind": kind}, n) for kind, n in metrics.bytes_sent.items()),
+        )
+        exposition.add_histogram(
+            "router_send_duration_seconds",
+            "Time a single socket write took by connection kind.",
+            (({"kind": kind}, h) for kind, h in metrics.send_duration.items()),
+        )
+        exposition.add(
+            "router_outbound_queue_depth",
+            "gauge",
+            "Messages buffered in outbound queues by connection kind.",
+            (
+                ({"kind": kind.value}, sum(c.outbound.depth for c in items))
+                for kind, items in connections.items()
+            ),
+        )
+        exposition.add(
+            "router_outbound_queue_max_depth",
+            "gauge",
+            "Deepest outbound queue by connection kind.",
+            (
+                (
+                    {"kind": kind.value},
+                    max((c.outbound.depth for c in items), default=0),
+                )
+                for kind, items in connections.items()
+            ),
+        )
+        exposition.add(
+            "router_outbound_dropped_total",
+            "counter",
+            "Messages dropped by full outbound queues by connection kind.",
+            (
+                (
+                    {"kind": kind.value},
+                    metrics.dropped[kind.value]
+                    + sum(c.outbound.dropped for c in items),
+                )
+                for kind, items in connections.items()
+            ),
+        )
+        exposition.add(
+            "router_disconnects_total",
+            "counter",
+            "Closed connections by connection kind and reason.",
+            (
+                ({"kind": kind, "reason": reason}, n)
+                for (kind, reason), n in metrics.disconnects.items()
+            ),
+        )
+        exposition.add(
+            "router_rejected_frames_total",
+            "counter",
+            "Frames rejected by rate limits and concurrency caps.",
+            (({"reason": r}, n) for r, n in metrics.rejections.items()),
+        )
+        exposition.add(
+            "router_agent_token_cache_lookups_total",
+            "counter",
+            "Agent token verifications by cache result.",
+            (
+                ({"result": "hit"}, self.token_verifier.hits),
+                ({"result": "miss"}, self.token_verifier.misses),
+            ),
+        )
+
+        agent_stats = self.inflight.stats.items()
+        exposition.add(
+            "router_invocations_in_flight",
+            "gauge",
+            "Invocations awaiting a response by agent.",
+            (({"agent": agent}, stats.in_flight) for agent, stats in agent_stats),
+        )
+        for attribute, help_text in (
+            ("completed", "answered"),
+            ("failed", "failed"),
+            ("timed_out", "timed out"),
+        ):
+            exposition.add(
+                f"router_invocations_{attribute}_total",
+                "counter",
+                f"Invocations {help_text} by agent.",
+                (
+                    ({"agent": agent}, getattr(stats, attribute))
+                    for agent, stats in agent_stats
+                ),
+            )
+        exposition.add_histogram(
+            "router_invocation_duration_seconds",
+            "Time from forwarding an invocation to its response by agent.",
+            (({"agent": agent}, stats.latency) for agent, stats in agent_stats),
+        )
+        return exposition.render()
 
     async def process_message(
-        self, client_id: str, message: str, agent_jwt: str
+        self, connection_id: str, message: str | bytes, agent_jwt: str
     ) -> None:
         """
         Processes incoming messages from clients and routes them based on message type.
 
         Args:
-            client_id (str): The ID of the client sending the message.
-            message (str): The message content as a JSON string.
+            connection_id (str): The ID of the connection the message came from.
+            message (str | bytes): The message content as a JSON string or a binary
+                frame.
+            agent_jwt (str): JWT the client connected with, if any.
         """
+        client_id = connection_id
+        if connection := self.routing_table.get(connection_id):
+            connection.record_inbound(len(message))
+            client_id = connection.client_id
+
         try:
-            data = json.loads(message)
-            logging.debug(f"Received message: {data}")
-        except json.JSONDecodeError:
+            envelope = Envelope.parse(message, codec=self.codec)
+            logging.debug(
+                "Received message: %s, from: %s",
+                Truncated(message, app_settings.LOG_PAYLOAD_MAX_LENGTH),
+                client_id,
+            )
+        except CodecError:
+            self.metrics.record_received("invalid", len(message))
             await self.send_message(
-                client_id=client_id,
+                client_id=connection_id,
                 message={
                     "error": {
                         "error_message": "Invalid JSON format",
@@ -53,15 +333,33 @@ class WSConnectionManager:
                 },
             )
         else:
-            message_type = data.pop("message_type", None)
-            agent_uuid = data.pop("agent_uuid", None)
-            payload = data.get("request_payload")
+            message_type = envelope.message_type
+            agent_uuid = envelope.agent_uuid
+            is_known = (
+                isinstance(message_type, str) and message_type in METRIC_MESSAGE_TYPES
+            )
+            self.metrics.record_received(
+                message_type if is_known else "unknown", len(message)
+            )
+
+            if not isinstance(message_type, str):
+                await self._reply_unexpected(connection_id, envelope)
+                return
+
+            if not await self._admit(connection, connection_id, message_type):
+                return
 
             if message_type == WSMessageType.AGENT_REGISTER.value:
                 if client_id not in self.MASTER_SERVERS_API_KEY_MAPPING.values():
+                    if await self.is_connected(
+                        MasterServerName.MASTER_SERVER_BE.value
+                    ) and self._is_registered(client_id, envelope):
+                        logging.debug("Agent %s is already registered", client_id)
+                        return
+
                     request_payload = {
                         "request_payload": {
-                            **payload,
+                            **envelope.request_payload,
                             "agent_uuid": client_id,
                             "agent_jwt": agent_jwt,
                             "message_type": message_type,
@@ -78,17 +376,20 @@ class WSConnectionManager:
                 WSMessageType.AGENT_RESPONSE.value,
                 WSMessageType.AGENT_ERROR.value,
             ):
-                invoked_by = data.pop("invoked_by", None)
-                data["message_type"] = message_type
-                logging.info(
-                    f"Got response: {data}, from: {client_id}, invoked_by: {invoked_by}"
+                logging.debug(
+                    "Got %s from: %s, invoked_by: %s",
+                    message_type,
+                    client_id,
+                    envelope.invoked_by,
                 )
-                await self.send_message(invoked_by, data)
+                if connection is not None:
+                    self._discard_pending(connection, envelope.invoked_by)
+                await self._route_response(envelope)
 
             elif message_type == WSMessageType.AGENT_INVOKE.value:
-                if not payload and not agent_uuid:
+                if not agent_uuid and not envelope.request_payload:
                     await self.send_message(
-                        client_id=client_id,
+                        client_id=connection_id,
                         message={
                             "error": {
                                 "error_message": "Missing request payload or agent UUID",
@@ -97,9 +398,9 @@ class WSConnectionManager:
                         },
                     )
 
-                if agent_uuid not in self.active_connections:
+                elif not await self.is_connected(agent_uuid):
                     await self.send_message(
-                        client_id=client_id,
+                        client_id=connection_id,
                         message={
                             "message_type": WSMessageType.AGENT_ERROR.value,
                             "error": {
@@ -109,12 +410,12 @@ class WSConnectionManager:
                         },
                     )
 
-                if (
+                elif (
                     agent_uuid == MasterServerName.MASTER_SERVER_ML.value
                     and not client_id.startswith(app_settings.MASTER_BE_API_KEY)
                 ):
                     await self.send_message(
-                        client_id=client_id,
+                        client_id=connection_id,
                         message={
                             "error": {
                                 "error_message": "Agent is NOT active",
@@ -123,120 +424,795 @@ class WSConnectionManager:
                         },
                     )
                 else:
-                    if (
-                        client_id.startswith(app_settings.MASTER_BE_API_KEY)
-                        and "error_message" in payload
-                    ):
+                    payload = (
+                        envelope.request_payload
+                        if client_id.startswith(app_settings.MASTER_BE_API_KEY)
+                        else None
+                    )
+                    if payload and "error_message" in payload:
                         payload["message_type"] = WSMessageType.AGENT_ERROR.value
                         payload = {"error": payload}
                         await self.send_message(agent_uuid, payload)
+                    elif not await self._admit_invoke(connection_id, agent_uuid):
+                        return
                     else:
-                        data["invoked_by"] = client_id
-                        await self.send_message(agent_uuid, data)
+                        call = self.inflight.start(
+                            caller_id=connection_id,
+                            target_id=agent_uuid,
+                            timeout=self._requested_timeout(envelope),
+                            traceparent=envelope.traceparent,
+                        )
+                        await self._dispatch_invoke(
+                            agent_uuid,
+                            call.invoked_by,
+                            self._stamp_invoked_by(envelope, call),
+                            call=call,
+                        )
 
-            elif message_type == WSMessageType.AGENT_LOG.value:
+            elif message_type in (
+                WSMessageType.AGENT_LOG.value,
+                WSMessageType.AGENT_STREAM.value,
+            ):
                 await self.send_message(
                     client_id=MasterServerName.MASTER_SERVER_BE.value,
                     message={
                         "request_payload": {
+                            **envelope.body,
                             "message_type": message_type,
                             "agent_uuid": client_id,
-                            **data,
                         },
                     },
+                    droppable=True,
                 )
 
             else:
-                await self.send_message(
-                    client_id=client_id,
-                    message={
-                        "error": {
-                            "error_message": f"Unexpected exception: {message}",
-                            "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
-                        }
-                    },
+                await self._reply_unexpected(connection_id, envelope)
+
+    async def _reply_unexpected(self, connection_id: str, envelope: Envelope) -> None:
+        """
+        Answers a frame of an unknown or malformed message type.
+
+        Args:
+            connection_id (str): ID of the sending connection.
+            envelope (Envelope): The unexpected message.
+        """
+        # Echo only the header of binary frames, never their body
+        echoed = envelope.body if envelope.is_binary else envelope.raw
+        await self.send_message(
+            client_id=connection_id,
+            message={
+                "error": {
+                    "error_message": f"Unexpected exception: {echoed}",
+                    "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
+                }
+            },
+        )
+
+    async def _admit(
+        self, connection: Optional[Connection], connection_id: str, message_type: str
+    ) -> bool:
+        """
+        Applies the rate limit of the message type to the client the frame is
+        accounted to and rejects the frame when the client has exceeded it.
+
+        Rejected invocations are always answered, rejected logs only on the first
+        frame of a burst so a chatty agent is not flooded with errors.
+
+        Args:
+            connection (Optional[Connection]): The sending connection.
+            connection_id (str): ID of the sending connection.
+            message_type (str): Type of the frame.
+
+        Returns:
+            bool: Whether the frame may be processed.
+        """
+        if (key := self._rate_limit_key(connection)) is None:
+            return True
+        if (bucket := self.rate_limiter.check(key, message_type)) is None:
+            return True
+
+        logging.debug("Rate limited %s from %s", message_type, key)
+        if message_type != WSMessageType.AGENT_LOG.value or bucket.rejected == 1:
+            await self._reject(
+                connection_id,
+                error_message=f"Rate limit of {message_type} exceeded",
+                error_reason=ErrorReason.RATE_LIMITED,
+                retry_after=bucket.retry_after,
+            )
+        return False
+
+    async def _admit_invoke(self, connection_id: str, agent_uuid: str) -> bool:
+        """
+        Caps the number of invocations pending on one agent.
+
+        Args:
+            connection_id (str): ID of the calling connection.
+            agent_uuid (str): The invoked agent.
+
+        Returns:
+            bool: Whether the invocation may be forwarded.
+        """
+        limit = app_settings.MAX_CONCURRENT_INVOCATIONS_PER_AGENT
+        if not limit or self.inflight.count_for(agent_uuid) < limit:
+            return True
+
+        stats = self.inflight.stats.get(agent_uuid)
+        await self._reject(
+            connection_id,
+            error_message=f"Agent is handling {limit} concurrent invocations",
+            error_reason=ErrorReason.AGENT_OVERLOADED,
+            # A slot frees up roughly once a typical call completes
+            retry_after=stats.latency.mean if stats and stats.latency.count else 1.0,
+        )
+        return False
+
+    async def _reject(
+        self,
+        connection_id: str,
+        error_message: str,
+        error_reason: ErrorReason,
+        retry_after: float,
+    ) -> None:
+        self.metrics.rejections[error_reason.value] += 1
+        await self.send_message(
+            client_id=connection_id,
+            message={
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": f"{error_message}, retry after {retry_after:.2f}s",
+                    "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
+                    "error_reason": error_reason.value,
+                    "retry_after": round(retry_after, 3),
+                },
+            },
+        )
+
+    def _rate_limit_key(self, connection: Optional[Connection]) -> Optional[str]:
+        """
+        Returns the client a frame is accounted to, or None if it is not limited.
+
+        Every `session.send` opens a new invoke session, so sessions are accounted
+        to their caller. Master servers are trusted and never limited.
+        """
+        if connection is None or connection.kind == ConnectionKind.MASTER:
+            return None
+        client_id = connection.client_id
+        if connection.kind == ConnectionKind.INVOKE_SESSION and connection.parents:
+            client_id = connection.parents[0]
+        if client_id in self.MASTER_SERVERS_API_KEY_MAPPING.values():
+            return None
+        return client_id
+
+    async def send_message(
+        self, client_id: str, message: str | bytes | dict, droppable: bool = False
+    ):
+        """
+        Queues a message for the specified client if the connection exists.
+        The message is written by the connection's own writer task, so this never
+        waits on a slow consumer.
+
+        Args:
+            client_id (str): The connection or client ID to which the message should be
+                sent. A client with several replicas gets it on one of them.
+            message (str | bytes | dict): The message content, can be a string, a
+                binary frame or a dictionary.
+            droppable (bool): Whether the message may be dropped when the connection
+                is overloaded, e.g. a log. Other messages close an overloaded
+                connection instead.
+        """
+        message = self.codec.dumps(message) if isinstance(message, dict) else message
+        logging.debug(
+            "Sending message: %s, to: %s",
+            Truncated(message, app_settings.LOG_PAYLOAD_MAX_LENGTH),
+            client_id,
+        )
+        if connection := self.routing_table.get(client_id) or self._pick_replica(
+            client_id, include_draining=True
+        ):
+            connection.outbound.put(message, droppable=droppable)
+        else:
+            await self._publish_remote(
+                BusMessage.DELIVER_DROPPABLE if droppable else BusMessage.DELIVER,
+                client_id,
+                message,
+            )
+
+    async def _dispatch_invoke(
+        self,
+        agent_uuid: str,
+        invoked_by: str,
+        message: str | bytes,
+        call: Optional[InFlightCall] = None,
+    ) -> None:
+        """
+        Sends an invocation to one local replica of the agent, to another router node
+        the agent is connected to, or fails it if no replica can take it.
+
+        Args:
+            agent_uuid (str): The invoked agent.
+            invoked_by (str): The routing value stamped into the message.
+            message (str | bytes): The invoke message.
+            call (Optional[InFlightCall]): The call, if it is tracked on this node.
+                Remembers where the invocation went so it can be released there.
+        """
+        if replica := self._pick_replica(agent_uuid):
+            replica.pending.add(invoked_by)
+            if call is not None:
+                call.replica_id = replica.connection_id
+            replica.outbound.put(message, droppable=False)
+        elif agent_uuid not in self.routing_table and (
+            node_id := await self._publish_remote(
+                BusMessage.INVOKE, agent_uuid, message
+            )
+        ):
+            if call is not None:
+                call.target_node = node_id
+        else:
+            await self._fail_invoke(
+                invoked_by,
+                agent_uuid,
+                error_message="Agent is NOT active",
+                error_type=ErrorType.AGENT_NOT_ACTIVE,
+            )
+
+    def _pick_replica(
+        self, client_id: str, include_draining: bool = False
+    ) -> Optional[Connection]:
+        """
+        Selects the connection of a client that should receive the next message.
+
+        Draining replicas are skipped and saturated ones are only used when no other
+        replica is left. Among the rest the configured policy decides, rotating the
+        starting replica so ties are spread evenly.
+
+        Args:
+            client_id (str): The client ID.
+            include_draining (bool): Whether draining replicas can be selected.
+
+        Returns:
+            Optional[Connection]: The selected connection, if any.
+        """
+        replicas = self.routing_table.replicas(client_id)
+        if not include_draining:
+            replicas = [replica for replica in replicas if not replica.draining]
+        if len(replicas) <= 1:
+            return replicas[0] if replicas else None
+
+        replicas = [replica for replica in replicas if replica.is_healthy] or replicas
+        offset = next(self._dispatch_counter) % len(replicas)
+        replicas = replicas[offset:] + replicas[:offset]
+        if app_settings.REPLICA_DISPATCH_POLICY == DispatchPolicy.ROUND_ROBIN:
+            return replicas[0]
+        return min(replicas, key=lambda replica: len(replica.pending))
+
+    async def drain(self, connection_id: str) -> bool:
+        """
+        Stops dispatching invocations to an agent replica and closes it once the
+        invocations it is working on are answered.
+
+        Args:
+            connection_id (str): ID of the replica's connection.
+
+        Returns:
+            bool: Whether the connection is a local agent replica.
+        """
+        connection = self.routing_table.get(connection_id)
+        if connection is None or connection.kind != ConnectionKind.AGENT:
+            return False
+
+        connection.draining = True
+        if not connection.pending:
+            self._close_drained(connection)
+        return True
+
+    def _discard_pending(self, connection: Connection, invoked_by: str) -> None:
+        """
+        Forgets an invocation the replica no longer works on and closes the replica
+        if it was drained and this was its last one.
+        """
+        connection.pending.discard(invoked_by)
+        if connection.draining and not connection.pending:
+            self._close_drained(connection)
+
+    def _release_call(self, call: InFlightCall, answered: bool) -> None:
+        """
+        Releases the replica of a call that ended, whether it was answered, timed
+        out, lost its caller or its target.
+
+        Args:
+            call (InFlightCall): The call that ended.
+            answered (bool): Whether the target responded, in which case the
+                responding replica has already released it.
+        """
+        if call.replica_id is not None:
+            if replica := self.routing_table.get(call.replica_id):
+                self._discard_pending(replica, call.invoked_by)
+        elif call.target_node is not None and not answered:
+            self._spawn(
+                self.bus.publish(
+                    call.target_node,
+                    BusMessage(
+                        op=BusMessage.CANCEL,
+                        client_id=call.target_id,
+                        payload=call.invoked_by,
+                    ),
                 )
+            )
+
+    def _close_drained(self, connection: Connection) -> None:
+        """
+        Closes a drained replica in the background.
+        """
+        logging.info("Replica %s drained, closing it", connection.connection_id)
+        self._spawn(self._close_replica(connection))
+
+    async def _close_replica(self, connection: Connection) -> None:
+        try:
+            await connection.websocket.close(
+                code=WS_CLOSE_CODE_GOING_AWAY, reason="Replica drained"
+            )
+        except Exception as e:
+            logging.debug("Failed to close drained replica: %s", e)
+        # Don't wait for the peer to complete the close handshake
+        await self.disconnect(connection.connection_id, websocket=connection.websocket)
 
-    async def send_message(self, client_id: str, message: str | dict):
+    async def _publish_remote(
+        self, op: str, client_id: str, payload: str | bytes
+    ) -> Optional[str]:
         """
-        Sends a message to the specified client if the connection exists.
+        Forwards a frame to another router node the client is connected to.
 
         Args:
-            client_id (str): The client ID to which the message should be sent.
-            message (str | dict): The message content, can be a string or a dictionary.
+            op (str): The bus operation.
+            client_id (str): The client the frame is addressed to.
+            payload (str | bytes): The raw message.
+
+        Returns:
+            Optional[str]: The node the frame was forwarded to, None if the client is
+                not connected to another node.
         """
-        message = json.dumps(message) if isinstance(message, dict) else message
-        logging.info(f"Sending message: {message}, to: {client_id}")
-        if websocket := self.active_connections.get(client_id):
-            await websocket.send_text(message)
+        if self.bus is None or not client_id:
+            return None
+        node_id = await self.presence.locate(client_id, exclude=self.node_id)
+        if not node_id:
+            return None
+        await self.bus.publish(
+            node_id, BusMessage(op=op, client_id=client_id, payload=payload)
+        )
+        return node_id
 
-    async def connect(self, websocket: WebSocket) -> str:
+    async def _route_response(self, envelope: Envelope) -> None:
         """
-        Accepts a new WebSocket connection and assigns a client ID based on headers.
+        Routes an agent's response or error back to the caller and completes the
+        in-flight call on the node that tracks it, i.e. the caller's node.
+
+        Args:
+            envelope (Envelope): The response message.
+        """
+        caller_id, request_id = split_invoked_by(envelope.invoked_by or "")
+        if caller_id not in self.routing_table and await self._publish_remote(
+            BusMessage.RESPOND, caller_id, envelope.raw
+        ):
+            return
+
+        if request_id is not None:
+            call = self.inflight.complete(
+                request_id,
+                is_success=envelope.message_type == WSMessageType.AGENT_RESPONSE.value,
+            )
+            if call is None:
+                # The caller has already been failed, e.g. by a timeout
+                logging.info(
+                    "Dropping late %s for request %s",
+                    envelope.message_type,
+                    request_id,
+                )
+                return
+
+        # Forwarded as is, the caller ignores the routing fields
+        await self.send_message(caller_id, envelope.raw)
+
+    async def _fail_invoke(
+        self,
+        invoked_by: str,
+        agent_uuid: str,
+        error_message: str,
+        error_type: ErrorType,
+        error_reason: Optional[ErrorReason] = None,
+    ) -> None:
+        """
+        Answers an invocation with an error on behalf of the agent, routed and
+        accounted like a regular agent error.
+
+        Args:
+            invoked_by (str): The routing value of the failed invocation.
+            agent_uuid (str): The invoked agent.
+            error_message (str): Message for the caller.
+            error_type (ErrorType): Type of the error.
+            error_reason (Optional[ErrorReason]): Router-specific cause of the error.
+        """
+        message_type = WSMessageType.AGENT_ERROR.value
+        error = {
+            "error_message": error_message,
+            "error_type": error_type.value,
+            "agent_uuid": agent_uuid,
+        }
+        if error_reason is not None:
+            error["error_reason"] = error_reason.value
+        raw = self.codec.dumps(
+            {
+                "message_type": message_type,
+                "error": error,
+                "invoked_by": invoked_by,
+            }
+        )
+        await self._route_response(
+            Envelope(
+                raw=raw,
+                codec=self.codec,
+                message_type=message_type,
+                agent_uuid=agent_uuid,
+                invoked_by=invoked_by,
+            )
+        )
+
+    async def connect(
+        self, websocket: WebSocket
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Accepts a new WebSocket connection and registers it in the routing table
+        under a client ID resolved from the headers.
+
+        Master servers are identified by their API key, agents by their JWT and
+        per-call sessions opened via `session.send` by their invoke key. Each invoke
+        session gets an ID unique across the cluster so concurrent calls between the
+        same pair of agents no longer overwrite each other. Agents connecting several
+        times with the same JWT become replicas of one client, each with its own
+        connection ID.
 
         Args:
             websocket (WebSocket): The WebSocket connection instance.
 
         Returns:
-            str: The resolved client ID.
+            tuple[Optional[str], Optional[str]]: The connection ID and the agent JWT.
+
+        Raises:
+            InvalidAgentToken: If the agent JWT is malformed, forged or expired.
         """
         client_id = None
         agent_jwt = None
+        kind = ConnectionKind.AGENT
+        parents = ()
 
         if api_key := websocket.headers.get("api-key"):
             client_id = self.MASTER_SERVERS_API_KEY_MAPPING.get(api_key)
+            kind = ConnectionKind.MASTER
 
         elif agent_jwt := websocket.headers.get("x-custom-authorization"):
-            try:
-                decoded = jwt.decode(
-                    agent_jwt, options={"verify_signature": False}, algorithms=["HS256"]
-                )
-                client_id = decoded.get("sub")
-            except jwt.DecodeError:
-                client_id = agent_jwt
+            identity = self.token_verifier.verify(agent_jwt)
+            # Unless REQUIRE_SIGNED_AGENT_TOKENS is set, values that are not JWTs at
+            # all are used as the agent ID as is
+            client_id = identity.agent_id if identity else agent_jwt
+            if handle := self._pending_unregisters.pop(client_id, None):
+                handle.cancel()
         elif invoke_key := websocket.headers.get("x-custom-invoke-key"):
-            client_id = invoke_key
+            client_id = self._unique_id(invoke_key)
+            kind = ConnectionKind.INVOKE_SESSION
+            parents = self._parse_invoke_key(invoke_key)
 
         await websocket.accept()
-        self.active_connections[client_id] = websocket
-        return client_id, agent_jwt
+        if not client_id:
+            return None, agent_jwt
+
+        connection = Connection(
+            connection_id=(
+                self._unique_id(client_id)
+                if kind == ConnectionKind.AGENT
+                else client_id
+            ),
+            kind=kind,
+            websocket=websocket,
+            parents=parents,
+            client_id=client_id,
+        )
+        connection.outbound = OutboundQueue(
+            websocket=websocket,
+            high_water_mark=app_settings.OUTBOUND_QUEUE_HIGH_WATER_MARK,
+            overflow_policy=(
+                app_settings.MASTER_OUTBOUND_QUEUE_OVERFLOW_POLICY
+                if kind == ConnectionKind.MASTER
+                else app_settings.OUTBOUND_QUEUE_OVERFLOW_POLICY
+            ),
+            send_timeout=app_settings.OUTBOUND_SEND_TIMEOUT_SECONDS,
+            on_sent=functools.partial(self._record_sent, connection),
+        )
+        connection.outbound.start()
 
-    async def disconnect(self, client_id: str):
+        if previous := self.routing_table.add(connection):
+            previous.outbound.stop()
+            self._record_disconnect(previous, DisconnectReason.REPLACED)
+        if self.presence is not None:
+            for routing_id in {client_id, connection.connection_id}:
+                await self.presence.register(routing_id, self.node_id)
+        return connection.connection_id, agent_jwt
+
+    async def disconnect(
+        self, connection_id: str, websocket: Optional[WebSocket] = None
+    ):
         """
         Disconnects a client and notifies relevant parties about the unregistration.
 
+        While other replicas of an agent stay connected, to this or any other router
+        node, the agent remains registered and only the invocations the disconnected
+        replica was working on fail.
+
         Args:
-            client_id (str): The ID of the client to disconnect.
+            connection_id (str): The ID of the connection to disconnect.
+            websocket (Optional[WebSocket]): The socket that was closed. Used to ignore
+                late disconnects of sockets that have already been replaced.
         """
-        if client_id not in self.active_connections:
+        connection = self.routing_table.remove(connection_id, websocket=websocket)
+        if connection is None:
             return
+        connection.outbound.stop()
+        self._record_disconnect(
+            connection,
+            connection.outbound.close_reason
+            or (
+                DisconnectReason.DRAINED
+                if connection.draining
+                else DisconnectReason.CLIENT_CLOSED
+            ),
+        )
+        self.inflight.drop_caller(connection_id)
 
-        del self.active_connections[client_id]
+        client_id = connection.client_id
+        if self.presence is not None:
+            if connection_id != client_id:
+                await self.presence.unregister(connection_id, self.node_id)
+            if client_id not in self.routing_table:
+                await self.presence.unregister(client_id, self.node_id)
 
-        if not client_id.startswith(
-            app_settings.MASTER_BE_API_KEY
-        ):  # Ignore sockets from Master BE
-            await self.send_message(
-                client_id=MasterServerName.MASTER_SERVER_BE.value,
-                message={
-                    "request_payload": {
-                        "agent_uuid": client_id,
-                        "message_type": WSMessageType.AGENT_UNREGISTER.value,
-                    }
+        if client_id not in self.routing_table:
+            self.rate_limiter.forget(client_id)
+            self._registrations.pop(client_id, None)
+
+        if await self.is_connected(client_id):
+            # Replicas on this or other nodes keep serving the client
+            for invoked_by in connection.pending:
+                await self._fail_invoke(
+                    invoked_by,
+                    client_id,
+                    error_message="Agent replica has disconnected",
+                    error_type=ErrorType.AGENT_GENERAL_ERROR,
+                    error_reason=ErrorReason.AGENT_REPLICA_DISCONNECTED,
+                )
+            return
+
+        if client_id == MasterServerName.MASTER_SERVER_BE.value:
+            # The backend may come back without the registrations forwarded so far
+            self._registrations.clear()
+        if connection.kind == ConnectionKind.AGENT:
+            if grace := app_settings.AGENT_UNREGISTER_GRACE_SECONDS:
+                # Agents reconnecting within the grace period stay registered
+                self._pending_unregisters[
+                    client_id
+                ] = asyncio.get_running_loop().call_later(
+                    grace,
+                    lambda: self._spawn(self._unregister_agent(client_id)),
+                )
+            else:
+                await self._unregister_agent(client_id)
+
+        await self._fail_dependent_sessions(client_id)
+        if self.bus is not None:
+            await self.bus.broadcast(
+                BusMessage(
+                    op=BusMessage.DISCONNECT, client_id=client_id, payload=self.node_id
+                )
+            )
+
+    async def _unregister_agent(self, client_id: str) -> None:
+        """
+        Marks an agent that is no longer connected as inactive in the backend.
+
+        Args:
+            client_id (str): ID of the agent.
+        """
+        self._pending_unregisters.pop(client_id, None)
+        if await self.is_connected(client_id):
+            return
+
+        self._registrations.pop(client_id, None)
+        await self.send_message(
+            client_id=MasterServerName.MASTER_SERVER_BE.value,
+            message={
+                "request_payload": {
+                    "agent_uuid": client_id,
+                    "message_type": WSMessageType.AGENT_UNREGISTER.value,
+                }
+            },
+        )
+
+    def _is_registered(self, client_id: str, envelope: Envelope) -> bool:
+        """
+        Checks whether another replica of the agent that is still connected has
+        already registered this exact registration, and remembers it otherwise.
+
+        Registrations are forgotten once the last local replica disconnects and
+        whenever the backend disconnects, so they are never suppressed on the
+        strength of state the backend may have lost.
+
+        Args:
+            client_id (str): ID of the agent.
+            envelope (Envelope): The registration message.
+
+        Returns:
+            bool: Whether forwarding the registration can be skipped.
+        """
+        raw = envelope.raw.encode() if isinstance(envelope.raw, str) else envelope.raw
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+
+        previous = self._registrations.get(client_id)
+        self._registrations[client_id] = digest
+        return previous == digest and len(self.routing_table.replicas(client_id)) > 1
+
+    def _record_sent(self, connection: Connection, size: int, duration: float) -> None:
+        connection.record_outbound(size)
+        self.metrics.record_sent(connection.kind.value, size, duration)
+
+    def _record_disconnect(
+        self, connection: Connection, reason: DisconnectReason
+    ) -> None:
+        kind = connection.kind.value
+        self.metrics.disconnects[(kind, reason.value)] += 1
+        self.metrics.dropped[kind] += connection.outbound.dropped
+
+    def _spawn(self, coroutine: Coroutine) -> asyncio.Task:
+        """
+        Runs a coroutine in the background, keeping a reference until it finishes.
+        """
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _fail_dependent_sessions(self, client_id: str) -> None:
+        """
+        Fails calls pending on a client that is gone and notifies local invoke
+        sessions that depend on it.
+
+        Args:
+            client_id (str): ID of the disconnected client.
+        """
+        message = {
+            "message_type": WSMessageType.AGENT_ERROR.value,
+            "error": {
+                "error_message": "Agent has been unregistered",
+                "agent_uuid": client_id,
+            },
+        }
+        notified = set()
+        for call in self.inflight.fail_target(client_id):
+            notified.add(call.caller_id)
+            await self.send_message(client_id=call.caller_id, message=message)
+
+        # Clean up all connections created via session.send
+        for child in self.routing_table.children_of(client_id):
+            if child.connection_id not in notified:
+                await self.send_message(client_id=child.connection_id, message=message)
+
+    async def _fail_timed_out_call(self, call: InFlightCall) -> None:
+        """
+        Notifies the caller that the invoked agent missed the deadline.
+
+        Args:
+            call (InFlightCall): The expired call.
+        """
+        await self.send_message(
+            client_id=call.caller_id,
+            message={
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": f"Agent did not respond within {call.timeout}s",
+                    "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
+                    "error_reason": ErrorReason.AGENT_TIMEOUT.value,
+                    "agent_uuid": call.target_id,
                 },
+            },
+        )
+
+    async def _handle_bus_message(self, message: BusMessage) -> None:
+        """
+        Handles a frame received from another router node.
+
+        Args:
+            message (BusMessage): The received frame.
+        """
+        if message.op in (BusMessage.DELIVER, BusMessage.DELIVER_DROPPABLE):
+            if connection := self.routing_table.get(message.client_id):
+                connection.outbound.put(
+                    message.payload,
+                    droppable=message.op == BusMessage.DELIVER_DROPPABLE,
+                )
+        elif message.op == BusMessage.RESPOND:
+            if message.client_id in self.routing_table:
+                await self._route_response(
+                    Envelope.parse(message.payload, codec=self.codec)
+                )
+        elif message.op == BusMessage.INVOKE:
+            envelope = Envelope.parse(message.payload, codec=self.codec)
+            await self._dispatch_invoke(
+                message.client_id, envelope.invoked_by, message.payload
             )
+        elif message.op == BusMessage.CANCEL:
+            for replica in self.routing_table.replicas(message.client_id):
+                self._discard_pending(replica, message.payload)
+        elif message.op == BusMessage.DISCONNECT and message.payload != self.node_id:
+            if not await self.is_connected(message.client_id):
+                if message.client_id == MasterServerName.MASTER_SERVER_BE.value:
+                    self._registrations.clear()
+                await self._fail_dependent_sessions(message.client_id)
 
-        for connection_id in (
-            self.active_connections
-        ):  # Clean up all connections created via session.send
-            if client_id in connection_id:
-                await self.send_message(
-                    client_id=connection_id,
-                    message={
-                        "message_type": WSMessageType.AGENT_ERROR.value,
-                        "error": {
-                            "error_message": "Agent has been unregistered",
-                            "agent_uuid": client_id,
-                        },
-                    },
+    async def _refresh_presence(self) -> None:
+        """
+        Periodically extends the presence entries of local clients.
+        """
+        interval = max(app_settings.PRESENCE_TTL_SECONDS / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.presence.refresh(
+                    self.routing_table.routing_ids(), self.node_id
                 )
+            except Exception:
+                logging.exception("Failed to refresh router presence")
+
+    @staticmethod
+    def _stamp_invoked_by(envelope: Envelope, call: InFlightCall) -> str | bytes:
+        """
+        Adds the caller and request IDs to an invoke message so the response can be
+        routed back and correlated with the in-flight call. A caller-provided value
+        is never trusted and gets replaced.
+
+        Args:
+            envelope (Envelope): The invoke message.
+            call (InFlightCall): The call the message starts.
+
+        Returns:
+            str | bytes: The message to forward to the invoked agent.
+        """
+        return envelope.with_field("invoked_by", call.invoked_by)
+
+    def _unique_id(self, prefix: str) -> str:
+        """
+        Returns a connection ID unique across the cluster.
+        """
+        return f"{prefix}#{self.node_id}.{next(self._connection_counter)}"
+
+    @staticmethod
+    def _requested_timeout(envelope: Envelope) -> Optional[float]:
+        """
+        Returns the per-call deadline requested by the caller, if it is valid.
+        """
+        timeout = envelope.timeout
+        if isinstance(timeout, (int, float)) and not isinstance(timeout, bool):
+            return timeout if timeout > 0 else None
+        return None
+
+    def _parse_invoke_key(self, invoke_key: str) -> tuple[str, ...]:
+        """
+        Resolves parents of an invoke session from its key.
+
+        The key has the `<caller_id>:<target_id>` format, where the caller of master
+        servers is their raw API key.
+
+        Args:
+            invoke_key (str): Value of the `x-custom-invoke-key` header.
+
+        Returns:
+            tuple[str, ...]: Client IDs of the caller and the invoked agent.
+        """
+        caller_id, _, target_id = invoke_key.rpartition(":")
+        caller_id = self.MASTER_SERVERS_API_KEY_MAPPING.get(caller_id, caller_id)
+        return tuple(dict.fromkeys(p for p in (caller_id, target_id) if p))
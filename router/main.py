@@ -1,8 +1,56 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import PlainTextResponse
 
 from connectors.ws_connector_manager import WSConnectionManager
-from utils.pydantic_models import Message, MessageResponse
+from settings import get_settings
+from utils.agent_tokens import InvalidAgentToken
+from utils.enums import ConnectionKind
+from utils.pydantic_models import (
+    AgentCallStats,
+    ConnectionInfo,
+    ConnectionsResponse,
+    InFlightResponse,
+    Message,
+    MessageResponse,
+)
+from utils.telemetry import setup_tracing, shutdown_tracing
+
+# Manages WebSocket connections and routes messages
+ws_connection_manager = WSConnectionManager()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Joins the router cluster and starts span export on startup, leaves the
+    cluster and flushes pending spans on shutdown.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+    """
+    app_settings = get_settings()
+    setup_tracing(
+        exporter=app_settings.TRACING_EXPORTER,
+        otlp_endpoint=app_settings.TRACING_OTLP_ENDPOINT,
+        file_path=app_settings.TRACING_FILE_PATH,
+    )
+    await ws_connection_manager.start()
+    yield
+    await ws_connection_manager.stop()
+    shutdown_tracing()
+
 
 app = FastAPI(
     title="Agent WebSocket API",
@@ -10,11 +58,9 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
-# Manages WebSocket connections and routes messages
-ws_connection_manager = WSConnectionManager()
-
 
 @app.websocket(path="/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -22,27 +68,39 @@ async def websocket_endpoint(websocket: WebSocket):
     WebSocket endpoint for agent connections.
 
     Handles connecting, receiving, and processing WebSocket messages from clients (agents),
-    and ensures cleanup on disconnect.
+    and ensures cleanup on disconnect. Text frames carry JSON messages, binary frames a
+    JSON header followed by a raw body.
 
     Args:
         websocket (WebSocket): The incoming WebSocket connection.
     """
-    client_id, agent_jwt = await ws_connection_manager.connect(websocket)
+    try:
+        connection_id, agent_jwt = await ws_connection_manager.connect(websocket)
+    except InvalidAgentToken as e:
+        await websocket.close(code=4001, reason=str(e))
+        return
 
-    if not client_id:
+    if not connection_id:
         # Reject connection if no valid authorization header
         await websocket.close(code=4000, reason="Missing Authorization header")
     else:
         try:
-            # Continuously listen for messages
+            # Continuously listen for text and binary messages
             while True:
-                data = await websocket.receive_text()
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                data = message.get("text")
+                if data is None:
+                    data = message.get("bytes")
                 await ws_connection_manager.process_message(
-                    client_id, data, agent_jwt=agent_jwt
+                    connection_id, data, agent_jwt=agent_jwt
                 )
         except WebSocketDisconnect:
-            # Handle client disconnection
-            await ws_connection_manager.disconnect(client_id)
+            pass
+        finally:
+            # Unregister the client however the receive loop ended
+            await ws_connection_manager.disconnect(connection_id, websocket=websocket)
 
 
 @app.post(
@@ -55,6 +113,83 @@ async def invoke_agent(message: Message) -> MessageResponse:
     return MessageResponse(detail=f"Message sent to client {message.client_id}")
 
 
+async def verify_master_api_key(
+    api_key: Optional[str] = Header(None, alias="api-key"),
+) -> None:
+    """
+    Allows only master servers to access admin endpoints.
+
+    Args:
+        api_key (Optional[str]): API key passed in the `api-key` header.
+    """
+    if api_key not in WSConnectionManager.MASTER_SERVERS_API_KEY_MAPPING:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
+        )
+
+
+@app.get(
+    path="/admin/connections",
+    response_model=ConnectionsResponse,
+    summary="List active WebSocket connections",
+    dependencies=[Depends(verify_master_api_key)],
+)
+async def list_connections(
+    kind: Optional[ConnectionKind] = None,
+) -> ConnectionsResponse:
+    routing_table = ws_connection_manager.routing_table
+    connections = routing_table.by_kind(kind) if kind else list(routing_table)
+    return ConnectionsResponse(
+        counts=routing_table.count_by_kind(),
+        connections=[
+            ConnectionInfo(**connection.to_dict()) for connection in connections
+        ],
+    )
+
+
+@app.post(
+    path="/admin/connections/{connection_id}/drain",
+    response_model=MessageResponse,
+    summary="Drain an agent replica",
+    dependencies=[Depends(verify_master_api_key)],
+)
+async def drain_connection(connection_id: str) -> MessageResponse:
+    if not await ws_connection_manager.drain(connection_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Agent replica not found"
+        )
+    return MessageResponse(detail=f"Draining replica {connection_id}")
+
+
+@app.get(
+    path="/admin/inflight",
+    response_model=InFlightResponse,
+    summary="Show in-flight invocations and call latency per agent",
+    dependencies=[Depends(verify_master_api_key)],
+)
+async def list_inflight() -> InFlightResponse:
+    inflight = ws_connection_manager.inflight
+    return InFlightResponse(
+        in_flight=len(inflight),
+        agents={
+            agent_uuid: AgentCallStats(**stats.to_dict())
+            for agent_uuid, stats in inflight.stats.items()
+        },
+    )
+
+
+@app.get(
+    path="/metrics",
+    response_class=PlainTextResponse,
+    summary="Export router metrics for Prometheus",
+)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        ws_connection_manager.render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 if __name__ == "__main__":
     # Run the FastAPI app using Uvicorn on port 8080 with auto-reload
     uvicorn.run("main:app", port=8080, reload=True)
@@ -1,8 +1,11 @@
+import socket
 from functools import lru_cache
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from utils.enums import DispatchPolicy, OverflowPolicy
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -20,6 +23,99 @@ class Settings(BaseSettings):
         alias="MASTER_BE_API_KEY",
     )
 
+    # Agent JWT verification, must match the backend
+    SECRET_KEY: str = Field(
+        default="c41302ce0f1758f4ae5dcc65729fd50a", alias="SECRET_KEY"
+    )
+    HASH_ALGORITHM: str = Field(default="HS256", alias="HASH_ALGORITHM")
+    AGENT_TOKEN_CACHE_SIZE: int = Field(default=10000, alias="AGENT_TOKEN_CACHE_SIZE")
+    AGENT_TOKEN_CACHE_TTL_SECONDS: float = Field(
+        default=3600.0, alias="AGENT_TOKEN_CACHE_TTL_SECONDS"
+    )
+    # Rejects legacy agents authenticating with a plain agent ID instead of a signed
+    # token, without it anyone who can reach the router can connect as any agent
+    REQUIRE_SIGNED_AGENT_TOKENS: bool = Field(
+        default=False, alias="REQUIRE_SIGNED_AGENT_TOKENS"
+    )
+    # An agent reconnecting within the grace period is never unregistered
+    AGENT_UNREGISTER_GRACE_SECONDS: float = Field(
+        default=0.0, alias="AGENT_UNREGISTER_GRACE_SECONDS"
+    )
+
+    # Multi-node mode: `none` runs a single router, `memory` is meant for tests,
+    # `redis` shares presence and forwards frames between replicas
+    MESSAGE_BUS_BACKEND: str = Field(default="none", alias="MESSAGE_BUS_BACKEND")
+    ROUTER_NODE_ID: str = Field(
+        default_factory=socket.gethostname, alias="ROUTER_NODE_ID"
+    )
+    ROUTER_REDIS_URL: str = Field(
+        default="redis://genai-redis:6379/1", alias="ROUTER_REDIS_URL"
+    )
+    CLUSTER_KEY_PREFIX: str = Field(default="genai-router", alias="CLUSTER_KEY_PREFIX")
+    PRESENCE_TTL_SECONDS: int = Field(default=30, alias="PRESENCE_TTL_SECONDS")
+
+    # `auto` picks the fastest installed codec: msgspec, orjson, then stdlib json
+    JSON_CODEC: str = Field(default="auto", alias="JSON_CODEC")
+    LOG_PAYLOAD_MAX_LENGTH: int = Field(default=512, alias="LOG_PAYLOAD_MAX_LENGTH")
+
+    # Outbound backpressure, applied to every connection separately. Agents and
+    # their invoke sessions are closed when they cannot keep up, the sockets of
+    # master servers carry the traffic of all users and shed old logs and streamed
+    # chunks first. Drop policies never drop invocations, responses or registrations,
+    # a connection that has no room left for one is closed
+    OUTBOUND_QUEUE_HIGH_WATER_MARK: int = Field(
+        default=1000, alias="OUTBOUND_QUEUE_HIGH_WATER_MARK"
+    )
+    OUTBOUND_QUEUE_OVERFLOW_POLICY: OverflowPolicy = Field(
+        default=OverflowPolicy.CLOSE, alias="OUTBOUND_QUEUE_OVERFLOW_POLICY"
+    )
+    MASTER_OUTBOUND_QUEUE_OVERFLOW_POLICY: OverflowPolicy = Field(
+        default=OverflowPolicy.DROP_OLDEST,
+        alias="MASTER_OUTBOUND_QUEUE_OVERFLOW_POLICY",
+    )
+    OUTBOUND_SEND_TIMEOUT_SECONDS: float = Field(
+        default=30.0, alias="OUTBOUND_SEND_TIMEOUT_SECONDS"
+    )
+
+    # Deadline of invocations forwarded by the router, 0 disables it. Callers can
+    # override it per call with a top-level `timeout` field. Runs of the Master
+    # Agent, e.g. long multi-step flows, have their own deadline
+    ROUTER_INVOKE_TIMEOUT_SECONDS: float = Field(
+        default=600.0, alias="ROUTER_INVOKE_TIMEOUT_SECONDS"
+    )
+    MASTER_AGENT_INVOKE_TIMEOUT_SECONDS: float = Field(
+        default=0.0, alias="MASTER_AGENT_INVOKE_TIMEOUT_SECONDS"
+    )
+
+    # How invocations are spread over replicas connected with the same agent token
+    REPLICA_DISPATCH_POLICY: DispatchPolicy = Field(
+        default=DispatchPolicy.LEAST_IN_FLIGHT, alias="REPLICA_DISPATCH_POLICY"
+    )
+
+    # Token buckets per client and message type, a rate of 0 disables the limit.
+    # Master servers are never limited, invoke sessions count against their caller
+    RATE_LIMIT_INVOKES_PER_SECOND: float = Field(
+        default=20.0, alias="RATE_LIMIT_INVOKES_PER_SECOND"
+    )
+    RATE_LIMIT_INVOKES_BURST: int = Field(default=100, alias="RATE_LIMIT_INVOKES_BURST")
+    RATE_LIMIT_LOGS_PER_SECOND: float = Field(
+        default=50.0, alias="RATE_LIMIT_LOGS_PER_SECOND"
+    )
+    RATE_LIMIT_LOGS_BURST: int = Field(default=200, alias="RATE_LIMIT_LOGS_BURST")
+    # Invocations of one agent pending on this router node, 0 is unlimited
+    MAX_CONCURRENT_INVOCATIONS_PER_AGENT: int = Field(
+        default=0, alias="MAX_CONCURRENT_INVOCATIONS_PER_AGENT"
+    )
+
+    # Spans of forwarded invocations: `none`, `otlp`, `file` or `console`
+    TRACING_EXPORTER: str = Field(default="none", alias="TRACING_EXPORTER")
+    TRACING_OTLP_ENDPOINT: str = Field(
+        default="http://otel-collector:4318/v1/traces", alias="TRACING_OTLP_ENDPOINT"
+    )
+    TRACING_FILE_PATH: str = Field(
+        default="router-traces.jsonl", alias="TRACING_FILE_PATH"
+    )
+
 
 @lru_cache
 def get_settings() -> Settings:
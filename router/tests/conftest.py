@@ -0,0 +1,51 @@
+from typing import AsyncIterator, Callable
+
+import jwt
+import pytest
+import pytest_asyncio
+
+from connectors.bus import InMemoryBroker, InMemoryMessageBus
+from connectors.presence import InMemoryPresenceRegistry
+from connectors.ws_connector_manager import WSConnectionManager
+from settings import get_settings
+
+app_settings = get_settings()
+
+
+@pytest.fixture
+def agent_token() -> Callable[[str], str]:
+    def sign(agent_id: str) -> str:
+        return jwt.encode(
+            {"sub": agent_id},
+            key=app_settings.SECRET_KEY,
+            algorithm=app_settings.HASH_ALGORITHM,
+        )
+
+    return sign
+
+
+@pytest.fixture
+def manager() -> WSConnectionManager:
+    return WSConnectionManager()
+
+
+@pytest_asyncio.fixture
+async def cluster() -> AsyncIterator[list[WSConnectionManager]]:
+    """
+    Two router nodes sharing an in-memory message bus and presence registry.
+    """
+    broker = InMemoryBroker()
+    entries: dict = {}
+    nodes = [
+        WSConnectionManager(
+            bus=InMemoryMessageBus(broker),
+            presence=InMemoryPresenceRegistry(entries),
+            node_id=node_id,
+        )
+        for node_id in ("node-a", "node-b")
+    ]
+    for node in nodes:
+        await node.start()
+    yield nodes
+    for node in nodes:
+        await node.stop()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from typing import Optional
+
+from starlette.websockets import WebSocketState
+
+from connectors.ws_connector_manager import WSConnectionManager
+
+
+class FakeWebSocket:
+    """
+    In-memory stand-in for a Starlette WebSocket, records everything sent to it.
+    """
+
+    def __init__(self, headers: Optional[dict[str, str]] = None):
+        self.headers = headers or {}
+        self.sent: list[str | bytes] = []
+        self.accepted = False
+        self.close_code: Optional[int] = None
+        self.application_state = WebSocketState.CONNECTED
+
+    async def accept(self) -> None:
+        self.accepted = True
+
+    async def send_text(self, message: str) -> None:
+        self.sent.append(message)
+
+    async def send_bytes(self, message: bytes) -> None:
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None) -> None:
+        self.close_code = code
+        self.application_state = WebSocketState.DISCONNECTED
+
+    def messages(self) -> list[dict]:
+        return [json.loads(message) for message in self.sent]
+
+
+async def flush() -> None:
+    """
+    Lets the writer tasks of outbound queues and other background tasks run.
+    """
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def connect(
+    manager: WSConnectionManager, headers: dict[str, str]
+) -> tuple[str, FakeWebSocket]:
+    websocket = FakeWebSocket(headers)
+    connection_id, _ = await manager.connect(websocket)
+    return connection_id, websocket
+
+
+def invoke_message(agent_uuid: str, **fields) -> str:
+    return json.dumps(
+        {
+            "message_type": "agent_invoke",
+            "agent_uuid": agent_uuid,
+            "request_payload": {"question": "ping"},
+            **fields,
+        }
+    )
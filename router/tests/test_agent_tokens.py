@@ -0,0 +1,86 @@
+import time
+
+import jwt
+import pytest
+
+from utils.agent_tokens import AgentIdentity, AgentTokenVerifier, InvalidAgentToken
+
+SECRET_KEY = "c41302ce0f1758f4ae5dcc65729fd50a"
+
+
+def make_verifier(**kwargs) -> AgentTokenVerifier:
+    options = {"max_size": 2, "ttl_seconds": 60.0} | kwargs
+    return AgentTokenVerifier(secret_key=SECRET_KEY, algorithm="HS256", **options)
+
+
+def sign(payload: dict, key: str = SECRET_KEY) -> str:
+    return jwt.encode(payload, key=key, algorithm="HS256")
+
+
+def test_valid_token_resolves_the_identity():
+    verifier = make_verifier()
+
+    identity = verifier.verify(sign({"sub": "agent-1", "user_id": "user-1"}))
+
+    assert identity == AgentIdentity(agent_id="agent-1", user_id="user-1")
+
+
+@pytest.mark.parametrize(
+    "token, error",
+    [
+        ("agent-1", "not a JWT"),
+        (sign({"sub": "agent-1"}, key="f0rged0f1758f4ae5dcc65729fd50a00"), "signature"),
+        (sign({"sub": "agent-1", "exp": time.time() - 10}), "expired"),
+        (sign({"user_id": "user-1"}), "no subject"),
+    ],
+)
+def test_invalid_tokens_are_rejected(token, error):
+    with pytest.raises(InvalidAgentToken, match=error):
+        make_verifier(allow_opaque=False).verify(token)
+
+
+def test_opaque_agent_ids_are_accepted_unless_tokens_are_required():
+    verifier = make_verifier()
+
+    assert verifier.verify("agent-1") is None
+    with pytest.raises(InvalidAgentToken):
+        verifier.verify(
+            sign({"sub": "agent-1"}, key="f0rged0f1758f4ae5dcc65729fd50a00")
+        )
+
+
+def test_verified_tokens_are_cached():
+    verifier = make_verifier()
+    token = sign({"sub": "agent-1"})
+
+    verifier.verify(token)
+    verifier.verify(token)
+
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+
+def test_cache_evicts_the_least_recently_used_token():
+    verifier = make_verifier()
+    tokens = [sign({"sub": f"agent-{i}"}) for i in range(3)]
+
+    for token in tokens[:2]:
+        verifier.verify(token)
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[2])
+
+    assert len(verifier) == 2
+    verifier.verify(tokens[1])
+    assert verifier.misses == 4
+
+
+def test_cached_tokens_expire_with_the_token(monkeypatch):
+    verifier = make_verifier()
+    token = sign({"sub": "agent-1", "exp": int(time.time()) + 5})
+    verifier.verify(token)
+
+    # Past the token's expiration, well within the cache TTL
+    now = time.monotonic() + 10
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    verifier.verify(token)
+
+    assert (verifier.hits, verifier.misses) == (0, 2)
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from utils.codec import _CODECS, CodecError, get_codec
+from utils.envelope import Envelope, encode_binary_frame
+
+INSTALLED_CODECS = [name for name, codec_cls in _CODECS.items() if codec_cls]
+
+MESSAGE = json.dumps(
+    {
+        "message_type": "agent_invoke",
+        "agent_uuid": "agent-1",
+        "request_payload": {"question": "ping"},
+    }
+)
+
+
+@pytest.fixture(params=INSTALLED_CODECS)
+def codec(request):
+    return get_codec(request.param)
+
+
+def test_auto_picks_an_installed_codec():
+    assert get_codec("auto").name == INSTALLED_CODECS[0]
+
+
+def test_unknown_codecs_are_rejected():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_header_contains_only_routing_fields(codec):
+    assert codec.decode_header(MESSAGE) == {
+        "message_type": "agent_invoke",
+        "agent_uuid": "agent-1",
+    }
+
+
+@pytest.mark.parametrize("raw", ["not json", "[1, 2]", '"text"'])
+def test_malformed_messages_raise_codec_errors(codec, raw):
+    with pytest.raises(CodecError):
+        Envelope.parse(raw, codec=codec)
+
+
+@pytest.mark.parametrize(
+    "header", [{"invoked_by": 5}, {"agent_uuid": ["agent-1"]}, {"traceparent": {}}]
+)
+def test_routing_fields_of_the_wrong_type_raise_codec_errors(codec, header):
+    with pytest.raises(CodecError):
+        Envelope.parse(json.dumps({"message_type": "agent_response", **header}), codec)
+
+
+def test_text_frames_are_decoded_lazily(codec):
+    envelope = Envelope.parse(MESSAGE, codec=codec)
+
+    assert envelope.agent_uuid == "agent-1"
+    assert envelope._body is None
+    assert envelope.request_payload == {"question": "ping"}
+    assert not envelope.is_binary and envelope.data is None
+
+
+def test_new_fields_are_appended_without_reserializing(codec):
+    envelope = Envelope.parse(MESSAGE, codec=codec)
+
+    raw = envelope.with_field("invoked_by", "caller:1")
+
+    assert raw.startswith(MESSAGE[:-1])
+    assert json.loads(raw)["invoked_by"] == "caller:1"
+
+
+def test_existing_fields_are_replaced(codec):
+    envelope = Envelope.parse(
+        json.dumps({"message_type": "agent_invoke", "invoked_by": "forged"}),
+        codec=codec,
+    )
+
+    raw = envelope.with_field("invoked_by", "caller:1")
+
+    assert json.loads(raw) == {"message_type": "agent_invoke", "invoked_by": "caller:1"}
+
+
+def test_null_fields_are_replaced(codec):
+    envelope = Envelope.parse('{"invoked_by": null}', codec=codec)
+
+    raw = envelope.with_field("invoked_by", "caller:1")
+
+    assert json.loads(raw) == {"invoked_by": "caller:1"}
+    assert raw.count("invoked_by") == 1
+
+
+def test_fields_are_added_to_empty_objects(codec):
+    raw = Envelope.parse("{}", codec=codec).with_field("invoked_by", "caller:1")
+
+    assert json.loads(raw) == {"invoked_by": "caller:1"}
+
+
+def test_binary_frames_keep_their_body_as_is(codec):
+    data = b"\x00\xffdocument"
+    frame = encode_binary_frame(MESSAGE.encode(), data)
+
+    envelope = Envelope.parse(frame, codec=codec)
+
+    assert envelope.is_binary
+    assert envelope.agent_uuid == "agent-1"
+    assert bytes(envelope.data) == data
+
+    stamped = Envelope.parse(envelope.with_field("invoked_by", "caller:1"), codec)
+    assert stamped.invoked_by == "caller:1"
+    assert bytes(stamped.data) == data
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [b"\x00\x00", (100).to_bytes(4, "big") + b'{"message_type": "agent_invoke"}'],
+)
+def test_truncated_binary_frames_are_rejected(codec, frame):
+    with pytest.raises(CodecError):
+        Envelope.parse(frame, codec=codec)
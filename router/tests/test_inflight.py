@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from connectors.inflight import InFlightTracker, split_invoked_by
+from fakes import flush
+
+
+def make_tracker(default_timeout=None, **kwargs):
+    timed_out = []
+    ended = []
+
+    async def on_timeout(call):
+        timed_out.append(call)
+
+    tracker = InFlightTracker(
+        default_timeout=default_timeout,
+        on_timeout=on_timeout,
+        on_end=lambda call, answered: ended.append((call.request_id, answered)),
+        **kwargs,
+    )
+    return tracker, timed_out, ended
+
+
+@pytest.mark.parametrize(
+    "invoked_by, parts",
+    [
+        ("caller|1", ("caller", "1")),
+        ("a|b|1", ("a|b", "1")),
+        ("caller", ("caller", None)),
+    ],
+)
+def test_invoked_by_splits_into_caller_and_request(invoked_by, parts):
+    assert split_invoked_by(invoked_by) == parts
+
+
+@pytest.mark.asyncio
+async def test_completed_calls_record_their_outcome():
+    tracker, _, ended = make_tracker()
+    calls = [tracker.start("caller", "agent-1") for _ in range(3)]
+    assert tracker.count_for("agent-1") == 3
+
+    assert tracker.complete(calls[0].request_id) is calls[0]
+    tracker.complete(calls[1].request_id, is_success=False)
+
+    stats = tracker.stats["agent-1"]
+    assert (stats.in_flight, stats.completed, stats.failed) == (1, 1, 1)
+    assert stats.latency.count == 2
+    assert ended == [(calls[0].request_id, True), (calls[1].request_id, True)]
+    assert tracker.complete(calls[0].request_id) is None
+
+
+@pytest.mark.asyncio
+async def test_calls_time_out_at_their_deadline():
+    tracker, timed_out, ended = make_tracker(default_timeout=0.05)
+    call = tracker.start("caller", "agent-1")
+
+    await asyncio.sleep(0.1)
+    await flush()
+
+    assert timed_out == [call]
+    assert ended == [(call.request_id, False)]
+    assert tracker.stats["agent-1"].timed_out == 1
+    assert len(tracker) == 0
+
+
+@pytest.mark.asyncio
+async def test_deadlines_are_resolved_per_call_then_per_target():
+    tracker, _, _ = make_tracker(
+        default_timeout=30, target_timeouts={"master": 0, "slow": 120}
+    )
+
+    assert tracker.start("caller", "agent-1").timeout == 30
+    assert tracker.start("caller", "slow").timeout == 120
+    assert tracker.start("caller", "master").timeout is None
+    assert tracker.start("caller", "agent-1", timeout=5).timeout == 5
+
+
+@pytest.mark.asyncio
+async def test_completed_calls_do_not_time_out():
+    tracker, timed_out, _ = make_tracker(default_timeout=0.05)
+    call = tracker.start("caller", "agent-1")
+
+    tracker.complete(call.request_id)
+    await asyncio.sleep(0.1)
+
+    assert timed_out == []
+
+
+@pytest.mark.asyncio
+async def test_calls_of_a_disconnected_target_fail():
+    tracker, _, ended = make_tracker()
+    calls = [tracker.start("caller", "agent-1") for _ in range(2)]
+    tracker.start("caller", "agent-2")
+
+    failed = tracker.fail_target("agent-1")
+    assert {call.request_id for call in failed} == {call.request_id for call in calls}
+    assert tracker.stats["agent-1"].failed == 2
+    assert tracker.count_for("agent-1") == 0
+    assert len(tracker) == 1
+    assert all(not answered for _, answered in ended)
+
+
+@pytest.mark.asyncio
+async def test_calls_of_a_disconnected_caller_are_dropped():
+    tracker, _, ended = make_tracker()
+    call = tracker.start("caller", "agent-1")
+    tracker.start("other", "agent-1")
+
+    tracker.drop_caller("caller")
+
+    assert ended == [(call.request_id, False)]
+    assert tracker.count_for("agent-1") == 1
+    assert tracker.stats["agent-1"].in_flight == 1
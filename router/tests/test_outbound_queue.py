@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from connectors.outbound_queue import WS_CLOSE_CODE_OVERLOADED, OutboundQueue
+from fakes import FakeWebSocket, flush
+from utils.enums import DisconnectReason, OverflowPolicy
+
+
+class BlockedWebSocket(FakeWebSocket):
+    """
+    A socket whose sends wait until the peer is released.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.released = asyncio.Event()
+
+    async def send_text(self, message: str) -> None:
+        await self.released.wait()
+        await super().send_text(message)
+
+
+def make_queue(websocket, policy=OverflowPolicy.DROP_NEWEST, **kwargs):
+    return OutboundQueue(
+        websocket=websocket, high_water_mark=2, overflow_policy=policy, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_messages_are_written_in_order():
+    websocket = FakeWebSocket()
+    sent = []
+    queue = make_queue(websocket, on_sent=lambda size, _: sent.append(size))
+    queue.start()
+
+    queue.put("a")
+    queue.put(b"bb")
+    await flush()
+
+    assert websocket.sent == ["a", b"bb"]
+    assert sent == [1, 2]
+    assert queue.depth == 0
+    queue.stop()
+
+
+@pytest.mark.parametrize(
+    "policy, buffered",
+    [
+        (OverflowPolicy.DROP_NEWEST, ["1", "2"]),
+        (OverflowPolicy.DROP_OLDEST, ["2", "3"]),
+    ],
+)
+def test_overflowing_messages_are_dropped_by_policy(policy, buffered):
+    queue = make_queue(FakeWebSocket(), policy=policy)
+
+    accepted = [queue.put(message) for message in ("1", "2", "3")]
+
+    assert [message for message, _ in queue._buffer] == buffered
+    assert accepted[:2] == [True, True]
+    assert queue.dropped == 1
+    assert queue.peak_depth == 2
+
+
+@pytest.mark.parametrize(
+    "policy", [OverflowPolicy.DROP_NEWEST, OverflowPolicy.DROP_OLDEST]
+)
+def test_only_droppable_messages_are_dropped(policy):
+    queue = make_queue(FakeWebSocket(), policy=policy)
+
+    queue.put("response-1", droppable=False)
+    queue.put("log")
+    assert queue.put("response-2", droppable=False)
+
+    assert [message for message, _ in queue._buffer] == ["response-1", "response-2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy", [OverflowPolicy.DROP_NEWEST, OverflowPolicy.DROP_OLDEST]
+)
+async def test_overflow_without_droppable_messages_closes_the_connection(policy):
+    websocket = FakeWebSocket()
+    queue = make_queue(websocket, policy=policy)
+
+    for message in ("1", "2", "3"):
+        queue.put(message, droppable=False)
+    await flush()
+
+    assert queue.close_reason == DisconnectReason.OVERFLOW
+    assert websocket.close_code == WS_CLOSE_CODE_OVERLOADED
+
+
+@pytest.mark.asyncio
+async def test_overflow_closes_the_connection_with_the_close_policy():
+    websocket = FakeWebSocket()
+    queue = make_queue(websocket, policy=OverflowPolicy.CLOSE)
+
+    for message in ("1", "2", "3"):
+        queue.put(message)
+    await flush()
+
+    assert queue.closed
+    assert queue.close_reason == DisconnectReason.OVERFLOW
+    assert websocket.close_code == WS_CLOSE_CODE_OVERLOADED
+    assert not queue.put("4")
+
+
+@pytest.mark.asyncio
+async def test_stuck_peers_are_closed_after_the_send_timeout():
+    websocket = BlockedWebSocket()
+    queue = make_queue(websocket, send_timeout=0.05)
+    queue.start()
+
+    queue.put("1")
+    await asyncio.sleep(0.1)
+    await flush()
+
+    assert queue.close_reason == DisconnectReason.SEND_TIMEOUT
+    assert websocket.close_code == WS_CLOSE_CODE_OVERLOADED
+
+
+@pytest.mark.asyncio
+async def test_slow_peers_do_not_block_senders():
+    websocket = BlockedWebSocket()
+    queue = make_queue(websocket)
+    queue.start()
+
+    assert queue.put("1") and queue.put("2")
+    await flush()
+    websocket.released.set()
+    await flush()
+
+    assert websocket.sent == ["1", "2"]
+    queue.stop()
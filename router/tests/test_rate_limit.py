@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Frozen monotonic clock of the rate limiter, advanced by the test.
+    """
+
+    class Clock:
+        now = time.monotonic()
+
+        def advance(self, seconds: float) -> None:
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.retry_after == pytest.approx(0.5)
+    assert bucket.rejected == 1
+
+    clock.advance(0.5)
+    assert bucket.acquire()
+    assert bucket.rejected == 0
+
+
+def test_limits_apply_per_client_and_message_type(clock):
+    limiter = RateLimiter({"agent_invoke": (1, 1), "agent_log": (0, 0)})
+
+    assert limiter.check("agent-1", "agent_invoke") is None
+    assert limiter.check("agent-1", "agent_invoke") is not None
+    assert limiter.check("agent-2", "agent_invoke") is None
+    assert limiter.check("agent-1", "agent_response") is None
+    assert all(limiter.check("agent-1", "agent_log") is None for _ in range(10))
+
+
+def test_forgotten_clients_start_with_a_full_bucket(clock):
+    limiter = RateLimiter({"agent_invoke": (1, 1)})
+    limiter.check("agent-1", "agent_invoke")
+
+    limiter.forget("agent-1")
+
+    assert limiter.check("agent-1", "agent_invoke") is None
+
+
+def test_idle_buckets_are_swept_when_clients_pile_up(clock):
+    limiter = RateLimiter({"agent_invoke": (1, 2)})
+    limiter._sweep_threshold = 3
+    for client_id in ("idle-1", "idle-2", "busy"):
+        limiter.check(client_id, "agent_invoke")
+    limiter.check("busy", "agent_invoke")
+
+    clock.advance(1)
+    limiter.check("new", "agent_invoke")
+
+    assert set(limiter._buckets) == {"busy", "new"}
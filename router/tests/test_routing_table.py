@@ -0,0 +1,89 @@
+from connectors.routing_table import Connection, RoutingTable
+from fakes import FakeWebSocket
+from utils.enums import ConnectionKind
+
+
+def make_connection(
+    connection_id: str,
+    kind: ConnectionKind = ConnectionKind.AGENT,
+    client_id: str = "",
+    parents: tuple[str, ...] = (),
+) -> Connection:
+    return Connection(
+        connection_id=connection_id,
+        kind=kind,
+        websocket=FakeWebSocket(),
+        client_id=client_id,
+        parents=parents,
+    )
+
+
+def test_replicas_are_grouped_by_client():
+    table = RoutingTable()
+    replicas = [make_connection(f"agent-1:{i}", client_id="agent-1") for i in range(2)]
+    for replica in replicas:
+        table.add(replica)
+
+    assert table.replicas("agent-1") == replicas
+    assert "agent-1" in table and "agent-1:0" in table
+    assert table.routing_ids() == {"agent-1", "agent-1:0", "agent-1:1"}
+
+    table.remove("agent-1:0")
+    assert table.replicas("agent-1") == replicas[1:]
+
+    table.remove("agent-1:1")
+    assert "agent-1" not in table
+    assert len(table) == 0
+
+
+def test_invoke_sessions_are_indexed_under_their_parents():
+    table = RoutingTable()
+    table.add(make_connection("caller"))
+    table.add(make_connection("agent-1"))
+    session = make_connection(
+        "session", kind=ConnectionKind.INVOKE_SESSION, parents=("caller", "agent-1")
+    )
+    table.add(session)
+
+    assert table.children_of("caller") == [session]
+    assert table.children_of("agent-1") == [session]
+
+    table.remove("session")
+    assert table.children_of("caller") == []
+
+
+def test_connections_are_partitioned_by_kind():
+    table = RoutingTable()
+    master = make_connection("master_server_be", kind=ConnectionKind.MASTER)
+    table.add(master)
+    table.add(make_connection("agent-1"))
+
+    assert table.by_kind(ConnectionKind.MASTER) == [master]
+    assert table.count_by_kind() == {
+        "master": 1,
+        "agent": 1,
+        "invoke_session": 0,
+    }
+
+
+def test_adding_a_connection_with_a_known_id_replaces_it():
+    table = RoutingTable()
+    old = make_connection("agent-1")
+    new = make_connection("agent-1")
+    table.add(old)
+
+    assert table.add(new) is old
+    assert table.get("agent-1") is new
+    assert table.replicas("agent-1") == [new]
+
+
+def test_late_disconnects_of_replaced_sockets_are_ignored():
+    table = RoutingTable()
+    old = make_connection("agent-1")
+    new = make_connection("agent-1")
+    table.add(old)
+    table.add(new)
+
+    assert table.remove("agent-1", websocket=old.websocket) is None
+    assert table.get("agent-1") is new
+    assert table.remove("agent-1", websocket=new.websocket) is new
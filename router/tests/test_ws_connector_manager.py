@@ -0,0 +1,242 @@
+import asyncio
+import json
+
+import pytest
+
+from connectors.ws_connector_manager import app_settings
+from fakes import FakeWebSocket, connect, flush, invoke_message
+from utils.agent_tokens import InvalidAgentToken
+
+
+async def connect_agent(manager, agent_token, agent_id):
+    return await connect(manager, {"x-custom-authorization": agent_token(agent_id)})
+
+
+@pytest.mark.asyncio
+async def test_timed_out_calls_release_their_replica(manager, agent_token):
+    manager.inflight.default_timeout = 0.05
+    replica_ids = [
+        (await connect_agent(manager, agent_token, "agent-1"))[0] for _ in range(2)
+    ]
+    caller_id, caller = await connect_agent(manager, agent_token, "caller")
+
+    for _ in range(4):
+        await manager.process_message(caller_id, invoke_message("agent-1"), "")
+    replicas = [manager.routing_table.get(replica_id) for replica_id in replica_ids]
+    assert [len(replica.pending) for replica in replicas] == [2, 2]
+
+    await asyncio.sleep(0.1)
+    await flush()
+
+    assert len(manager.inflight) == 0
+    assert [len(replica.pending) for replica in replicas] == [0, 0]
+    errors = [message["error"] for message in caller.messages()]
+    assert [error["error_type"] for error in errors] == ["AgentGeneralError"] * 4
+    assert [error["error_reason"] for error in errors] == ["AgentTimeout"] * 4
+
+
+@pytest.mark.asyncio
+async def test_dropped_callers_release_their_replica(manager, agent_token):
+    replica_id, _ = await connect_agent(manager, agent_token, "agent-1")
+    caller_id, _ = await connect_agent(manager, agent_token, "caller")
+
+    await manager.process_message(caller_id, invoke_message("agent-1"), "")
+    assert manager.routing_table.get(replica_id).pending
+
+    await manager.disconnect(caller_id)
+
+    assert not manager.routing_table.get(replica_id).pending
+
+
+@pytest.mark.asyncio
+async def test_drained_replica_closes_once_its_calls_time_out(manager, agent_token):
+    manager.inflight.default_timeout = 0.05
+    replica_id, replica = await connect_agent(manager, agent_token, "agent-1")
+    caller_id, _ = await connect_agent(manager, agent_token, "caller")
+
+    await manager.process_message(caller_id, invoke_message("agent-1"), "")
+    assert await manager.drain(replica_id)
+    assert replica.close_code is None
+
+    await asyncio.sleep(0.1)
+    await flush()
+
+    assert replica.close_code == 1001
+    assert replica_id not in manager.routing_table
+
+
+@pytest.mark.asyncio
+async def test_timed_out_calls_release_replicas_on_other_nodes(cluster, agent_token):
+    node_a, node_b = cluster
+    node_a.inflight.default_timeout = 0.05
+    replica_id, _ = await connect_agent(node_b, agent_token, "agent-1")
+    caller_id, caller = await connect_agent(node_a, agent_token, "caller")
+
+    await node_a.process_message(caller_id, invoke_message("agent-1"), "")
+    replica = node_b.routing_table.get(replica_id)
+    assert len(replica.pending) == 1
+
+    await asyncio.sleep(0.1)
+    await flush()
+
+    assert not replica.pending
+    assert caller.messages()[-1]["error"]["error_reason"] == "AgentTimeout"
+
+
+async def connect_backend(manager):
+    return await connect(manager, {"api-key": app_settings.MASTER_BE_API_KEY})
+
+
+def unregistered(backend):
+    return [
+        message["request_payload"]["agent_uuid"]
+        for message in backend.messages()
+        if message.get("request_payload", {}).get("message_type") == "agent_unregister"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_agent_stays_registered_while_replicas_remain_on_other_nodes(
+    cluster, agent_token, monkeypatch
+):
+    monkeypatch.setattr(app_settings, "AGENT_UNREGISTER_GRACE_SECONDS", 0)
+    node_a, node_b = cluster
+    _, backend = await connect_backend(node_a)
+    replica_a, _ = await connect_agent(node_a, agent_token, "agent-1")
+    replica_b, _ = await connect_agent(node_b, agent_token, "agent-1")
+
+    await node_b.disconnect(replica_b)
+    await flush()
+
+    assert unregistered(backend) == []
+    assert await node_b.is_connected("agent-1")
+
+    await node_a.disconnect(replica_a)
+    await flush()
+
+    assert unregistered(backend) == ["agent-1"]
+    assert not await node_a.is_connected("agent-1")
+
+
+@pytest.mark.asyncio
+async def test_rejections_use_an_error_type_known_to_clients(
+    manager, agent_token, monkeypatch
+):
+    monkeypatch.setattr(app_settings, "MAX_CONCURRENT_INVOCATIONS_PER_AGENT", 1)
+    await connect_agent(manager, agent_token, "agent-1")
+    caller_id, caller = await connect_agent(manager, agent_token, "caller")
+
+    for _ in range(2):
+        await manager.process_message(caller_id, invoke_message("agent-1"), "")
+    await flush()
+
+    (error,) = [message["error"] for message in caller.messages()]
+    assert error["error_type"] == "AgentGeneralError"
+    assert error["error_reason"] == "AgentOverloaded"
+    assert error["retry_after"] > 0
+
+
+@pytest.mark.asyncio
+async def test_non_jwt_authorization_is_rejected_when_tokens_are_required(manager):
+    manager.token_verifier.allow_opaque = False
+    websocket = FakeWebSocket({"x-custom-authorization": "agent-1"})
+
+    with pytest.raises(InvalidAgentToken):
+        await manager.connect(websocket)
+
+    assert not websocket.accepted
+    assert "agent-1" not in manager.routing_table
+
+
+@pytest.mark.asyncio
+async def test_opaque_agent_ids_connect_by_default(manager):
+    await connect(manager, {"x-custom-authorization": "agent-1"})
+
+    assert "agent-1" in manager.routing_table
+
+
+def register_message(**payload) -> str:
+    return json.dumps(
+        {"message_type": "agent_register", "request_payload": {"name": "a", **payload}}
+    )
+
+
+def registered(backend):
+    return [
+        message["request_payload"]["agent_uuid"]
+        for message in backend.messages()
+        if message.get("request_payload", {}).get("message_type") == "agent_register"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_registrations_are_only_deduplicated_across_connected_replicas(
+    manager, agent_token
+):
+    _, backend = await connect_backend(manager)
+    replica_ids = [
+        (await connect_agent(manager, agent_token, "agent-1"))[0] for _ in range(2)
+    ]
+
+    for replica_id in replica_ids:
+        await manager.process_message(replica_id, register_message(), "")
+    await flush()
+    assert registered(backend) == ["agent-1"]
+
+    for replica_id in replica_ids:
+        await manager.disconnect(replica_id)
+    replica_id, _ = await connect_agent(manager, agent_token, "agent-1")
+    await manager.process_message(replica_id, register_message(), "")
+    await flush()
+
+    assert registered(backend) == ["agent-1"] * 2
+
+
+@pytest.mark.asyncio
+async def test_registrations_are_forwarded_again_after_a_backend_reconnect(
+    manager, agent_token
+):
+    backend_id, _ = await connect_backend(manager)
+    replica_ids = [
+        (await connect_agent(manager, agent_token, "agent-1"))[0] for _ in range(2)
+    ]
+    await manager.process_message(replica_ids[0], register_message(), "")
+
+    await manager.disconnect(backend_id)
+    _, backend = await connect_backend(manager)
+    await manager.process_message(replica_ids[1], register_message(), "")
+    await flush()
+
+    assert registered(backend) == ["agent-1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("message_type", [[], {"a": 1}, 1])
+async def test_malformed_message_types_are_answered_with_an_error(
+    manager, agent_token, message_type
+):
+    connection_id, websocket = await connect_agent(manager, agent_token, "agent-1")
+
+    await manager.process_message(
+        connection_id, json.dumps({"message_type": message_type}), ""
+    )
+    await flush()
+
+    (reply,) = websocket.messages()
+    assert reply["error"]["error_type"] == "AgentGeneralError"
+    assert manager.metrics.frames_received["unknown"] == 1
+
+
+@pytest.mark.asyncio
+async def test_responses_with_a_malformed_caller_are_rejected(manager, agent_token):
+    connection_id, websocket = await connect_agent(manager, agent_token, "agent-1")
+
+    await manager.process_message(
+        connection_id,
+        json.dumps({"message_type": "agent_response", "invoked_by": 5}),
+        "",
+    )
+    await flush()
+
+    (reply,) = websocket.messages()
+    assert reply["error"]["error_type"] == "InvalidJSONRequestFormat"
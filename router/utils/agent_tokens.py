@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+
+
+@dataclass(frozen=True, slots=True)
+class AgentIdentity:
+    agent_id: str
+    user_id: Optional[str] = None
+
+
+class InvalidAgentToken(Exception):
+    pass
+
+
+class AgentTokenVerifier:
+    """
+    Verifies agent JWTs and caches the identities of valid tokens.
+
+    The cache is an LRU bounded by `max_size` whose entries expire after
+    `ttl_seconds` or when the token itself expires, whichever comes first, so
+    reconnect storms cost a dictionary lookup per agent instead of a signature
+    check.
+    """
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        max_size: int,
+        ttl_seconds: float,
+        allow_opaque: bool = True,
+    ):
+        """
+        Args:
+            secret_key (str): Key the backend signs agent tokens with.
+            algorithm (str): Signing algorithm of agent tokens.
+            max_size (int): Maximum number of cached tokens.
+            ttl_seconds (float): Maximum lifetime of a cached token.
+            allow_opaque (bool): Whether values that are not JWTs at all are
+                accepted as opaque agent IDs instead of being rejected.
+        """
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.allow_opaque = allow_opaque
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: OrderedDict[str, tuple[AgentIdentity, float]] = OrderedDict()
+
+    def verify(self, token: str) -> Optional[AgentIdentity]:
+        """
+        Resolves the identity of an agent token.
+
+        Args:
+            token (str): Value of the `x-custom-authorization` header.
+
+        Returns:
+            Optional[AgentIdentity]: The identity, or None if the value is not a JWT
+                at all and opaque agent IDs are allowed.
+
+        Raises:
+            InvalidAgentToken: If the value is not a JWT and opaque agent IDs are
+                not allowed, or the token has an invalid signature, is expired or
+                has no subject.
+        """
+        now = time.monotonic()
+        if (entry := self._cache.get(token)) is not None:
+            identity, expires_at = entry
+            if expires_at > now:
+                self._cache.move_to_end(token)
+                self.hits += 1
+                return identity
+            del self._cache[token]
+
+        self.misses += 1
+        try:
+            payload = jwt.decode(
+                token, key=self.secret_key, algorithms=[self.algorithm]
+            )
+        except jwt.InvalidSignatureError as e:
+            raise InvalidAgentToken("Invalid agent token signature") from e
+        except jwt.DecodeError as e:
+            if self.allow_opaque:
+                return None
+            raise InvalidAgentToken("Agent token is not a JWT") from e
+        except jwt.InvalidTokenError as e:
+            raise InvalidAgentToken(f"Invalid agent token: {e}") from e
+
+        if not (agent_id := payload.get("sub")):
+            raise InvalidAgentToken("Agent token has no subject")
+        identity = AgentIdentity(agent_id=agent_id, user_id=payload.get("user_id"))
+
+        ttl = self.ttl_seconds
+        if isinstance(expires := payload.get("exp"), (int, float)):
+            ttl = min(ttl, expires - time.time())
+        if ttl > 0 and self.max_size > 0:
+            self._cache[token] = (identity, now + ttl)
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return identity
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,162 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+try:
+    import msgspec
+except ImportError:  # optional speedup
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+ROUTING_HEADER_FIELDS = (
+    "message_type",
+    "agent_uuid",
+    "invoked_by",
+    "timeout",
+    "traceparent",
+)
+
+if msgspec is not None:
+
+    class _RoutingHeader(msgspec.Struct):
+        message_type: Any = msgspec.UNSET
+        agent_uuid: Any = msgspec.UNSET
+        invoked_by: Any = msgspec.UNSET
+        timeout: Any = msgspec.UNSET
+        traceparent: Any = msgspec.UNSET
+
+
+class CodecError(ValueError):
+    pass
+
+
+class JSONCodec(ABC):
+    """
+    Serializer used for all router traffic.
+    """
+
+    name: str
+
+    @abstractmethod
+    def loads(self, data: str | bytes) -> Any:
+        pass
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> str:
+        pass
+
+    def decode_header(self, data: str | bytes) -> dict[str, Any]:
+        """
+        Decodes only the routing header of a message.
+
+        Codecs that can skip unknown fields avoid materializing the (possibly
+        large) request payload. The default implementation decodes everything.
+
+        Args:
+            data (str | bytes): Raw JSON message.
+
+        Returns:
+            dict[str, Any]: Routing header fields present in the message.
+
+        Raises:
+            CodecError: If the message is not a valid JSON object.
+        """
+        body = self.loads(data)
+        if not isinstance(body, dict):
+            raise CodecError("Message must be a JSON object")
+        return {key: body[key] for key in ROUTING_HEADER_FIELDS if key in body}
+
+
+class StdlibJSONCodec(JSONCodec):
+    name = "json"
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        # Unknown fields (i.e. the payload) are validated but never materialized
+        self._header_decoder = msgspec.json.Decoder(_RoutingHeader)
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode()
+
+    def decode_header(self, data: str | bytes) -> dict[str, Any]:
+        try:
+            header = self._header_decoder.decode(data)
+        except msgspec.ValidationError as e:
+            raise CodecError("Message must be a JSON object") from e
+        except msgspec.DecodeError as e:
+            raise CodecError(str(e)) from e
+        return {
+            key: value
+            for key in ROUTING_HEADER_FIELDS
+            if (value := getattr(header, key)) is not msgspec.UNSET
+        }
+
+
+_CODECS: dict[str, Optional[type[JSONCodec]]] = {
+    MsgspecCodec.name: MsgspecCodec if msgspec else None,
+    OrjsonCodec.name: OrjsonCodec if orjson else None,
+    StdlibJSONCodec.name: StdlibJSONCodec,
+}
+
+
+def get_codec(name: str = "auto") -> JSONCodec:
+    """
+    Returns the requested codec.
+
+    Args:
+        name (str): `msgspec`, `orjson`, `json` or `auto` to pick the fastest
+            installed one.
+
+    Returns:
+        JSONCodec: The codec instance.
+
+    Raises:
+        ValueError: If the codec is unknown or its library is not installed.
+    """
+    if name == "auto":
+        codec_cls = next(cls for cls in _CODECS.values() if cls is not None)
+        return codec_cls()
+
+    if name not in _CODECS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    if (codec_cls := _CODECS[name]) is None:
+        raise ValueError(f"JSON codec '{name}' is not installed")
+    return codec_cls()
@@ -8,6 +8,7 @@ class WSMessageType(Enum):
     AGENT_RESPONSE = "agent_response"
     AGENT_ERROR = "agent_error"
     AGENT_LOG = "agent_log"
+    AGENT_STREAM = "agent_stream"
     ML_INVOKE = "ml_invoke"
 
 
@@ -22,3 +23,41 @@ class ErrorType(Enum):
     AGENT_NOT_ACTIVE = "AgentNotActive"
     INVALID_JSON_REQUEST_FORMAT = "InvalidJSONRequestFormat"
     NO_REQUEST_PAYLOAD = "NoRequestPayload"
+
+
+class ErrorReason(Enum):
+    """
+    Cause of a router-generated error, sent as `error_reason` next to an
+    `error_type` the SDK clients can already map to an exception.
+    """
+
+    AGENT_TIMEOUT = "AgentTimeout"
+    AGENT_REPLICA_DISCONNECTED = "AgentReplicaDisconnected"
+    RATE_LIMITED = "RateLimited"
+    AGENT_OVERLOADED = "AgentOverloaded"
+
+
+class ConnectionKind(Enum):
+    MASTER = "master"
+    AGENT = "agent"
+    INVOKE_SESSION = "invoke_session"
+
+
+class OverflowPolicy(Enum):
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+    CLOSE = "close"
+
+
+class DispatchPolicy(Enum):
+    LEAST_IN_FLIGHT = "least_in_flight"
+    ROUND_ROBIN = "round_robin"
+
+
+class DisconnectReason(Enum):
+    CLIENT_CLOSED = "client_closed"
+    REPLACED = "replaced"
+    DRAINED = "drained"
+    OVERFLOW = "overflow"
+    SEND_TIMEOUT = "send_timeout"
+    SEND_ERROR = "send_error"
@@ -0,0 +1,174 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from utils.codec import CodecError, JSONCodec
+
+# Binary frames: 4-byte big-endian header length, JSON header, raw body
+BINARY_HEADER_LENGTH_SIZE = 4
+
+# Routing header fields that have to be strings when present, the message type is
+# checked by the manager which answers unknown types
+STRING_HEADER_FIELDS = ("agent_uuid", "invoked_by", "traceparent")
+
+
+@dataclass(slots=True)
+class Envelope:
+    """
+    A routed message parsed only as far as routing needs.
+
+    The routing header is decoded eagerly, the body is decoded lazily on first
+    access, and forwarding reuses the raw frame so payloads are never
+    re-serialized on the hot path.
+
+    Binary frames carry a JSON header with the usual message fields followed by
+    a raw body, e.g. document bytes, which the router never decodes.
+
+    Attributes:
+        raw (str | bytes): The message exactly as received.
+        message_type (Optional[str]): Value of the `message_type` field.
+        agent_uuid (Optional[str]): Value of the `agent_uuid` field.
+        invoked_by (Optional[str]): Value of the `invoked_by` field.
+        timeout (Optional[float]): Optional per-call deadline of an invocation,
+            in seconds.
+        traceparent (Optional[str]): Optional W3C trace context of the caller.
+    """
+
+    raw: str | bytes
+    codec: JSONCodec
+    message_type: Optional[str] = None
+    agent_uuid: Optional[str] = None
+    invoked_by: Optional[str] = None
+    timeout: Optional[float] = None
+    traceparent: Optional[str] = None
+    _body: Optional[dict[str, Any]] = None
+    _header_end: int = 0
+    _fields: frozenset[str] = frozenset()
+
+    @classmethod
+    def parse(cls, raw: str | bytes, codec: JSONCodec) -> "Envelope":
+        """
+        Parses the routing header of a message.
+
+        Args:
+            raw (str | bytes): The message as received from the socket, a text frame
+                or a binary frame.
+            codec (JSONCodec): Codec used to decode the message.
+
+        Returns:
+            Envelope: The parsed envelope.
+
+        Raises:
+            CodecError: If the message is not a valid JSON object or a well-formed
+                binary frame, or a routing header field has the wrong type.
+        """
+        if isinstance(raw, str):
+            header = _check_header(codec.decode_header(raw))
+            return cls(raw=raw, codec=codec, _fields=frozenset(header), **header)
+
+        if len(raw) < BINARY_HEADER_LENGTH_SIZE:
+            raise CodecError("Binary frame is too short")
+        header_end = BINARY_HEADER_LENGTH_SIZE + int.from_bytes(
+            raw[:BINARY_HEADER_LENGTH_SIZE], "big"
+        )
+        if header_end > len(raw):
+            raise CodecError("Binary frame header exceeds the frame")
+        header = _check_header(
+            codec.decode_header(raw[BINARY_HEADER_LENGTH_SIZE:header_end])
+        )
+        return cls(
+            raw=raw,
+            codec=codec,
+            _header_end=header_end,
+            _fields=frozenset(header),
+            **header,
+        )
+
+    @property
+    def is_binary(self) -> bool:
+        return isinstance(self.raw, bytes)
+
+    @property
+    def data(self) -> Optional[memoryview]:
+        """
+        Raw body of a binary frame, without copying it.
+        """
+        if not self.is_binary:
+            return None
+        return memoryview(self.raw)[self._header_end :]
+
+    @property
+    def body(self) -> dict[str, Any]:
+        """
+        The fully decoded message, or the header of a binary frame. Decoded once,
+        on first access.
+        """
+        if self._body is None:
+            body = self.codec.loads(self._header)
+            if not isinstance(body, dict):
+                raise CodecError("Message must be a JSON object")
+            self._body = body
+        return self._body
+
+    @property
+    def request_payload(self) -> Any:
+        return self.body.get("request_payload")
+
+    @property
+    def _header(self) -> str | bytes:
+        if not self.is_binary:
+            return self.raw
+        return self.raw[BINARY_HEADER_LENGTH_SIZE : self._header_end]
+
+    def with_field(self, key: str, value: str) -> str | bytes:
+        """
+        Returns the raw message with a top-level string field set.
+
+        A new field is appended without decoding the rest of the message, an
+        existing one is replaced by re-serializing the message. The body of a
+        binary frame is never decoded.
+
+        Args:
+            key (str): Name of a routing header field.
+            value (str): Field value.
+
+        Returns:
+            str | bytes: The updated raw message.
+        """
+        if key in self._fields:
+            header = self.codec.dumps({**self.body, key: value})
+        else:
+            header = self._header
+            if isinstance(header, bytes):
+                header = header.decode()
+            head = header.rstrip()
+            head = head[: head.rindex("}")].rstrip()
+            separator = "" if head.endswith("{") else ","
+            header = f"{head}{separator}{json.dumps(key)}:{json.dumps(value)}}}"
+
+        if not self.is_binary:
+            return header
+        return encode_binary_frame(header.encode(), self.data)
+
+
+def _check_header(header: dict[str, Any]) -> dict[str, Any]:
+    for key in STRING_HEADER_FIELDS:
+        if header.get(key) is not None and not isinstance(header[key], str):
+            raise CodecError(f"Field {key} must be a string")
+    return header
+
+
+def encode_binary_frame(header: bytes, data: bytes | memoryview) -> bytes:
+    """
+    Builds a binary frame from a JSON header and a raw body.
+
+    Args:
+        header (bytes): UTF-8 encoded JSON header.
+        data (bytes | memoryview): The raw body.
+
+    Returns:
+        bytes: The frame.
+    """
+    return b"".join(
+        (len(header).to_bytes(BINARY_HEADER_LENGTH_SIZE, "big"), header, data)
+    )
@@ -0,0 +1,25 @@
+from typing import Any
+
+
+class Truncated:
+    """
+    Lazily formatted, size-capped log argument.
+
+    The wrapped value is only converted to a string when a log record is actually
+    emitted, so disabled log levels cost nothing on the hot path.
+
+    Example:
+        logger.debug("Sending message: %s", Truncated(message, 512))
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[: self.limit]}... ({len(text)} chars)"
@@ -0,0 +1,183 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable, Sequence
+
+# Seconds, sized for agent calls that range from milliseconds to minutes
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+# Seconds, sized for writes to a socket
+SEND_DURATION_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    5.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observing a value is a binary search and an increment.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        Returns cumulative counts per upper bound, as exported by Prometheus.
+        """
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else str(bound), total))
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class RouterMetrics:
+    """
+    Counters updated on the routing hot path. Every update is a dictionary
+    increment, gauges are computed from the routing table at scrape time instead.
+    """
+
+    def __init__(self):
+        self.frames_received: defaultdict[str, int] = defaultdict(int)
+        self.bytes_received: defaultdict[str, int] = defaultdict(int)
+        self.frames_sent: defaultdict[str, int] = defaultdict(int)
+        self.bytes_sent: defaultdict[str, int] = defaultdict(int)
+        self.send_duration: dict[str, Histogram] = {}
+        self.disconnects: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self.rejections: defaultdict[str, int] = defaultdict(int)
+        self.dropped: defaultdict[str, int] = defaultdict(int)
+
+    def record_received(self, message_type: str, size: int) -> None:
+        self.frames_received[message_type] += 1
+        self.bytes_received[message_type] += size
+
+    def record_sent(self, kind: str, size: int, duration: float) -> None:
+        self.frames_sent[kind] += 1
+        self.bytes_sent[kind] += size
+        if (histogram := self.send_duration.get(kind)) is None:
+            histogram = self.send_duration[kind] = Histogram(SEND_DURATION_BUCKETS)
+        histogram.observe(duration)
+
+
+class PrometheusExposition:
+    """
+    Builder of the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lines: list[str] = []
+
+    def add(
+        self,
+        name: str,
+        metric_type: str,
+        help_text: str,
+        samples: Iterable[tuple[dict[str, str], float]],
+    ) -> None:
+        """
+        Adds a counter or gauge family.
+
+        Args:
+            name (str): Metric name.
+            metric_type (str): `counter` or `gauge`.
+            help_text (str): Description of the metric.
+            samples (Iterable[tuple[dict[str, str], float]]): Labels and values.
+        """
+        self._header(name, metric_type, help_text)
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    def add_histogram(
+        self,
+        name: str,
+        help_text: str,
+        histograms: Iterable[tuple[dict[str, str], Histogram]],
+    ) -> None:
+        """
+        Adds a histogram family.
+
+        Args:
+            name (str): Metric name.
+            help_text (str): Description of the metric.
+            histograms (Iterable[tuple[dict[str, str], Histogram]]): Labels and
+                histograms.
+        """
+        self._header(name, "histogram", help_text)
+        for labels, histogram in histograms:
+            for bound, count in histogram.cumulative():
+                bucket_labels = _format_labels({**labels, "le": bound})
+                self._lines.append(f"{name}_bucket{bucket_labels} {count}")
+            self._lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            self._lines.append(
+                f"{name}_count{_format_labels(labels)} {histogram.count}"
+            )
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+    def _header(self, name: str, metric_type: str, help_text: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
@@ -8,3 +8,45 @@ class Message(BaseModel):
 
 class MessageResponse(BaseModel):
     detail: str
+
+
+class ConnectionInfo(BaseModel):
+    connection_id: str
+    client_id: str
+    kind: str
+    parents: list[str]
+    connected_at: float
+    last_seen: float
+    bytes_in: int
+    bytes_out: int
+    messages_in: int
+    messages_out: int
+    draining: bool
+    in_flight: int
+    queue_depth: int
+    queue_peak_depth: int
+    queue_dropped: int
+
+
+class ConnectionsResponse(BaseModel):
+    counts: dict[str, int]
+    connections: list[ConnectionInfo]
+
+
+class LatencyHistogram(BaseModel):
+    count: int
+    sum: float
+    buckets: dict[str, int]
+
+
+class AgentCallStats(BaseModel):
+    in_flight: int
+    completed: int
+    failed: int
+    timed_out: int
+    latency: LatencyHistogram
+
+
+class InFlightResponse(BaseModel):
+    in_flight: int
+    agents: dict[str, AgentCallStats]
@@ -0,0 +1,103 @@
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second up to `capacity`.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "retry_after", "rejected")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.retry_after = 0.0
+        self.rejected = 0  # consecutive rejections since the last accepted frame
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def acquire(self) -> bool:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            bool: Whether the token was taken. Otherwise `retry_after` holds the
+                seconds until the next token is available.
+        """
+        self.refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.rejected = 0
+            return True
+
+        self.retry_after = (1 - self.tokens) / self.rate
+        self.rejected += 1
+        return False
+
+
+class RateLimiter:
+    """
+    Token buckets per client and message type.
+
+    A bucket that has refilled completely is indistinguishable from a new one, so
+    idle buckets are dropped whenever the number of tracked clients grows, which
+    bounds memory without a background task.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, int]]):
+        """
+        Args:
+            limits (dict[str, tuple[float, int]]): Rate per second and burst size per
+                message type. Message types without a positive rate are not limited.
+        """
+        self.limits = {
+            message_type: limit
+            for message_type, limit in limits.items()
+            if limit[0] > 0
+        }
+        self._buckets: dict[str, dict[str, TokenBucket]] = {}
+        self._sweep_threshold = 1024
+
+    def check(self, client_id: str, message_type: str) -> Optional[TokenBucket]:
+        """
+        Accounts a frame against the client's limit.
+
+        Args:
+            client_id (str): The client the frame is accounted to.
+            message_type (str): Type of the frame.
+
+        Returns:
+            Optional[TokenBucket]: The exhausted bucket if the frame is rejected.
+        """
+        if (limit := self.limits.get(message_type)) is None:
+            return None
+
+        buckets = self._buckets.get(client_id)
+        if buckets is None:
+            if len(self._buckets) >= self._sweep_threshold:
+                self._sweep()
+            buckets = self._buckets[client_id] = {}
+        if (bucket := buckets.get(message_type)) is None:
+            bucket = buckets[message_type] = TokenBucket(*limit)
+
+        return None if bucket.acquire() else bucket
+
+    def forget(self, client_id: str) -> None:
+        self._buckets.pop(client_id, None)
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for client_id, buckets in list(self._buckets.items()):
+            for bucket in buckets.values():
+                bucket.refill(now)
+            if all(bucket.tokens >= bucket.capacity for bucket in buckets.values()):
+                del self._buckets[client_id]
+        # Sweep again only once the table has grown well past its live size
+        self._sweep_threshold = max(1024, 2 * len(self._buckets))
@@ -0,0 +1,134 @@
+import json
+import logging
+from typing import Any, Optional, Sequence
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.trace import Status, StatusCode
+    from opentelemetry.trace.propagation.tracecontext import (
+        TraceContextTextMapPropagator,
+    )
+except ImportError:  # only required when tracing is enabled
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "genai-router"
+
+_tracer = None
+_provider = None
+
+
+if trace is not None:
+
+    class FileSpanExporter(SpanExporter):
+        """
+        Appends finished spans to a file, one OTLP-like JSON object per line.
+        """
+
+        def __init__(self, path: str):
+            self.path = path
+
+        def export(self, spans: Sequence[Any]) -> "SpanExportResult":
+            with open(self.path, "a") as file:
+                for span in spans:
+                    file.write(json.dumps(json.loads(span.to_json())) + "\n")
+            return SpanExportResult.SUCCESS
+
+
+def setup_tracing(exporter: str, otlp_endpoint: str, file_path: str) -> None:
+    """
+    Configures span export of the router.
+
+    Args:
+        exporter (str): `none`, `otlp`, `file` or `console`.
+        otlp_endpoint (str): URL of the OTLP/HTTP traces endpoint of a collector.
+        file_path (str): File the `file` exporter appends spans to.
+    """
+    global _tracer, _provider
+
+    if exporter == "none":
+        return
+    if trace is None:
+        raise RuntimeError(
+            "Tracing requires the OpenTelemetry SDK, "
+            "install the router with the 'tracing' extra"
+        )
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        span_exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
+    elif exporter == "file":
+        span_exporter = FileSpanExporter(file_path)
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _tracer = _provider.get_tracer(__name__)
+    logger.info("Exporting traces with the %s exporter", exporter)
+
+
+def shutdown_tracing() -> None:
+    """
+    Flushes pending spans.
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def start_span(
+    name: str, traceparent: Optional[str] = None, **attributes: Any
+) -> Optional[Any]:
+    """
+    Starts a span that is ended explicitly, e.g. when the response of a call
+    arrives.
+
+    Args:
+        name (str): Span name.
+        traceparent (Optional[str]): W3C `traceparent` of the caller, the span
+            becomes its child.
+        **attributes: Span attributes, None values are skipped.
+
+    Returns:
+        Optional[Span]: The span, or None when tracing is disabled.
+    """
+    if _tracer is None:
+        return None
+
+    context = None
+    if traceparent:
+        context = TraceContextTextMapPropagator().extract({"traceparent": traceparent})
+    return _tracer.start_span(
+        name,
+        context=context,
+        attributes={k: v for k, v in attributes.items() if v is not None},
+    )
+
+
+def end_span(span: Optional[Any], error: Optional[str] = None) -> None:
+    """
+    Ends a span started with `start_span`, marking it failed if there is an error.
+
+    Args:
+        span (Optional[Span]): The span, None is ignored.
+        error (Optional[str]): Description of the failure.
+    """
+    if span is None:
+        return
+    if error is not None:
+        span.set_status(Status(StatusCode.ERROR, error))
+    span.end()